@@ -3,6 +3,25 @@ from flask_login import LoginManager
 from flask_cors import CORS
 from backend.models import db
 from backend.models.user import User
+from backend.services import unit_of_work
+from backend.services.write_behind import write_behind
+from backend.services.user_cache import user_cache
+from backend.services.key_cache import key_cache
+from backend.services.directory_service import directory
+from backend.services.password_service import password_hasher
+from backend.services.rate_limiter import rate_limiter
+from backend.services.quantum_service import km_client
+from backend.services.cipher_suites import cipher_suites
+from backend.services.compression import compressor
+from backend.services.metrics import metrics
+from backend.services.profiler import request_profiler
+from backend.services.database import database
+from backend.services.archive_service import archive
+from backend.services.import_service import ImportService
+from backend.services.export_service import export_service
+from backend.utils.uploads import UploadRequest
+from sqlalchemy.exc import SQLAlchemyError
+import click
 import os
 
 # Initialize extensions
@@ -14,6 +33,8 @@ def create_app(config_name=None):
     app = Flask(__name__,
                 static_folder='../frontend/static',
                 template_folder='../frontend/templates')
+    # Multipart attachments spool to temporary files as they arrive
+    app.request_class = UploadRequest
 
     # Load configuration
     if config_name is None:
@@ -23,8 +44,25 @@ def create_app(config_name=None):
     app.config.from_object(config[config_name])
 
     # Initialize extensions with app
+    database.configure(app)
     db.init_app(app)
+    database.init_app(app, db)
+    # First, so its after_request hook runs last and times the commit too
+    metrics.init_app(app)
+    request_profiler.init_app(app)
     login_manager.init_app(app)
+    unit_of_work.init_app(app)
+    write_behind.init_app(app)
+    user_cache.init_app(app)
+    key_cache.init_app(app)
+    directory.init_app(app)
+    password_hasher.init_app(app)
+    rate_limiter.init_app(app)
+    km_client.init_app(app)
+    cipher_suites.init_app(app)
+    compressor.init_app(app)
+    archive.init_app(app)
+    export_service.init_app(app)
     CORS(app, supports_credentials=True)
 
     # Configure Flask-Login
@@ -34,7 +72,7 @@ def create_app(config_name=None):
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return user_cache.get(int(user_id))
 
     # Register Blueprints
     from backend.routes.auth import auth_bp
@@ -61,18 +99,118 @@ def create_app(config_name=None):
     def not_found(error):
         return {'error': 'Resource not found'}, 404
 
+    @app.errorhandler(413)
+    def too_large(error):
+        return {'error': error.description}, 413
+
     @app.errorhandler(500)
     def internal_error(error):
         db.session.rollback()
         return {'error': 'Internal server error'}, 500
 
-    # Create tables
+    # CLI commands
+    @app.cli.command('reconcile-counters')
+    @click.option('--batch-size', default=500, show_default=True, help='Users per transaction.')
+    def reconcile_counters(batch_size):
+        """Repair drift in the materialized mailbox counters."""
+        from backend.services.counter_service import CounterService
+
+        stats = CounterService().reconcile(batch_size)
+        print(f"Checked {stats['users_checked']} users, repaired {stats['rows_repaired']} counters")
+
+    @app.cli.command('archive-emails')
+    @click.option('--older-than-days', type=int, help='Archive emails older than this (default: ARCHIVE_AFTER_DAYS).')
+    @click.option('--max-segments', type=int, help='Stop after writing this many segments.')
+    def archive_emails(older_than_days, max_segments):
+        """Move old emails into compressed archive segments."""
+        from datetime import datetime, timedelta
+
+        older_than = None
+        if older_than_days is not None:
+            older_than = datetime.utcnow() - timedelta(days=older_than_days)
+
+        stats = archive.archive(older_than, max_segments)
+        print(f"Archived {stats['emails']} emails into {stats['segments']} segments")
+
+    @app.cli.command('import-mail')
+    @click.argument('source', type=click.Path(exists=True))
+    @click.option('--user', 'owner_email', required=True, help='Address of the QuMail user the mail belongs to.')
+    @click.option('--folder', type=click.Choice(['inbox', 'outbox']), default='inbox', show_default=True)
+    @click.option('--security-level', type=click.Choice(['3', '4']), default='4', show_default=True)
+    @click.option('--restart', is_flag=True, help='Start over instead of resuming an interrupted import.')
+    def import_mail(source, owner_email, folder, security_level, restart):
+        """Import an mbox file or Maildir into a user's folder."""
+        try:
+            stats = ImportService().import_mailbox(source, owner_email, folder, int(security_level), restart)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        print(f"Imported {stats['imported']} emails, skipped {stats['skipped']}, failed {stats['failed']}")
+
+    @app.cli.command('export-mail')
+    @click.option('--user', 'owner_email', required=True, help='Address of the QuMail user to export.')
+    @click.option('--folder', type=click.Choice(['inbox', 'outbox']), default='inbox', show_default=True)
+    @click.option('--format', 'fmt', type=click.Choice(['ndjson', 'mbox']), default='mbox', show_default=True)
+    @click.option('--output', default='-', show_default=True, help='File to write, - for stdout.')
+    @click.option('--gzip', 'compress', is_flag=True, help='Compress the output with gzip.')
+    def export_mail(owner_email, folder, fmt, output, compress):
+        """Export a user's folder, decrypted, as mbox or NDJSON."""
+        owner = User.query.filter_by(email=owner_email.lower().strip()).first()
+        if owner is None:
+            raise click.ClickException(f'No user {owner_email}')
+
+        stats = {}
+        with click.open_file(output, 'wb', atomic=output != '-') as output_file:
+            for chunk in export_service.export(owner.id, folder, fmt, compress, stats):
+                output_file.write(chunk)
+        click.echo(f"Exported {stats['emails']} emails, {stats['failed']} could not be decrypted", err=True)
+
+    # Schema changes are applied with `flask db upgrade` at deploy time;
+    # throwaway databases (tests) can still be created on the fly
+    if click.get_current_context(silent=True) is not None:
+        init_migrations(app)
+
     with app.app_context():
-        db.create_all()
+        if app.config['AUTO_CREATE_SCHEMA']:
+            db.create_all()
+
+            from backend.services.search_service import SearchService
+            SearchService().ensure_index()
+
+        try:
+            directory.load()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            print(f"Recipient directory not loaded, run 'flask db upgrade': {str(e).splitlines()[0]}")
 
     return app
 
 
+def init_migrations(app):
+    """Register Flask-Migrate; only the flask CLI needs it (and alembic)."""
+    from flask_migrate import Migrate
+
+    directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'migrations')
+    Migrate(app, db, directory=os.path.normpath(directory))
+
+
+def init_worker(app):
+    """
+    Per-process setup for pre-forking servers, called in each new worker.
+
+    Anything holding sockets or threads that the master created while
+    loading the app (database pool, KM connections) is replaced with a fresh
+    per-worker instance. Read-mostly state such as the recipient directory is
+    kept and shared copy-on-write.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+    km_client.reset()
+    km_client.connect()
+    user_cache.clear()
+
+
 # For direct execution
 if __name__ == '__main__':
     app = create_app()
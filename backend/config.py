@@ -10,12 +10,131 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
-    # Database
+    # Database (schema is managed by migrations, see `flask db upgrade`)
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///qumail.db'
+    AUTO_CREATE_SCHEMA = os.environ.get('AUTO_CREATE_SCHEMA', 'false').lower() in ['true', 'on', '1']
+
+    # Optional read replica for read-only listings (inbox, outbox, counts, search, keys)
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+
+    # Connection pool (server databases and SQLite files)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 20)
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT') or 30)
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 1800)
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ['true', 'on', '1']
+
+    # SQLite connection pragmas
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', 'true').lower() in ['true', 'on', '1']
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE') or 256 * 1024 * 1024)
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000)
 
     # Key Manager Configuration
     KM_BASE_URL = os.environ.get('KM_BASE_URL') or 'http://localhost:8080'
     KM_API_KEY = os.environ.get('KM_API_KEY') or 'test-key'
+    KM_POOL_SIZE = int(os.environ.get('KM_POOL_SIZE') or 10)
+    KM_TIMEOUT = float(os.environ.get('KM_TIMEOUT') or 30)
+
+    # Decryption
+    DECRYPT_WORKERS = int(os.environ.get('DECRYPT_WORKERS') or 4)
+    BULK_DECRYPT_MAX_EMAILS = int(os.environ.get('BULK_DECRYPT_MAX_EMAILS') or 500)
+
+    # AEAD cipher suite for new mail: 'auto' (fastest on this host), 'aes-256-gcm' or 'chacha20-poly1305'
+    CIPHER_SUITE = os.environ.get('CIPHER_SUITE') or 'auto'
+    # Largest per-thread crypto scratch buffer kept between messages; bigger messages get a one-off buffer
+    CRYPTO_SCRATCH_MAX_BYTES = int(os.environ.get('CRYPTO_SCRATCH_MAX_BYTES') or 4 * 1024 * 1024)
+
+    # Compression ahead of encryption ('auto' = zstd if installed, else zlib)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() in ['true', 'on', '1']
+    COMPRESSION_CODEC = os.environ.get('COMPRESSION_CODEC') or 'auto'
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL') or 6)
+    COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES') or 256)
+    COMPRESSION_MAX_ENTROPY = float(os.environ.get('COMPRESSION_MAX_ENTROPY') or 7.5)
+    COMPRESSION_MIN_SAVING = float(os.environ.get('COMPRESSION_MIN_SAVING') or 0.1)
+    COMPRESSION_MAX_OUTPUT = int(os.environ.get('COMPRESSION_MAX_OUTPUT') or 64 * 1024 * 1024)
+
+    # Cold archive: emails older than ARCHIVE_AFTER_DAYS move to compressed segment files in ARCHIVE_DIR
+    ARCHIVE_ENABLED = os.environ.get('ARCHIVE_ENABLED', 'false').lower() in ['true', 'on', '1']
+    ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR') or 'archive'
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS') or 90)
+    ARCHIVE_INTERVAL = float(os.environ.get('ARCHIVE_INTERVAL') or 3600)
+    ARCHIVE_SEGMENT_EMAILS = int(os.environ.get('ARCHIVE_SEGMENT_EMAILS') or 10000)
+    ARCHIVE_BLOCK_EMAILS = int(os.environ.get('ARCHIVE_BLOCK_EMAILS') or 64)
+    ARCHIVE_COMPRESSION_LEVEL = int(os.environ.get('ARCHIVE_COMPRESSION_LEVEL') or 6)
+    ARCHIVE_BLOCK_CACHE = int(os.environ.get('ARCHIVE_BLOCK_CACHE') or 256)
+
+    # Bulk mbox/Maildir import (flask import-mail)
+    IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS') or 4)
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE') or 500)
+    IMPORT_MAX_MESSAGE_BYTES = int(os.environ.get('IMPORT_MAX_MESSAGE_BYTES') or 64 * 1024 * 1024)
+
+    # Mailbox export (GET /api/email/export, flask export-mail)
+    EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS') or 2)
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE') or 200)
+    EXPORT_CHUNK_BYTES = int(os.environ.get('EXPORT_CHUNK_BYTES') or 64 * 1024)
+    EXPORT_GZIP_LEVEL = int(os.environ.get('EXPORT_GZIP_LEVEL') or 6)
+    EXPORT_MAX_CONCURRENT = int(os.environ.get('EXPORT_MAX_CONCURRENT') or 2)  # 0 = unlimited
+    EXPORT_RETRY_AFTER = int(os.environ.get('EXPORT_RETRY_AFTER') or 30)
+
+    # Upload limits. MAX_CONTENT_LENGTH caps any request body (413 from Content-Length, before reading it);
+    # multipart attachments spool to UPLOAD_TMP_DIR above UPLOAD_SPOOL_BYTES and are capped per file
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH') or 64 * 1024 * 1024)
+    MAX_FORM_MEMORY_SIZE = int(os.environ.get('MAX_FORM_MEMORY_SIZE') or 8 * 1024 * 1024)
+    ATTACHMENT_MAX_BYTES = int(os.environ.get('ATTACHMENT_MAX_BYTES') or 25 * 1024 * 1024)
+    ATTACHMENT_MAX_FILES = int(os.environ.get('ATTACHMENT_MAX_FILES') or 20)
+    UPLOAD_SPOOL_BYTES = int(os.environ.get('UPLOAD_SPOOL_BYTES') or 1024 * 1024)
+    UPLOAD_TMP_DIR = os.environ.get('UPLOAD_TMP_DIR') or None
+
+    # Rows fetched per batch when streaming large listings as JSON
+    STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE') or 500)
+
+    # Write-behind buffer for last_login and read flags
+    WRITE_BEHIND_ENABLED = os.environ.get('WRITE_BEHIND_ENABLED', 'true').lower() in ['true', 'on', '1']
+    WRITE_BEHIND_FLUSH_INTERVAL = float(os.environ.get('WRITE_BEHIND_FLUSH_INTERVAL') or 2.0)
+    WRITE_BEHIND_MAX_PENDING = int(os.environ.get('WRITE_BEHIND_MAX_PENDING') or 1000)
+    WRITE_BEHIND_MAX_RETRIES = int(os.environ.get('WRITE_BEHIND_MAX_RETRIES') or 5)
+
+    # In-process user cache
+    USER_CACHE_ENABLED = os.environ.get('USER_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL') or 60)
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES') or 10000)
+
+    # Unwrapped quantum key bytes, cached briefly for repeated decryption
+    KEY_CACHE_ENABLED = os.environ.get('KEY_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    KEY_CACHE_TTL = float(os.environ.get('KEY_CACHE_TTL') or 60)
+    KEY_CACHE_MAX_ENTRIES = int(os.environ.get('KEY_CACHE_MAX_ENTRIES') or 1024)
+    KEY_CACHE_MAX_BYTES = int(os.environ.get('KEY_CACHE_MAX_BYTES') or 1024 * 1024)
+
+    # Recipient autocomplete
+    DIRECTORY_REFRESH_INTERVAL = float(os.environ.get('DIRECTORY_REFRESH_INTERVAL') or 30)
+    AUTOCOMPLETE_MAX_RESULTS = int(os.environ.get('AUTOCOMPLETE_MAX_RESULTS') or 10)
+
+    # Password hashing (any werkzeug method, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE') or 8)
+    PASSWORD_HASH_RETRY_AFTER = int(os.environ.get('PASSWORD_HASH_RETRY_AFTER') or 1)
+
+    # Token-bucket limits on Key Manager requests ('<count>/<second|minute|hour|day>')
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ['true', 'on', '1']
+    RATE_LIMIT_KM_PER_USER = os.environ.get('RATE_LIMIT_KM_PER_USER') or '30/minute'
+    RATE_LIMIT_KM_PER_PAIR = os.environ.get('RATE_LIMIT_KM_PER_PAIR') or '10/minute'
+    RATE_LIMIT_KM_GLOBAL = os.environ.get('RATE_LIMIT_KM_GLOBAL') or '600/minute'
+    RATE_LIMIT_REDIS_URL = os.environ.get('RATE_LIMIT_REDIS_URL')
+
+    # Prometheus metrics at /metrics; outside development and testing only served with a bearer token
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Per-request profiling: sampled, or forced with the X-Profile-Token header
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() in ['true', 'on', '1']
+    PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE') or 0.0)
+    PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN')
+    PROFILING_ENDPOINTS = os.environ.get('PROFILING_ENDPOINTS') or ''
+    PROFILING_MODE = os.environ.get('PROFILING_MODE') or 'cprofile'
+    PROFILING_SAMPLING_INTERVAL_MS = float(os.environ.get('PROFILING_SAMPLING_INTERVAL_MS') or 1)
+    PROFILING_DIR = os.environ.get('PROFILING_DIR') or 'profiles'
 
     # Email Server Configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
@@ -40,7 +159,10 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    AUTO_CREATE_SCHEMA = True
     WTF_CSRF_ENABLED = False
+    WRITE_BEHIND_ENABLED = False
+    RATE_LIMIT_ENABLED = False
 
 
 config = {
@@ -1,7 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
+from backend.services.database import RoutingSession
 from flask_login import UserMixin
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 import uuid
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy(session_options={'class_': RoutingSession})
\ No newline at end of file
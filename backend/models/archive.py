@@ -0,0 +1,87 @@
+from . import db
+from .email import Email
+from datetime import datetime
+
+
+class ArchiveSegment(db.Model):
+    """An immutable, compressed file of archived email payloads (see ArchiveService)."""
+    __tablename__ = 'archive_segments'
+
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(200), unique=True, nullable=False)
+    period = db.Column(db.String(7), nullable=False, index=True)  # YYYY-MM of the emails' created_at
+
+    first_created_at = db.Column(db.DateTime, nullable=False)
+    last_created_at = db.Column(db.DateTime, nullable=False)
+    email_count = db.Column(db.Integer, nullable=False)
+    raw_bytes = db.Column(db.BigInteger, nullable=False)
+    stored_bytes = db.Column(db.BigInteger, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ArchiveSegment {self.filename}>'
+
+
+class ArchivedEmail(db.Model):
+    """
+    An email moved out of the hot table.
+
+    Metadata and read state stay here, indexed like the emails table; the
+    encrypted body and attachments live in a segment file and are read on
+    first access. The id is the email's original id, so links keep working.
+    """
+    __tablename__ = 'archived_emails'
+    __table_args__ = (
+        db.Index('ix_archived_emails_recipient_created', 'recipient_id', 'created_at'),
+        db.Index('ix_archived_emails_sender_created', 'sender_id', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    uuid = db.Column(db.String(36), unique=True, nullable=False)
+
+    sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    recipient_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+
+    security_level = db.Column(db.Integer, nullable=False)
+    quantum_key_id = db.Column(db.String(100))
+    encryption_algorithm = db.Column(db.String(50), nullable=False)
+
+    created_at = db.Column(db.DateTime)
+    read_at = db.Column(db.DateTime)
+    is_decrypted = db.Column(db.Boolean, default=False)
+    status = db.Column(db.String(20))
+
+    # Location of the payload: item block_item of the compressed block at
+    # block_offset (block_length bytes) in the segment file
+    segment_id = db.Column(db.Integer, db.ForeignKey('archive_segments.id'), nullable=False, index=True)
+    block_offset = db.Column(db.BigInteger, nullable=False)
+    block_length = db.Column(db.Integer, nullable=False)
+    block_item = db.Column(db.Integer, nullable=False)
+
+    sender = db.relationship('User', foreign_keys=[sender_id])
+    recipient = db.relationship('User', foreign_keys=[recipient_id])
+    segment = db.relationship('ArchiveSegment')
+
+    @property
+    def encrypted_body(self):
+        return self._payload()[0]
+
+    @property
+    def encrypted_attachments(self):
+        return self._payload()[1]
+
+    def _payload(self):
+        from backend.services.archive_service import archive
+
+        return archive.read_payload(
+            self.segment.filename, self.block_offset, self.block_length, self.block_item, self.id
+        )
+
+    # Same shape as a hot email, so callers need not care which tier it came from
+    to_dict = Email.to_dict
+
+    def __repr__(self):
+        return f'<ArchivedEmail {self.uuid[:8]}>'
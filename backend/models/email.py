@@ -1,10 +1,16 @@
 from . import db
+from .mailbox_counter import MailboxCounter
 from datetime import datetime
 import uuid
 
 
 class Email(db.Model):
     __tablename__ = 'emails'
+    __table_args__ = (
+        # Folder listings and scoped searches filter by owner, newest first
+        db.Index('ix_emails_recipient_created', 'recipient_id', 'created_at'),
+        db.Index('ix_emails_sender_created', 'sender_id', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     uuid = db.Column(db.String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
@@ -21,7 +27,7 @@ class Email(db.Model):
     # Security Configuration
     security_level = db.Column(db.Integer, nullable=False, default=1)  # 1-4
     quantum_key_id = db.Column(db.String(100))  # Reference to quantum key used
-    encryption_algorithm = db.Column(db.String(50), nullable=False)  # 'OTP', 'AES-QKD', 'PQC', 'STANDARD'
+    encryption_algorithm = db.Column(db.String(50), nullable=False)  # 'OTP', or 'AES-QKD'/'PQC-AES'/'STANDARD' + '/<cipher suite>'
 
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
@@ -51,8 +57,70 @@ class Email(db.Model):
     def mark_as_read(self):
         """Mark email as read."""
         if not self.read_at:
-            self.read_at = datetime.utcnow()
-            db.session.commit()
+            # Conditional update so concurrent readers decrement the counter once
+            result = db.session.execute(
+                db.update(Email)
+                .where(Email.id == self.id, Email.read_at.is_(None))
+                .values(read_at=datetime.utcnow())
+            )
+            if result.rowcount:
+                MailboxCounter.apply(self.recipient_id, 'inbox', self.security_level, unread=-1)
+
+    @staticmethod
+    def mark_many_as_read(read_times, decrypted=False):
+        """
+        Mark several emails as read with set-based updates.
+
+        Args:
+            read_times: Dict of email id -> read time
+            decrypted: Also set is_decrypted
+
+        Only emails that are still unread change and move the unread counters,
+        so applying the same batch twice is harmless. Archived emails keep
+        their read state in the archive index and are updated there.
+        """
+        if not read_times:
+            return
+
+        from .archive import ArchivedEmail
+
+        unread_deltas = {}
+        for model in (Email, ArchivedEmail):
+            for recipient_id, security_level in Email._mark_read(model, read_times, decrypted):
+                key = (recipient_id, security_level)
+                unread_deltas[key] = unread_deltas.get(key, 0) - 1
+        for (recipient_id, security_level), delta in unread_deltas.items():
+            MailboxCounter.apply(recipient_id, 'inbox', security_level, unread=delta)
+
+    @staticmethod
+    def _mark_read(model, read_times, decrypted):
+        """Apply mark_many_as_read to one table; returns (recipient_id, security_level) of newly read rows."""
+        email_ids = list(read_times)
+        mark_read = db.update(model) \
+            .where(model.id.in_(email_ids), model.read_at.is_(None)) \
+            .values(read_at=db.case(read_times, value=model.id)) \
+            .execution_options(synchronize_session=False)
+
+        if db.session.get_bind().dialect.update_returning:
+            newly_read = db.session.execute(
+                mark_read.returning(model.recipient_id, model.security_level)
+            ).all()
+        else:
+            newly_read = db.session.execute(
+                db.select(model.recipient_id, model.security_level)
+                .where(model.id.in_(email_ids), model.read_at.is_(None))
+            ).all()
+            db.session.execute(mark_read)
+
+        if decrypted:
+            db.session.execute(
+                db.update(model)
+                .where(model.id.in_(email_ids), model.is_decrypted.isnot(True))
+                .values(is_decrypted=True)
+                .execution_options(synchronize_session=False)
+            )
+
+        return newly_read
 
     def __repr__(self):
         return f'<Email {self.uuid[:8]} from {self.sender.email}>'
\ No newline at end of file
@@ -0,0 +1,41 @@
+from . import db
+from datetime import datetime
+
+
+class MailImport(db.Model):
+    """Progress of a bulk mbox/Maildir import, committed with each batch (see ImportService)."""
+    __tablename__ = 'mail_imports'
+    __table_args__ = (
+        db.UniqueConstraint('source', 'owner_id', 'folder', name='uq_mail_imports_source_owner_folder'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(500), nullable=False)  # Absolute path of the mbox file or Maildir
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    folder = db.Column(db.String(20), nullable=False)  # inbox, outbox
+    security_level = db.Column(db.Integer, nullable=False)
+
+    # Resume point: byte offset into the mbox, or the last Maildir entry done
+    position = db.Column(db.String(300), nullable=False, default='')
+    imported = db.Column(db.Integer, nullable=False, default=0)
+    skipped = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default='running')  # running, done
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert import progress to dictionary."""
+        return {
+            'source': self.source,
+            'folder': self.folder,
+            'security_level': self.security_level,
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'status': self.status
+        }
+
+    def __repr__(self):
+        return f'<MailImport {self.source} ({self.status})>'
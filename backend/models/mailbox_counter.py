@@ -0,0 +1,68 @@
+from . import db
+
+
+class MailboxCounter(db.Model):
+    """Materialized per-folder email counts, split by security level."""
+    __tablename__ = 'mailbox_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    folder = db.Column(db.String(20), primary_key=True)  # inbox, outbox
+    security_level = db.Column(db.Integer, primary_key=True)  # 1-4
+
+    total = db.Column(db.Integer, nullable=False, default=0)
+    unread = db.Column(db.Integer, nullable=False, default=0)  # Only tracked for inbox
+
+    @staticmethod
+    def apply(user_id, folder, security_level, total=0, unread=0):
+        """
+        Add deltas to a counter in the current transaction.
+
+        Uses a single atomic upsert so concurrent senders never lose an
+        increment; the caller commits together with the email change.
+        """
+        table = MailboxCounter.__table__
+        dialect = db.session.get_bind().dialect.name
+        values = {
+            'user_id': user_id,
+            'folder': folder,
+            'security_level': security_level,
+            'total': total,
+            'unread': unread
+        }
+
+        if dialect in ('sqlite', 'postgresql'):
+            # Dialect modules are only imported once a counter is written
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['user_id', 'folder', 'security_level'],
+                set_={
+                    'total': table.c.total + stmt.excluded.total,
+                    'unread': table.c.unread + stmt.excluded.unread
+                }
+            )
+            db.session.execute(stmt)
+            return
+
+        result = db.session.execute(
+            table.update().where(
+                table.c.user_id == user_id,
+                table.c.folder == folder,
+                table.c.security_level == security_level
+            ).values(total=table.c.total + total, unread=table.c.unread + unread)
+        )
+        if result.rowcount == 0:
+            db.session.execute(table.insert().values(**values))
+
+    def to_dict(self):
+        """Convert counter to dictionary."""
+        return {
+            'total': self.total,
+            'unread': self.unread
+        }
+
+    def __repr__(self):
+        return f'<MailboxCounter {self.user_id}/{self.folder}/L{self.security_level}>'
\ No newline at end of file
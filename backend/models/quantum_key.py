@@ -48,7 +48,6 @@ class QuantumKey(db.Model):
         """Mark key as used."""
         self.is_used = True
         self.used_at = datetime.utcnow()
-        db.session.commit()
 
     def to_dict(self):
         """Convert key to dictionary."""
@@ -1,5 +1,5 @@
 from . import db, UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from backend.services.password_service import password_hasher
 from datetime import datetime
 
 
@@ -8,7 +8,7 @@ class User(UserMixin, db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
     full_name = db.Column(db.String(100), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -21,11 +21,15 @@ class User(UserMixin, db.Model):
 
     def set_password(self, password):
         """Hash and set password."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
         """Check if provided password matches hash."""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def needs_rehash(self):
+        """Check if the stored hash uses outdated parameters."""
+        return password_hasher.needs_rehash(self.password_hash)
 
     def get_id(self):
         """Required for Flask-Login."""
@@ -1,8 +1,12 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from backend.models import db
 from backend.models.user import User
 from backend.services.auth_service import AuthService
+from backend.services.write_behind import write_behind
+from backend.services.user_cache import user_cache
+from backend.services.directory_service import directory
+from backend.services.password_service import PasswordHasherBusy
 from datetime import datetime
 import re
 
@@ -34,7 +38,7 @@ def register():
             return jsonify({'error': 'Password must be at least 8 characters long'}), 400
 
         # Check if user already exists
-        if User.query.filter_by(email=email).first():
+        if user_cache.get_by_email(email):
             return jsonify({'error': 'Email already registered'}), 409
 
         # Create new user
@@ -45,6 +49,8 @@ def register():
             'user': user.to_dict()
         }), 201
 
+    except PasswordHasherBusy as e:
+        return _busy_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Registration failed'}), 500
@@ -67,8 +73,7 @@ def login():
 
         if user:
             login_user(user, remember=data.get('remember', False))
-            user.last_login = datetime.utcnow()
-            db.session.commit()
+            write_behind.record_login(user)
 
             return jsonify({
                 'message': 'Login successful',
@@ -77,6 +82,8 @@ def login():
         else:
             return jsonify({'error': 'Invalid email or password'}), 401
 
+    except PasswordHasherBusy as e:
+        return _busy_response(e)
     except Exception as e:
         return jsonify({'error': 'Login failed'}), 500
 
@@ -111,7 +118,7 @@ def search_users():
         if not email:
             return jsonify({'error': 'Email parameter required'}), 400
 
-        user = User.query.filter_by(email=email).first()
+        user = user_cache.get_by_email(email)
 
         if user:
             return jsonify({
@@ -125,4 +132,33 @@ def search_users():
             return jsonify({'found': False}), 200
 
     except Exception as e:
-        return jsonify({'error': 'Search failed'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Search failed'}), 500
+
+
+@auth_bp.route('/users/autocomplete', methods=['GET'])
+@login_required
+def autocomplete_users():
+    """Suggest recipients whose email or name starts with the typed prefix."""
+    try:
+        query = request.args.get('q', '').strip()
+        max_results = current_app.config['AUTOCOMPLETE_MAX_RESULTS']
+
+        try:
+            limit = min(int(request.args.get('limit', max_results)), max_results)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+
+        if not query:
+            return jsonify({'users': []}), 200
+
+        return jsonify({'users': directory.search(query, limit)}), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Autocomplete failed'}), 500
+
+
+def _busy_response(error):
+    response = jsonify({'error': 'Server busy, please retry shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
@@ -1,18 +1,42 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from flask_login import login_required, current_user
 from backend.services.email_service import EmailService
+from backend.services.search_service import SearchService
+from backend.services.counter_service import CounterService
+from backend.services.export_service import export_service, ExportBusy
+from backend.services.rate_limiter import rate_limiter, RateLimitExceeded, rate_limited_response
+from backend.services.database import use_replica
+from backend.services.user_cache import user_cache
+from backend.utils.json_stream import stream_json
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from datetime import datetime
 import base64
+import json
+import os
 
 email_bp = Blueprint('email', __name__)
 email_service = EmailService()
+search_service = SearchService()
+counter_service = CounterService()
 
 
 @email_bp.route('/send', methods=['POST'])
 @login_required
 def send_email():
-    """Send encrypted email endpoint."""
+    """
+    Send encrypted email endpoint.
+
+    Takes JSON with base64 attachments, or multipart/form-data with the same
+    fields as form values and the files as 'attachments' parts; uploaded
+    files are spooled to temporary storage and read only when encrypted.
+    """
     try:
-        data = request.get_json()
+        if request.mimetype == 'multipart/form-data':
+            data = request.form
+            attachments = _uploaded_attachments()
+        else:
+            data = request.get_json()
+            attachments = _json_attachments(data)
 
         # Input validation
         required_fields = ['recipient_email', 'subject', 'body', 'security_level']
@@ -27,16 +51,16 @@ def send_email():
         if security_level not in [1, 2, 3, 4]:
             return jsonify({'error': 'Invalid security level'}), 400
 
-        # Handle attachments
-        attachments = []
-        if 'attachments' in data and data['attachments']:
-            for attachment in data['attachments']:
-                attachments.append({
-                    'filename': attachment.get('filename'),
-                    'content_type': attachment.get('content_type'),
-                    'size': attachment.get('size'),
-                    'data': attachment.get('data')  # Base64 encoded data
-                })
+        max_files = current_app.config['ATTACHMENT_MAX_FILES']
+        if len(attachments) > max_files:
+            return jsonify({'error': f'At most {max_files} attachments per email'}), 400
+
+        # Levels 1 and 2 draw a key from the Key Manager; unknown recipients
+        # are turned away first so they do not use up the KM quota
+        if security_level in [1, 2]:
+            if not user_cache.get_by_email(recipient_email):
+                return jsonify({'error': 'Recipient not found', 'status': 'failed'}), 400
+            rate_limiter.check_km_request(current_user.id, recipient_email)
 
         # Send email
         result = email_service.send_email(
@@ -53,17 +77,69 @@ def send_email():
         else:
             return jsonify(result), 400
 
+    except BadRequest as e:
+        return jsonify({'error': e.description}), 400
+    except RequestEntityTooLarge as e:
+        return jsonify({'error': e.description}), 413
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
     except Exception as e:
         return jsonify({'error': f'Failed to send email: {str(e)}'}), 500
 
 
+def _json_attachments(data):
+    """
+    Attachments of a JSON send request (base64 'data'), checked against
+    ATTACHMENT_MAX_BYTES. Raises BadRequest for malformed attachments.
+    """
+    max_bytes = current_app.config['ATTACHMENT_MAX_BYTES']
+    attachments = []
+    if data and data.get('attachments'):
+        if not isinstance(data['attachments'], list):
+            raise BadRequest('attachments must be a list')
+
+        for attachment in data['attachments']:
+            encoded = attachment.get('data') if isinstance(attachment, dict) else None
+            if not isinstance(encoded, str):
+                raise BadRequest('Attachment data must be a base64 string')
+
+            # Decoded size, without decoding
+            if max_bytes and len(encoded) * 3 // 4 - (len(encoded) - len(encoded.rstrip('='))) > max_bytes:
+                raise RequestEntityTooLarge(f'Attachment larger than {max_bytes} bytes')
+
+            attachments.append({
+                'filename': attachment.get('filename'),
+                'content_type': attachment.get('content_type'),
+                'size': attachment.get('size'),
+                'data': encoded  # Base64 encoded data
+            })
+    return attachments
+
+
+def _uploaded_attachments():
+    """Attachments of a multipart send request, as handles to their spooled files."""
+    attachments = []
+    for upload in request.files.getlist('attachments'):
+        upload.stream.seek(0, os.SEEK_END)
+        attachments.append({
+            'filename': upload.filename,
+            'content_type': upload.mimetype or 'application/octet-stream',
+            'size': upload.stream.tell(),
+            'file': upload.stream
+        })
+    return attachments
+
+
 @email_bp.route('/inbox', methods=['GET'])
 @login_required
+@use_replica
 def get_inbox():
     """Get user's inbox."""
     try:
-        emails = email_service.get_user_emails(current_user.id, 'inbox')
-        return jsonify({'emails': emails}), 200
+        emails = email_service.iter_user_emails(
+            current_user.id, 'inbox', current_app.config['STREAM_BATCH_SIZE']
+        )
+        return stream_json(emails, key='emails')
 
     except Exception as e:
         return jsonify({'error': f'Failed to get inbox: {str(e)}'}), 500
@@ -71,16 +147,72 @@ def get_inbox():
 
 @email_bp.route('/outbox', methods=['GET'])
 @login_required
+@use_replica
 def get_outbox():
     """Get user's outbox."""
     try:
-        emails = email_service.get_user_emails(current_user.id, 'outbox')
-        return jsonify({'emails': emails}), 200
+        emails = email_service.iter_user_emails(
+            current_user.id, 'outbox', current_app.config['STREAM_BATCH_SIZE']
+        )
+        return stream_json(emails, key='emails')
 
     except Exception as e:
         return jsonify({'error': f'Failed to get outbox: {str(e)}'}), 500
 
 
+@email_bp.route('/counts', methods=['GET'])
+@login_required
+@use_replica
+def get_counts():
+    """Get total and unread counts per folder."""
+    try:
+        return jsonify(counter_service.get_counts(current_user.id)), 200
+
+    except Exception as e:
+        return jsonify({'error': f'Failed to get counts: {str(e)}'}), 500
+
+
+@email_bp.route('/search', methods=['GET'])
+@login_required
+@use_replica
+def search_emails():
+    """Search user's emails by subject, sender/recipient and date range."""
+    try:
+        folder = request.args.get('folder', 'all')
+        if folder not in ['inbox', 'outbox', 'all']:
+            return jsonify({'error': 'Invalid folder'}), 400
+
+        try:
+            page = max(int(request.args.get('page', 1)), 1)
+            per_page = min(max(int(request.args.get('per_page', 20)), 1), 100)
+        except ValueError:
+            return jsonify({'error': 'Invalid pagination parameters'}), 400
+
+        try:
+            date_from = request.args.get('date_from')
+            date_to = request.args.get('date_to')
+            date_from = datetime.fromisoformat(date_from) if date_from else None
+            date_to = datetime.fromisoformat(date_to) if date_to else None
+        except ValueError:
+            return jsonify({'error': 'Dates must be in ISO 8601 format'}), 400
+
+        result = search_service.search(
+            user_id=current_user.id,
+            query=request.args.get('q', ''),
+            folder=folder,
+            sender=request.args.get('sender', ''),
+            recipient=request.args.get('recipient', ''),
+            date_from=date_from,
+            date_to=date_to,
+            page=page,
+            per_page=per_page
+        )
+        return jsonify(result), 200
+
+    except Exception as e:
+        return jsonify({'error': f'Search failed: {str(e)}'}), 500
+
+
 @email_bp.route('/<int:email_id>/decrypt', methods=['POST'])
 @login_required
 def decrypt_email(email_id):
@@ -97,14 +229,75 @@ def decrypt_email(email_id):
         return jsonify({'error': f'Failed to decrypt email: {str(e)}'}), 500
 
 
+@email_bp.route('/decrypt', methods=['POST'])
+@login_required
+def decrypt_emails():
+    """Decrypt several emails, streaming one JSON result per line (NDJSON)."""
+    try:
+        data = request.get_json() or {}
+        email_ids = data.get('email_ids')
+
+        if not isinstance(email_ids, list) or not email_ids:
+            return jsonify({'error': 'email_ids must be a non-empty list'}), 400
+
+        if not all(isinstance(email_id, int) for email_id in email_ids):
+            return jsonify({'error': 'email_ids must be integers'}), 400
+
+        max_emails = current_app.config['BULK_DECRYPT_MAX_EMAILS']
+        if len(email_ids) > max_emails:
+            return jsonify({'error': f'At most {max_emails} emails per request'}), 400
+
+        results = email_service.decrypt_emails(email_ids, current_user.id)
+        lines = (json.dumps(result) + '\n' for result in results)
+
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
+    except Exception as e:
+        return jsonify({'error': f'Failed to decrypt emails: {str(e)}'}), 500
+
+
+@email_bp.route('/export', methods=['GET'])
+@login_required
+@use_replica
+def export_emails():
+    """Export a folder decrypted, as NDJSON or mbox, optionally gzipped (streamed)."""
+    try:
+        folder = request.args.get('folder', 'inbox')
+        fmt = request.args.get('format', 'ndjson')
+        compress = request.args.get('gzip', '').lower() in ['true', 'on', '1']
+
+        try:
+            chunks = export_service.export(current_user.id, folder, fmt, compress)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        export_service.acquire()
+        try:
+            response = Response(stream_with_context(chunks), mimetype=export_service.mimetype(fmt, compress))
+        except Exception:
+            export_service.release()
+            raise
+        # Runs once the body is fully sent or the client goes away
+        response.call_on_close(export_service.release)
+        response.headers['Content-Disposition'] = \
+            f'attachment; filename="{export_service.filename(folder, fmt, compress)}"'
+        return response
+
+    except ExportBusy as e:
+        response = jsonify({'error': 'Too many exports running, please retry later'})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    except Exception as e:
+        return jsonify({'error': f'Failed to export emails: {str(e)}'}), 500
+
+
 @email_bp.route('/<int:email_id>', methods=['GET'])
 @login_required
 def get_email(email_id):
     """Get email details (encrypted)."""
     try:
-        from backend.models.email import Email
-
-        email = Email.query.get(email_id)
+        email = email_service.get_email(email_id)
         if not email:
             return jsonify({'error': 'Email not found'}), 404
 
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from backend.services.quantum_service import QuantumService
+from backend.services.rate_limiter import rate_limiter, RateLimitExceeded, rate_limited_response
+from backend.services.database import use_replica
+from backend.utils.json_stream import stream_json
 from flask import current_app
 
 quantum_bp = Blueprint('quantum', __name__)
@@ -29,17 +32,17 @@ def check_quantum_status():
 
 @quantum_bp.route('/keys', methods=['GET'])
 @login_required
+@use_replica
 def get_user_keys():
     """Get user's quantum keys."""
     try:
         from backend.models.quantum_key import QuantumKey
 
         keys = QuantumKey.query.filter_by(user_id=current_user.id) \
-            .order_by(QuantumKey.created_at.desc()).all()
+            .order_by(QuantumKey.created_at.desc()) \
+            .yield_per(current_app.config['STREAM_BATCH_SIZE'])
 
-        return jsonify({
-            'keys': [key.to_dict() for key in keys]
-        }), 200
+        return stream_json((key.to_dict() for key in keys), key='keys')
 
     except Exception as e:
         return jsonify({'error': f'Failed to get keys: {str(e)}'}), 500
@@ -58,6 +61,8 @@ def request_quantum_key():
         if not recipient_email:
             return jsonify({'error': 'Recipient email required'}), 400
 
+        rate_limiter.check_km_request(current_user.id, recipient_email)
+
         quantum_service = QuantumService(
             current_app.config['KM_BASE_URL'],
             current_app.config['KM_API_KEY']
@@ -75,5 +80,7 @@ def request_quantum_key():
         else:
             return jsonify({'error': 'Failed to obtain quantum key'}), 400
 
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
     except Exception as e:
         return jsonify({'error': f'Failed to request key: {str(e)}'}), 500
\ No newline at end of file
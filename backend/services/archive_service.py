@@ -0,0 +1,287 @@
+from backend.models import db
+from backend.models.archive import ArchiveSegment, ArchivedEmail
+from backend.models.email import Email
+from backend.services.search_service import SearchService
+from backend.services.unit_of_work import unit_of_work
+from sqlalchemy import select, func
+from sqlalchemy.orm import joinedload
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+
+
+class ArchiveService:
+    """
+    Cold tier for old mail, so the hot emails table stays a constant size.
+
+    The archiver moves emails older than ARCHIVE_AFTER_DAYS, oldest first,
+    into segment files under ARCHIVE_DIR: at most ARCHIVE_SEGMENT_EMAILS
+    emails of one calendar month each, in independently compressed blocks of
+    ARCHIVE_BLOCK_EMAILS payloads grouped by recipient. A segment is written to a temporary file,
+    synced, renamed into place and made read-only; it is never changed
+    afterwards. In the same transaction the emails' metadata is copied to
+    the archived_emails index, with the block location, and the hot rows
+    and their search postings are deleted. Each segment is recorded with
+    its size and SHA-256.
+
+    Reads are transparent: listings merge both tiers by date, lookups by id
+    fall back to the archive, and a payload is read by decompressing only
+    its block (recently used blocks are cached, ARCHIVE_BLOCK_CACHE).
+
+    Run it from cron with `flask archive-emails`, or set ARCHIVE_ENABLED to
+    run it every ARCHIVE_INTERVAL seconds in the background. A lock file in
+    ARCHIVE_DIR keeps processes sharing that directory from archiving at
+    the same time.
+    """
+
+    MAGIC = b'QMAR1\n'
+    LOCK_FILE = '.archiver.lock'
+
+    def __init__(self):
+        self.enabled = False
+        self.directory = 'archive'
+        self.after_days = 90
+        self.interval = 3600.0
+        self.segment_emails = 10000
+        self.block_emails = 64
+        self.compression_level = 6
+        self._app = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._read_block = lru_cache(maxsize=256)(self._load_block)
+        self.search_service = SearchService()
+
+    def init_app(self, app):
+        self._app = app
+        self.enabled = app.config['ARCHIVE_ENABLED']
+        self.directory = app.config['ARCHIVE_DIR']
+        self.after_days = app.config['ARCHIVE_AFTER_DAYS']
+        self.interval = app.config['ARCHIVE_INTERVAL']
+        self.segment_emails = app.config['ARCHIVE_SEGMENT_EMAILS']
+        self.block_emails = app.config['ARCHIVE_BLOCK_EMAILS']
+        self.compression_level = app.config['ARCHIVE_COMPRESSION_LEVEL']
+        self._read_block = lru_cache(maxsize=app.config['ARCHIVE_BLOCK_CACHE'])(self._load_block)
+
+        if self.enabled:
+            @app.before_request
+            def start_archiver():
+                self._ensure_archiver()
+
+    # Reads
+
+    def get_email(self, email_id: int) -> Optional[ArchivedEmail]:
+        """An archived email by its original id."""
+        return db.session.get(ArchivedEmail, email_id)
+
+    def get_emails(self, email_ids: List[int]) -> List[ArchivedEmail]:
+        """Archived emails among email_ids, with sender and recipient loaded."""
+        if not email_ids:
+            return []
+        return ArchivedEmail.query.options(
+            joinedload(ArchivedEmail.sender), joinedload(ArchivedEmail.recipient),
+            joinedload(ArchivedEmail.segment)
+        ).filter(ArchivedEmail.id.in_(email_ids)).all()
+
+    def read_payload(self, filename: str, offset: int, length: int, item: int,
+                     email_id: int) -> Tuple[str, Optional[str]]:
+        """(encrypted_body, encrypted_attachments) of an archived email."""
+        email_id_stored, encrypted_body, encrypted_attachments = \
+            self._read_block(filename, offset, length)[item]
+        if email_id_stored != email_id:
+            raise ValueError(f'Archive segment {filename} does not hold email {email_id} at {offset}/{item}')
+        return encrypted_body, encrypted_attachments
+
+    def _load_block(self, filename: str, offset: int, length: int) -> List[List[Any]]:
+        with open(os.path.join(self.directory, filename), 'rb') as segment_file:
+            segment_file.seek(offset)
+            data = segment_file.read(length)
+        if len(data) != length:
+            raise ValueError(f'Archive segment {filename} is truncated')
+        return json.loads(zlib.decompress(data))
+
+    # Archiving
+
+    def archive(self, older_than: Optional[datetime] = None,
+                max_segments: Optional[int] = None) -> Dict[str, int]:
+        """
+        Move emails created before older_than (default: ARCHIVE_AFTER_DAYS
+        ago) into new segments. Runs inside an app context.
+
+        Returns:
+            Dict with the number of segments written and emails archived
+        """
+        cutoff = older_than or datetime.utcnow() - timedelta(days=self.after_days)
+        stats = {'segments': 0, 'emails': 0}
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, self.LOCK_FILE), 'a') as lock_file:
+            if not self._try_lock(lock_file):
+                print('Archiver already running elsewhere, skipping')
+                return stats
+
+            while max_segments is None or stats['segments'] < max_segments:
+                archived = self._archive_segment(cutoff)
+                if not archived:
+                    break
+                stats['segments'] += 1
+                stats['emails'] += archived
+
+        return stats
+
+    def _archive_segment(self, cutoff: datetime) -> int:
+        """Write one segment of the oldest archivable emails. Returns how many were moved."""
+        # The newest email always stays hot: SQLite hands out max(id) + 1 as
+        # the next id, which must never collide with an archived one.
+        newest_id = db.session.execute(select(func.max(Email.id))).scalar()
+        emails = Email.query.filter(Email.created_at < cutoff, Email.id < newest_id) \
+            .order_by(Email.created_at, Email.id) \
+            .limit(self.segment_emails) \
+            .with_for_update() \
+            .all() if newest_id else []
+        if not emails:
+            db.session.rollback()
+            return 0
+
+        # One calendar month per segment
+        period = emails[0].created_at.strftime('%Y-%m')
+        emails = [email for email in emails if email.created_at.strftime('%Y-%m') == period]
+
+        filename = f'{period}-{emails[0].id}-{emails[-1].id}.qma'
+        path = os.path.join(self.directory, filename)
+        first_created_at, last_created_at = emails[0].created_at, emails[-1].created_at
+
+        # Cluster blocks by recipient, so listing an inbox decompresses a few
+        # blocks per segment instead of one per email
+        emails.sort(key=lambda email: (email.recipient_id, email.created_at, email.id))
+        try:
+            with unit_of_work():
+                locations, raw_bytes, digest = self._write_segment(path, emails)
+                segment = ArchiveSegment(
+                    filename=filename,
+                    period=period,
+                    first_created_at=first_created_at,
+                    last_created_at=last_created_at,
+                    email_count=len(emails),
+                    raw_bytes=raw_bytes,
+                    stored_bytes=os.path.getsize(path),
+                    sha256=digest
+                )
+                db.session.add(segment)
+                db.session.flush()
+
+                db.session.execute(ArchivedEmail.__table__.insert(), [{
+                    'id': email.id,
+                    'uuid': email.uuid,
+                    'sender_id': email.sender_id,
+                    'recipient_id': email.recipient_id,
+                    'subject': email.subject,
+                    'security_level': email.security_level,
+                    'quantum_key_id': email.quantum_key_id,
+                    'encryption_algorithm': email.encryption_algorithm,
+                    'created_at': email.created_at,
+                    'read_at': email.read_at,
+                    'is_decrypted': email.is_decrypted,
+                    'status': email.status,
+                    'segment_id': segment.id,
+                    'block_offset': offset,
+                    'block_length': length,
+                    'block_item': item
+                } for email, (offset, length, item) in zip(emails, locations)])
+
+                email_ids = [email.id for email in emails]
+                for email in emails:
+                    db.session.expunge(email)
+                for start in range(0, len(email_ids), 500):
+                    chunk = email_ids[start:start + 500]
+                    self.search_service.remove_emails(chunk)
+                    db.session.execute(
+                        db.delete(Email).where(Email.id.in_(chunk))
+                        .execution_options(synchronize_session=False)
+                    )
+        except Exception:
+            if os.path.exists(path):
+                os.chmod(path, 0o644)
+                os.remove(path)
+            raise
+
+        print(f"Archived {len(emails)} emails from {period} into {filename}")
+        return len(emails)
+
+    def _write_segment(self, path: str, emails: List[Email]) -> Tuple[List[Tuple[int, int, int]], int, str]:
+        """
+        Write emails' payloads to a new read-only segment file.
+
+        Returns:
+            ((offset, length, item) per email, uncompressed bytes, SHA-256 hex)
+        """
+        locations = []
+        raw_bytes = 0
+        digest = hashlib.sha256()
+        temporary = f'{path}.tmp'
+
+        with open(temporary, 'wb') as segment_file:
+            segment_file.write(self.MAGIC)
+            digest.update(self.MAGIC)
+            for start in range(0, len(emails), self.block_emails):
+                block = emails[start:start + self.block_emails]
+                raw = json.dumps([
+                    [email.id, email.encrypted_body, email.encrypted_attachments] for email in block
+                ], separators=(',', ':')).encode('utf-8')
+                data = zlib.compress(raw, self.compression_level)
+
+                offset = segment_file.tell()
+                segment_file.write(data)
+                digest.update(data)
+                raw_bytes += len(raw)
+                locations.extend((offset, len(data), item) for item in range(len(block)))
+
+            segment_file.flush()
+            os.fsync(segment_file.fileno())
+
+        os.replace(temporary, path)
+        os.chmod(path, 0o444)
+        return locations, raw_bytes, digest.hexdigest()
+
+    @staticmethod
+    def _try_lock(lock_file) -> bool:
+        try:
+            import fcntl
+        except ImportError:
+            return True
+
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _ensure_archiver(self):
+        """Start the background archiver, once per process (threads do not survive fork)."""
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='qumail-archiver', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                with self._app.app_context():
+                    self.archive()
+            except Exception as e:
+                print(f"Error archiving emails: {str(e)}")
+            time.sleep(self.interval)
+
+
+archive = ArchiveService()
@@ -1,6 +1,7 @@
 from backend.models import db
 from backend.models.user import User
-from werkzeug.security import check_password_hash
+from backend.services.user_cache import user_cache
+from backend.services.password_service import password_hasher, PasswordHasherBusy
 
 
 class AuthService:
@@ -16,7 +17,7 @@ class AuthService:
             user.set_password(password)
 
             db.session.add(user)
-            db.session.commit()
+            db.session.flush()
 
             return user
         except Exception as e:
@@ -24,19 +25,35 @@ class AuthService:
             raise e
 
     def authenticate_user(self, email, password):
-        """Authenticate user with email and password."""
+        """
+        Authenticate user with email and password.
+
+        Hashes made with outdated parameters are upgraded on a successful login.
+        Raises PasswordHasherBusy when hashing capacity is exhausted.
+        """
         try:
             user = User.query.filter_by(email=email.lower().strip()).first()
 
-            if user and user.check_password(password) and user.is_active:
+            if user is None or not user.is_active:
+                # Same KDF work as a wrong password: timing must not reveal
+                # which accounts exist or are deactivated
+                password_hasher.verify_dummy(password)
+                return None
+
+            if user.check_password(password):
+                if user.needs_rehash():
+                    user.set_password(password)
+                    db.session.flush()
                 return user
             return None
+        except PasswordHasherBusy:
+            raise
         except Exception as e:
             return None
 
     def get_user_by_email(self, email):
         """Get user by email."""
-        return User.query.filter_by(email=email.lower().strip()).first()
+        return user_cache.get_by_email(email)
 
     def deactivate_user(self, user_id):
         """Deactivate user account."""
@@ -44,7 +61,8 @@ class AuthService:
             user = User.query.get(user_id)
             if user:
                 user.is_active = False
-                db.session.commit()
+                db.session.flush()
+                user_cache.invalidate(user)
                 return True
             return False
         except Exception as e:
@@ -0,0 +1,175 @@
+from typing import Dict, Optional, Tuple
+import ctypes
+import os
+import threading
+import time
+
+
+class ScratchBuffers:
+    """
+    Reusable per-thread output buffers for the crypto hot path.
+
+    Ciphers write straight into a slice of the calling thread's buffer
+    (encrypt_into/decrypt_into/update_into) instead of returning fresh
+    bytes, so a message is not copied again on its way to base64 or UTF-8
+    decoding. Buffers above max_retained bytes (CRYPTO_SCRATCH_MAX_BYTES)
+    are handed out once and not kept, bounding what each thread holds on to.
+    """
+
+    def __init__(self, max_retained: int = 4 * 1024 * 1024):
+        self.max_retained = max_retained
+        self._local = threading.local()
+
+    def view(self, size: int) -> memoryview:
+        """A writable view of size bytes, valid until this thread's next call."""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or len(buffer) < size:
+            buffer = bytearray(max(size, 4096))
+            if size <= self.max_retained:
+                self._local.buffer = buffer
+        return memoryview(buffer)[:size]
+
+
+def wipe(view: memoryview):
+    """Zero a writable buffer in place (plaintext must not linger in scratch space)."""
+    if len(view):
+        ctypes.memset((ctypes.c_char * len(view)).from_buffer(view), 0, len(view))
+
+
+scratch = ScratchBuffers()
+
+
+class CipherSuite:
+    """
+    A single-pass AEAD cipher: one call encrypts and authenticates.
+
+    Subclasses name a cryptography AEAD class, imported on first use; the
+    suite ID is stored in every envelope sealed with it, so it must never
+    change once used.
+    """
+
+    suite_id = ''
+    aead_name = ''
+    key_size = 32
+    nonce_size = 12
+    tag_size = 16
+
+    def seal(self, key: bytes, plaintext: bytes,
+             associated_data: Optional[bytes] = None) -> Tuple[bytes, memoryview]:
+        """
+        Encrypt and authenticate.
+
+        Returns:
+            (nonce, ciphertext with tag); the ciphertext is a view of this
+            thread's scratch buffer, valid until its next seal or open
+        """
+        nonce = os.urandom(self.nonce_size)
+        out = scratch.view(len(plaintext) + self.tag_size)
+        self._aead(key).encrypt_into(nonce, plaintext, associated_data, out)
+        return nonce, out
+
+    def open(self, key: bytes, nonce: bytes, ciphertext: bytes,
+             associated_data: Optional[bytes] = None) -> memoryview:
+        """
+        Verify and decrypt into this thread's scratch buffer. The caller
+        should wipe() the returned view once the plaintext has been used.
+
+        Raises:
+            cryptography.exceptions.InvalidTag: if the ciphertext, nonce or
+                associated data were altered, or the key is wrong
+        """
+        out = scratch.view(len(ciphertext) - self.tag_size)
+        self._aead(key).decrypt_into(nonce, ciphertext, associated_data, out)
+        return out
+
+    def _aead(self, key: bytes):
+        from cryptography.hazmat.primitives.ciphers import aead
+        return getattr(aead, self.aead_name)(key)
+
+
+class AESGCMSuite(CipherSuite):
+    """AES-256-GCM; fastest wherever the CPU has AES and carry-less multiply instructions."""
+    suite_id = 'aes-256-gcm'
+    aead_name = 'AESGCM'
+
+
+class ChaCha20Poly1305Suite(CipherSuite):
+    """ChaCha20-Poly1305; fast in software, for hosts without AES acceleration."""
+    suite_id = 'chacha20-poly1305'
+    aead_name = 'ChaCha20Poly1305'
+
+
+class CipherSuiteRegistry:
+    """
+    Known cipher suites and the one used for new envelopes.
+
+    CIPHER_SUITE names a suite, or 'auto' to time every registered suite on
+    a small buffer and pick the fastest on this host. The choice is made on
+    first use (a few milliseconds, once per process), which keeps the crypto
+    libraries out of app startup. Decryption always looks the suite up by
+    the ID in the envelope, so changing the choice never affects stored mail.
+    """
+
+    BENCHMARK_BYTES = 16 * 1024
+    BENCHMARK_ROUNDS = 32
+
+    def __init__(self):
+        self._suites: Dict[str, CipherSuite] = {}
+        self._default = None
+        self.choice = 'auto'
+        self._lock = threading.Lock()
+        self.timings: Dict[str, float] = {}
+
+    def register(self, suite: CipherSuite):
+        self._suites[suite.suite_id] = suite
+
+    def get(self, suite_id: str) -> CipherSuite:
+        suite = self._suites.get(suite_id)
+        if suite is None:
+            raise ValueError(f'Unknown cipher suite: {suite_id}')
+        return suite
+
+    def init_app(self, app):
+        self.choice = app.config['CIPHER_SUITE']
+        if self.choice != 'auto':
+            self.get(self.choice)
+        self._default = None
+        scratch.max_retained = app.config['CRYPTO_SCRATCH_MAX_BYTES']
+
+    @property
+    def default(self) -> CipherSuite:
+        """Suite for new envelopes."""
+        if self._default is None:
+            with self._lock:
+                if self._default is None:
+                    self._default = self.select_fastest() if self.choice == 'auto' else self.get(self.choice)
+        return self._default
+
+    @property
+    def selected_id(self) -> Optional[str]:
+        """ID of the suite for new envelopes, or None until it has been chosen."""
+        return self._default.suite_id if self._default is not None else None
+
+    def select_fastest(self) -> CipherSuite:
+        """
+        Time a seal of BENCHMARK_BYTES with every suite and return the fastest.
+
+        The timings are kept in self.timings and exported on /metrics.
+        """
+        key = os.urandom(32)
+        data = os.urandom(self.BENCHMARK_BYTES)
+        timings = {}
+        for suite_id, suite in self._suites.items():
+            suite.seal(key, data)
+            started = time.perf_counter()
+            for _ in range(self.BENCHMARK_ROUNDS):
+                suite.seal(key, data)
+            timings[suite_id] = (time.perf_counter() - started) / self.BENCHMARK_ROUNDS
+
+        self.timings = timings
+        return self._suites[min(timings, key=timings.get)]
+
+
+cipher_suites = CipherSuiteRegistry()
+cipher_suites.register(AESGCMSuite())
+cipher_suites.register(ChaCha20Poly1305Suite())
@@ -0,0 +1,122 @@
+from collections import Counter
+from typing import Optional, Tuple
+import math
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class DecompressionLimitExceeded(ValueError):
+    """Raised when a payload would expand beyond the configured maximum."""
+
+
+class Compressor:
+    """
+    Optional compression ahead of encryption.
+
+    Text, CSV and logs shrink severalfold, which saves storage and bandwidth
+    and, for OTP, quantum key material (one key byte per payload byte).
+    Compression is skipped for payloads below COMPRESSION_MIN_BYTES, for
+    payloads whose sampled byte entropy says they are already compressed
+    or random (above COMPRESSION_MAX_ENTROPY bits per byte), and whenever
+    the result saves less than COMPRESSION_MIN_SAVING. The codec used is
+    returned so the caller can record it in the envelope.
+
+    Compressed length depends on content, so it can reveal whether
+    attacker-supplied text matches secrets in the same message (as in
+    CRIME/BREACH); disable with COMPRESSION_ENABLED = False where that
+    matters.
+    """
+
+    SAMPLE_BYTES = 4096
+
+    def __init__(self):
+        self.enabled = False
+        self.codec = 'zlib'
+        self.level = 6
+        self.min_bytes = 256
+        self.max_entropy = 7.5
+        self.min_saving = 0.1
+        self.max_output = 64 * 1024 * 1024
+
+    def init_app(self, app):
+        self.enabled = app.config['COMPRESSION_ENABLED']
+        codec = app.config['COMPRESSION_CODEC']
+        if codec == 'auto':
+            codec = 'zstd' if zstandard is not None else 'zlib'
+        if codec not in ('zlib', 'zstd'):
+            raise ValueError(f'Unknown COMPRESSION_CODEC: {codec}')
+        if codec == 'zstd' and zstandard is None:
+            raise RuntimeError('COMPRESSION_CODEC is zstd but the zstandard package is not installed')
+
+        self.codec = codec
+        self.level = app.config['COMPRESSION_LEVEL']
+        self.min_bytes = app.config['COMPRESSION_MIN_BYTES']
+        self.max_entropy = app.config['COMPRESSION_MAX_ENTROPY']
+        self.min_saving = app.config['COMPRESSION_MIN_SAVING']
+        self.max_output = app.config['COMPRESSION_MAX_OUTPUT']
+
+    def compress(self, data: bytes) -> Tuple[bytes, Optional[str]]:
+        """
+        Compress data if it is worth it.
+
+        Returns:
+            (payload, codec), with codec None when data is returned unchanged
+        """
+        if not self.enabled or len(data) < self.min_bytes:
+            return data, None
+        if self.entropy(data) > self.max_entropy:
+            return data, None
+
+        if self.codec == 'zstd':
+            compressed = zstandard.ZstdCompressor(level=self.level).compress(data)
+        else:
+            compressed = zlib.compress(data, self.level)
+
+        if len(compressed) > len(data) * (1 - self.min_saving):
+            return data, None
+        return compressed, self.codec
+
+    def decompress(self, payload: bytes, codec: Optional[str]) -> bytes:
+        """Undo compress(); refuses output larger than COMPRESSION_MAX_OUTPUT."""
+        if codec is None:
+            return payload
+
+        if codec == 'zlib':
+            decompressor = zlib.decompressobj()
+            data = decompressor.decompress(payload, self.max_output)
+            if decompressor.unconsumed_tail:
+                raise DecompressionLimitExceeded('Decompressed payload exceeds the size limit')
+            return data
+
+        if codec == 'zstd':
+            if zstandard is None:
+                raise RuntimeError('zstd payload but the zstandard package is not installed')
+            reader = zstandard.ZstdDecompressor().stream_reader(payload)
+            chunks, size = [], 0
+            while True:
+                chunk = reader.read(1024 * 1024)
+                if not chunk:
+                    return b''.join(chunks)
+                size += len(chunk)
+                if size > self.max_output:
+                    raise DecompressionLimitExceeded('Decompressed payload exceeds the size limit')
+                chunks.append(chunk)
+
+        raise ValueError(f'Unknown compression codec: {codec}')
+
+    def entropy(self, data: bytes) -> float:
+        """Shannon entropy in bits per byte of a sample from the start and middle of data."""
+        if len(data) > self.SAMPLE_BYTES:
+            half = self.SAMPLE_BYTES // 2
+            middle = len(data) // 2
+            data = data[:half] + data[middle:middle + half]
+
+        total = len(data)
+        return -sum(count / total * math.log2(count / total) for count in Counter(data).values())
+
+
+compressor = Compressor()
@@ -0,0 +1,124 @@
+from backend.models import db
+from backend.models.email import Email
+from backend.models.archive import ArchivedEmail
+from backend.models.mailbox_counter import MailboxCounter
+from backend.models.user import User
+from sqlalchemy import select, func, case
+from typing import Dict, Any, List, Tuple
+
+
+class CounterService:
+    """Reads and repairs the materialized mailbox counters."""
+
+    FOLDERS = ('inbox', 'outbox')
+
+    def get_counts(self, user_id: int) -> Dict[str, Any]:
+        """Get total/unread counts per folder, with a per-security-level breakdown."""
+        counts = {
+            folder: {'total': 0, 'unread': 0, 'by_security_level': {}}
+            for folder in self.FOLDERS
+        }
+
+        for counter in MailboxCounter.query.filter_by(user_id=user_id).all():
+            folder = counts.setdefault(
+                counter.folder, {'total': 0, 'unread': 0, 'by_security_level': {}}
+            )
+            folder['total'] += counter.total
+            folder['unread'] += counter.unread
+            folder['by_security_level'][str(counter.security_level)] = counter.to_dict()
+
+        return counts
+
+    def reconcile(self, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Recompute counters from the hot and archived emails and repair any drift.
+
+        Users are processed in primary-key batches, one transaction per batch,
+        so the job can run against a live database without long locks.
+
+        Returns:
+            Dict with the number of users checked and counter rows repaired
+        """
+        stats = {'users_checked': 0, 'rows_repaired': 0}
+        last_id = 0
+
+        while True:
+            user_ids = db.session.execute(
+                select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+            ).scalars().all()
+            if not user_ids:
+                break
+
+            try:
+                stats['rows_repaired'] += self._reconcile_users(user_ids)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+            stats['users_checked'] += len(user_ids)
+            last_id = user_ids[-1]
+
+        return stats
+
+    def _reconcile_users(self, user_ids: List[int]) -> int:
+        """Repair counters for a batch of users. Returns the number of rows changed."""
+        # Lock existing counter rows first so concurrent sends wait for the repair
+        stored = {
+            (c.user_id, c.folder, c.security_level): c
+            for c in MailboxCounter.query.filter(MailboxCounter.user_id.in_(user_ids))
+            .with_for_update().all()
+        }
+        actual = self._actual_counts(user_ids)
+
+        repaired = 0
+        for key, (total, unread) in actual.items():
+            counter = stored.pop(key, None)
+            if counter is None:
+                user_id, folder, security_level = key
+                db.session.add(MailboxCounter(
+                    user_id=user_id, folder=folder, security_level=security_level,
+                    total=total, unread=unread
+                ))
+                repaired += 1
+            elif counter.total != total or counter.unread != unread:
+                counter.total = total
+                counter.unread = unread
+                repaired += 1
+
+        # Counters left over have no emails behind them
+        for counter in stored.values():
+            if counter.total or counter.unread:
+                counter.total = 0
+                counter.unread = 0
+                repaired += 1
+
+        return repaired
+
+    def _actual_counts(self, user_ids: List[int]) -> Dict[Tuple[int, str, int], Tuple[int, int]]:
+        """Aggregate true counts for a batch of users from the emails and archived_emails tables."""
+        actual = {}
+
+        for model in (Email, ArchivedEmail):
+            unread = func.sum(case((model.read_at.is_(None), 1), else_=0))
+
+            inbox = db.session.execute(
+                select(model.recipient_id, model.security_level, func.count(), unread)
+                .where(model.recipient_id.in_(user_ids))
+                .group_by(model.recipient_id, model.security_level)
+            )
+            for user_id, security_level, total, unread_count in inbox:
+                key = (user_id, 'inbox', security_level)
+                previous_total, previous_unread = actual.get(key, (0, 0))
+                actual[key] = (previous_total + total, previous_unread + (unread_count or 0))
+
+            outbox = db.session.execute(
+                select(model.sender_id, model.security_level, func.count())
+                .where(model.sender_id.in_(user_ids))
+                .group_by(model.sender_id, model.security_level)
+            )
+            for user_id, security_level, total in outbox:
+                key = (user_id, 'outbox', security_level)
+                actual[key] = (actual.get(key, (0, 0))[0] + total, 0)
+
+        return actual
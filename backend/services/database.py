@@ -0,0 +1,122 @@
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from functools import wraps
+from typing import Any, Dict
+
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads of replica-marked requests to the read replica.
+
+    Flushes and DML always go to the primary, so a read-only view that
+    happens to write still writes to the right place.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _replica_requested() \
+                and not getattr(clause, 'is_dml', False):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _replica_requested() -> bool:
+    return has_app_context() and g.get('db_replica', False)
+
+
+def use_replica(view):
+    """
+    Serve a read-only view from DATABASE_REPLICA_URL, when one is configured.
+
+    The flag lives on g, so it also covers responses streamed after the view
+    returns. Replicas lag the primary: use it only where a just-written
+    change need not show up immediately.
+    """
+    @wraps(view)
+    def decorated_view(*args, **kwargs):
+        g.db_replica = True
+        return view(*args, **kwargs)
+    return decorated_view
+
+
+class DatabaseTuning:
+    """
+    Engine settings for the primary database and the optional read replica.
+
+    Server databases get a sized connection pool with pre-ping and recycling
+    (DB_POOL_*). SQLite gets per-connection pragmas: WAL journaling, so
+    readers no longer block on a writer, synchronous=NORMAL (safe with WAL),
+    a memory-mapped read path and a busy timeout instead of immediate
+    "database is locked" errors (SQLITE_*).
+    """
+
+    def __init__(self):
+        self.pragmas: Dict[str, Any] = {}
+
+    def configure(self, app):
+        """Set engine options and the replica bind; call before db.init_app."""
+        config = app.config
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(
+            self.engine_options(config['SQLALCHEMY_DATABASE_URI'], config),
+            **config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        )
+
+        replica_url = config.get('DATABASE_REPLICA_URL')
+        if replica_url:
+            binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+            binds[REPLICA_BIND] = dict(self.engine_options(replica_url, config), url=replica_url)
+            config['SQLALCHEMY_BINDS'] = binds
+
+        synchronous = str(config['SQLITE_SYNCHRONOUS']).upper()
+        if synchronous not in ('OFF', 'NORMAL', 'FULL', 'EXTRA'):
+            raise ValueError(f'Unknown SQLITE_SYNCHRONOUS: {synchronous}')
+
+        self.pragmas = {'journal_mode': 'WAL' if config['SQLITE_WAL'] else 'DELETE'}
+        self.pragmas['synchronous'] = synchronous
+        self.pragmas['mmap_size'] = int(config['SQLITE_MMAP_SIZE'])
+        self.pragmas['busy_timeout'] = int(config['SQLITE_BUSY_TIMEOUT_MS'])
+
+    def init_app(self, app, db):
+        """Apply SQLite pragmas to every new connection; call after db.init_app."""
+        with app.app_context():
+            for engine in db.engines.values():
+                if engine.dialect.name == 'sqlite' and not event.contains(engine, 'connect', self._set_pragmas):
+                    event.listen(engine, 'connect', self._set_pragmas)
+
+    @staticmethod
+    def engine_options(url: str, config) -> Dict[str, Any]:
+        """Pool options that suit the database at url."""
+        url = make_url(url)
+        if url.get_backend_name() == 'sqlite':
+            if url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory':
+                # One shared in-memory connection; Flask-SQLAlchemy picks the pool
+                return {}
+            return {
+                'pool_size': config['DB_POOL_SIZE'],
+                'max_overflow': config['DB_MAX_OVERFLOW'],
+                'pool_timeout': config['DB_POOL_TIMEOUT'],
+            }
+
+        return {
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            'pool_recycle': config['DB_POOL_RECYCLE'],
+            'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        }
+
+    def _set_pragmas(self, dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+
+database = DatabaseTuning()
@@ -0,0 +1,235 @@
+from backend.models import db
+from backend.models.user import User
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List, Dict, Tuple
+import threading
+import time
+
+
+class PrefixIndex:
+    """Sorted array of (term, user_id) pairs searched with bisect."""
+
+    def __init__(self):
+        self.terms: List[str] = []
+        self.ids = array('q')
+
+    def build(self, pairs: List[Tuple[str, int]]):
+        pairs.sort()
+        self.terms = [term for term, _ in pairs]
+        self.ids = array('q', (user_id for _, user_id in pairs))
+
+    def add(self, term: str, user_id: int):
+        position = bisect_left(self.terms, term)
+        self.terms.insert(position, term)
+        self.ids.insert(position, user_id)
+
+    def remove(self, term: str, user_id: int):
+        position = bisect_left(self.terms, term)
+        while position < len(self.terms) and self.terms[position] == term:
+            if self.ids[position] == user_id:
+                del self.terms[position]
+                del self.ids[position]
+                return
+            position += 1
+
+    def scan(self, prefix: str):
+        """Yield user IDs whose term starts with prefix, in term order."""
+        position = bisect_left(self.terms, prefix)
+        while position < len(self.terms) and self.terms[position].startswith(prefix):
+            yield self.ids[position]
+            position += 1
+
+    def __len__(self):
+        return len(self.terms)
+
+
+class RecipientDirectory:
+    """
+    In-memory prefix index over active users for recipient autocomplete.
+
+    Two sorted arrays are kept: one of email addresses and one of name terms
+    (the full name plus each later word, so "ada lo" and "lovelace" both
+    match "Ada Lovelace"). A lookup is a bisect plus a scan of at most a few
+    entries, independent of the number of users.
+
+    The index is loaded once at startup and then maintained from ORM events:
+    inserts, name/email changes and deactivations are applied when their
+    transaction commits. Users created by other processes are picked up by an
+    incremental catch-up on primary key every DIRECTORY_REFRESH_INTERVAL
+    seconds; their renames and deactivations show up after the next load().
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._users: Dict[int, Tuple[str, str]] = {}
+        self._emails = PrefixIndex()
+        self._names = PrefixIndex()
+        self._max_id = 0
+        self._refreshed_at = 0.0
+        self.refresh_interval = 30.0
+        self.loaded = False
+
+    def init_app(self, app):
+        self.refresh_interval = app.config['DIRECTORY_REFRESH_INTERVAL']
+
+        if not event.contains(User, 'after_insert', _record_user_change):
+            event.listen(User, 'after_insert', _record_user_change)
+            event.listen(User, 'after_update', _record_user_change)
+            event.listen(User, 'after_delete', _record_user_delete)
+            event.listen(Session, 'after_commit', _apply_pending_changes)
+            event.listen(Session, 'after_rollback', _discard_pending_changes)
+
+    def load(self, batch_size: int = 10000):
+        """Build the index from all active users."""
+        self.build(db.session.execute(
+            select(User.id, User.email, User.full_name, User.is_active)
+            .execution_options(yield_per=batch_size)
+        ))
+
+    def build(self, rows: Iterable[Tuple[int, str, str, bool]]):
+        """Replace the index with (id, email, full_name, is_active) rows."""
+        users = {}
+        email_terms = []
+        name_terms = []
+        max_id = 0
+
+        for user_id, email, full_name, is_active in rows:
+            max_id = max(max_id, user_id)
+            if is_active is False:
+                continue
+            users[user_id] = (email, full_name)
+            email_terms.append((email.lower(), user_id))
+            name_terms.extend((term, user_id) for term in self._name_terms(full_name))
+
+        emails = PrefixIndex()
+        emails.build(email_terms)
+        names = PrefixIndex()
+        names.build(name_terms)
+
+        with self._lock:
+            self._users, self._emails, self._names = users, emails, names
+            self._max_id = max_id
+            self._refreshed_at = time.monotonic()
+            self.loaded = True
+
+    def add(self, user_id: int, email: str, full_name: str):
+        """Add a user, replacing any previous entry for the same ID."""
+        with self._lock:
+            self.remove(user_id)
+            self._users[user_id] = (email, full_name)
+            self._emails.add(email.lower(), user_id)
+            for term in self._name_terms(full_name):
+                self._names.add(term, user_id)
+            self._max_id = max(self._max_id, user_id)
+
+    def remove(self, user_id: int):
+        with self._lock:
+            entry = self._users.pop(user_id, None)
+            if entry is None:
+                return
+            email, full_name = entry
+            self._emails.remove(email.lower(), user_id)
+            for term in self._name_terms(full_name):
+                self._names.remove(term, user_id)
+
+    def search(self, prefix: str, limit: int = 10) -> List[Dict[str, str]]:
+        """
+        Get up to limit users whose email or name starts with prefix.
+
+        Email matches are ranked before name matches; ties are ordered
+        alphabetically.
+        """
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix or limit <= 0:
+            return []
+
+        self._refresh_if_stale()
+
+        results = []
+        seen = set()
+        with self._lock:
+            for index in (self._emails, self._names):
+                for user_id in index.scan(prefix):
+                    if user_id in seen:
+                        continue
+                    seen.add(user_id)
+                    email, full_name = self._users[user_id]
+                    results.append({'email': email, 'full_name': full_name})
+                    if len(results) >= limit:
+                        return results
+
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'users': len(self._users),
+                'email_terms': len(self._emails),
+                'name_terms': len(self._names)
+            }
+
+    def _refresh_if_stale(self):
+        """Pick up users registered through other processes since the last check."""
+        if not self.loaded:
+            self.load()
+            return
+        if time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+
+        with self._lock:
+            if time.monotonic() - self._refreshed_at < self.refresh_interval:
+                return
+            self._refreshed_at = time.monotonic()
+            last_id = self._max_id
+
+        rows = db.session.execute(
+            select(User.id, User.email, User.full_name)
+            .where(User.id > last_id, User.is_active.isnot(False))
+            .order_by(User.id)
+        ).all()
+        for user_id, email, full_name in rows:
+            self.add(user_id, email, full_name)
+
+    @staticmethod
+    def _name_terms(full_name: str) -> List[str]:
+        words = full_name.lower().split()
+        if not words:
+            return []
+        return [' '.join(words)] + words[1:]
+
+
+def _record_user_change(mapper, connection, target):
+    session = Session.object_session(target)
+    state = inspect(target)
+    if session is not None and any(
+        state.attrs[key].history.has_changes() for key in ('email', 'full_name', 'is_active')
+    ):
+        session.info.setdefault('directory_changes', []).append(
+            (target.id, target.email, target.full_name, target.is_active is not False)
+        )
+
+
+def _record_user_delete(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault('directory_changes', []).append(
+            (target.id, None, None, False)
+        )
+
+
+def _apply_pending_changes(session):
+    for user_id, email, full_name, active in session.info.pop('directory_changes', []):
+        if active:
+            directory.add(user_id, email, full_name)
+        else:
+            directory.remove(user_id)
+
+
+def _discard_pending_changes(session):
+    session.info.pop('directory_changes', None)
+
+
+directory = RecipientDirectory()
@@ -1,20 +1,46 @@
 from backend.models import db
 from backend.models.email import Email
+from backend.models.archive import ArchiveSegment, ArchivedEmail
+from backend.models.mailbox_counter import MailboxCounter
+from backend.models.quantum_key import QuantumKey
 from backend.models.user import User
-from backend.services.encryption_service import EncryptionService
 from backend.services.quantum_service import QuantumService
+from backend.services.search_service import SearchService
+from backend.services.unit_of_work import unit_of_work
+from backend.services.write_behind import write_behind
+from backend.services.user_cache import user_cache
+from backend.services.key_cache import key_cache
+from backend.services.archive_service import archive
 from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, aliased
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from itertools import islice
+import base64
+import heapq
 import json
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
 
 
 class EmailService:
     """Email processing service with quantum encryption."""
 
     def __init__(self):
-        self.encryption_service = EncryptionService()
+        self._encryption_service = None
+        self.search_service = SearchService()
         self.quantum_service = None
+        self.decrypt_executor = None
+        self.export_executor = None
+
+    @property
+    def encryption_service(self):
+        """Lazy initialization of the encryption service (imports the crypto libraries)."""
+        if not self._encryption_service:
+            from backend.services.encryption_service import EncryptionService
+            self._encryption_service = EncryptionService()
+        return self._encryption_service
 
     def _get_quantum_service(self):
         """Lazy initialization of quantum service."""
@@ -25,6 +51,27 @@ class EmailService:
             )
         return self.quantum_service
 
+    def _get_decrypt_executor(self):
+        """Lazy initialization of the shared decryption worker pool."""
+        if not self.decrypt_executor:
+            self.decrypt_executor = ThreadPoolExecutor(
+                max_workers=current_app.config['DECRYPT_WORKERS'],
+                thread_name_prefix='qumail-decrypt'
+            )
+        return self.decrypt_executor
+
+    def _get_export_executor(self):
+        """
+        Lazy initialization of the export worker pool, kept apart from the
+        decryption pool so long exports cannot starve interactive decrypts.
+        """
+        if not self.export_executor:
+            self.export_executor = ThreadPoolExecutor(
+                max_workers=current_app.config['EXPORT_WORKERS'],
+                thread_name_prefix='qumail-export'
+            )
+        return self.export_executor
+
     def send_email(self, sender_id: int, recipient_email: str, subject: str,
                    body: str, security_level: int, attachments: List[Dict] = None) -> Dict[str, Any]:
         """
@@ -36,21 +83,24 @@ class EmailService:
             subject: Email subject
             body: Email body
             security_level: 1-4 security level
-            attachments: List of attachment data
+            attachments: List of attachment data (base64 'data', or an open 'file')
 
         Returns:
             Dict with email info or error
         """
         try:
             # Validate recipient
-            recipient = User.query.filter_by(email=recipient_email.lower()).first()
+            recipient = user_cache.get_by_email(recipient_email)
             if not recipient:
                 return {'error': 'Recipient not found', 'status': 'failed'}
 
+            # Compress first, so an OTP key only has to cover the compressed body
+            compressed_body = self.encryption_service.compress(body)
+
             # Get quantum key if needed (levels 1 & 2)
             quantum_key = None
             if security_level in [1, 2]:
-                key_length = len(body.encode('utf-8')) if security_level == 1 else 256
+                key_length = len(compressed_body[0]) if security_level == 1 else 256
                 quantum_key_obj = self._get_quantum_service().get_quantum_key(
                     sender_id, recipient_email, key_length
                 )
@@ -63,33 +113,31 @@ class EmailService:
             else:
                 quantum_key_id = None
 
-            # Encrypt email body
-            encrypted_body_data = self.encryption_service.encrypt_data(
-                body, security_level, quantum_key
+            # Encrypt email body and attachments
+            encrypted = self.encrypt_message(
+                body, security_level, attachments, quantum_key, compressed_body
             )
 
-            # Encrypt attachments if present
-            encrypted_attachments = None
-            if attachments:
-                encrypted_attachments = self._encrypt_attachments(
-                    attachments, security_level, quantum_key
-                )
-
             # Create email record
             email = Email(
                 sender_id=sender_id,
                 recipient_id=recipient.id,
                 subject=subject,
-                encrypted_body=json.dumps(encrypted_body_data),
-                encrypted_attachments=json.dumps(encrypted_attachments) if encrypted_attachments else None,
                 security_level=security_level,
                 quantum_key_id=quantum_key_id,
-                encryption_algorithm=encrypted_body_data.get('algorithm', 'UNKNOWN'),
-                status='sent'
+                status='sent',
+                **encrypted
             )
 
             db.session.add(email)
-            db.session.commit()
+            db.session.flush()
+
+            # Keep the search index in sync within the same transaction
+            sender = db.session.get(User, sender_id)
+            self.search_service.index_email(email, sender.email, recipient.email)
+
+            MailboxCounter.apply(recipient.id, 'inbox', security_level, total=1, unread=1)
+            MailboxCounter.apply(sender_id, 'outbox', security_level, total=1)
 
             return {
                 'success': True,
@@ -104,6 +152,39 @@ class EmailService:
             db.session.rollback()
             return {'error': f'Failed to send email: {str(e)}', 'status': 'failed'}
 
+    def encrypt_message(self, body: str, security_level: int, attachments: List[Dict] = None,
+                        quantum_key: Optional[bytes] = None,
+                        compressed_body: Optional[Tuple[bytes, Optional[str]]] = None) -> Dict[str, Any]:
+        """
+        Encrypt an email body and its attachments. Safe to run off the request thread.
+
+        Args:
+            body: Email body
+            security_level: 1-4 security level
+            attachments: List of attachment data (base64 'data', or an open 'file')
+            quantum_key: Quantum key for levels 1 and 2
+            compressed_body: Result of compress(body), if the caller already has it
+
+        Returns:
+            Dict with the encrypted_body, encrypted_attachments and
+            encryption_algorithm columns of an Email
+        """
+        encrypted_body_data = self.encryption_service.encrypt_data(
+            body, security_level, quantum_key, compressed_body
+        )
+
+        encrypted_attachments = None
+        if attachments:
+            encrypted_attachments = self._encrypt_attachments(
+                attachments, security_level, quantum_key
+            )
+
+        return {
+            'encrypted_body': json.dumps(encrypted_body_data),
+            'encrypted_attachments': json.dumps(encrypted_attachments) if encrypted_attachments else None,
+            'encryption_algorithm': encrypted_body_data.get('algorithm', 'UNKNOWN')
+        }
+
     def get_user_emails(self, user_id: int, folder: str = 'inbox') -> List[Dict[str, Any]]:
         """Get user's emails from specified folder."""
         try:
@@ -122,6 +203,98 @@ class EmailService:
             print(f"Error getting emails: {str(e)}")
             return []
 
+    def iter_user_emails(self, user_id: int, folder: str = 'inbox',
+                         batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a folder as email dicts, newest first.
+
+        Same fields as Email.to_dict, but read as plain rows in batches of
+        batch_size (sender and recipient addresses joined in), so memory
+        stays flat however large the folder is. Hot and archived emails are
+        merged by date. Dates are left as datetime objects for the JSON
+        encoder.
+        """
+        if folder not in ('inbox', 'outbox'):
+            raise ValueError(f'Unknown folder: {folder}')
+
+        return heapq.merge(
+            self._iter_hot_emails(user_id, folder, batch_size),
+            self._iter_archived_emails(user_id, folder, batch_size),
+            key=lambda email: email['created_at'],
+            reverse=True
+        )
+
+    def _iter_hot_emails(self, user_id: int, folder: str, batch_size: int) -> Iterator[Dict[str, Any]]:
+        sender_user = aliased(User)
+        recipient_user = aliased(User)
+        owner = Email.recipient_id if folder == 'inbox' else Email.sender_id
+        rows = db.session.execute(
+            select(Email.id, Email.uuid, sender_user.email, recipient_user.email, Email.subject,
+                   Email.encrypted_body, Email.security_level, Email.encryption_algorithm,
+                   Email.created_at, Email.read_at, Email.status, Email.is_decrypted)
+            .join(sender_user, sender_user.id == Email.sender_id)
+            .join(recipient_user, recipient_user.id == Email.recipient_id)
+            .where(owner == user_id)
+            .order_by(Email.created_at.desc())
+            .execution_options(yield_per=batch_size)
+        )
+
+        for (email_id, uuid, sender_email, recipient_email, subject, encrypted_body, security_level,
+             encryption_algorithm, created_at, read_at, status, is_decrypted) in rows:
+            yield {
+                'id': email_id,
+                'uuid': uuid,
+                'sender_email': sender_email,
+                'recipient_email': recipient_email,
+                'subject': subject,
+                'encrypted_body': encrypted_body,
+                'security_level': security_level,
+                'encryption_algorithm': encryption_algorithm,
+                'created_at': created_at,
+                'read_at': read_at,
+                'status': status,
+                'is_decrypted': is_decrypted
+            }
+
+    def _iter_archived_emails(self, user_id: int, folder: str, batch_size: int) -> Iterator[Dict[str, Any]]:
+        sender_user = aliased(User)
+        recipient_user = aliased(User)
+        owner = ArchivedEmail.recipient_id if folder == 'inbox' else ArchivedEmail.sender_id
+        rows = db.session.execute(
+            select(ArchivedEmail.id, ArchivedEmail.uuid, sender_user.email, recipient_user.email,
+                   ArchivedEmail.subject, ArchivedEmail.security_level, ArchivedEmail.encryption_algorithm,
+                   ArchivedEmail.created_at, ArchivedEmail.read_at, ArchivedEmail.status,
+                   ArchivedEmail.is_decrypted, ArchiveSegment.filename, ArchivedEmail.block_offset,
+                   ArchivedEmail.block_length, ArchivedEmail.block_item)
+            .join(sender_user, sender_user.id == ArchivedEmail.sender_id)
+            .join(recipient_user, recipient_user.id == ArchivedEmail.recipient_id)
+            .join(ArchiveSegment, ArchiveSegment.id == ArchivedEmail.segment_id)
+            .where(owner == user_id)
+            .order_by(ArchivedEmail.created_at.desc())
+            .execution_options(yield_per=batch_size)
+        )
+
+        for (email_id, uuid, sender_email, recipient_email, subject, security_level, encryption_algorithm,
+             created_at, read_at, status, is_decrypted, filename, offset, length, item) in rows:
+            yield {
+                'id': email_id,
+                'uuid': uuid,
+                'sender_email': sender_email,
+                'recipient_email': recipient_email,
+                'subject': subject,
+                'encrypted_body': archive.read_payload(filename, offset, length, item, email_id)[0],
+                'security_level': security_level,
+                'encryption_algorithm': encryption_algorithm,
+                'created_at': created_at,
+                'read_at': read_at,
+                'status': status,
+                'is_decrypted': is_decrypted
+            }
+
+    def get_email(self, email_id: int):
+        """Get an email by id, from the hot table or the archive."""
+        return db.session.get(Email, email_id) or archive.get_email(email_id)
+
     def decrypt_email(self, email_id: int, user_id: int) -> Dict[str, Any]:
         """
         Decrypt email for authorized user.
@@ -135,27 +308,29 @@ class EmailService:
         """
         try:
             # Get email and verify access
-            email = Email.query.get(email_id)
+            email = self.get_email(email_id)
             if not email:
                 return {'error': 'Email not found'}
 
             if email.recipient_id != user_id and email.sender_id != user_id:
                 return {'error': 'Access denied'}
 
-            # Get quantum key if needed
+            # Get quantum key if needed (recently opened keys come from the cache)
             quantum_key = None
             if email.security_level in [1, 2] and email.quantum_key_id:
-                quantum_key_obj = QuantumKey.query.filter_by(
-                    key_id=email.quantum_key_id
-                ).first()
+                quantum_key = key_cache.get(email.quantum_key_id)
 
-                if not quantum_key_obj:
-                    return {'error': 'Quantum key not found'}
+                if quantum_key is None:
+                    quantum_key_obj = QuantumKey.query.filter_by(
+                        key_id=email.quantum_key_id
+                    ).first()
 
-                if not quantum_key_obj.is_valid():
-                    return {'error': 'Quantum key expired or invalid'}
+                    if not quantum_key_obj:
+                        return {'error': 'Quantum key not found'}
 
-                quantum_key = self._get_quantum_service().retrieve_key_data(quantum_key_obj)
+                    quantum_key = self._get_quantum_service().decryption_key_data(quantum_key_obj)
+                    if quantum_key is None:
+                        return {'error': 'Quantum key expired or invalid'}
 
             # Decrypt email body
             encrypted_body_data = json.loads(email.encrypted_body)
@@ -173,9 +348,7 @@ class EmailService:
 
             # Mark as read if recipient is decrypting
             if email.recipient_id == user_id:
-                email.mark_as_read()
-                email.is_decrypted = True
-                db.session.commit()
+                write_behind.record_read(email)
 
             return {
                 'success': True,
@@ -188,6 +361,239 @@ class EmailService:
         except Exception as e:
             return {'error': f'Decryption failed: {str(e)}'}
 
+    def decrypt_emails(self, email_ids: List[int], user_id: int) -> Iterator[Dict[str, Any]]:
+        """
+        Decrypt several emails for an authorized user.
+
+        Emails are loaded in one query (plus one for archived ones) and
+        their quantum keys resolved from the key material cache or one IN
+        query. Decryption runs in the worker pool, and emails the user
+        received are marked as read through the write-behind buffer.
+
+        Args:
+            email_ids: Email IDs to decrypt
+            user_id: ID of requesting user
+
+        Yields:
+            One result dict per requested ID, in request order
+        """
+        # Results are streamed after the request's own commit, so writes made
+        # while decrypting (read flags, when not buffered) are committed here.
+        try:
+            with unit_of_work():
+                yield from self._decrypt_results(list(dict.fromkeys(email_ids)), user_id)
+        except Exception as e:
+            yield {'success': False, 'error': f'Bulk decryption failed: {str(e)}'}
+
+    def _decrypt_results(self, email_ids: List[int], user_id: int) -> Iterator[Dict[str, Any]]:
+        """Produce bulk decryption results; see decrypt_emails."""
+
+        emails = {
+            email.id: email for email in Email.query
+            .options(joinedload(Email.sender), joinedload(Email.recipient))
+            .filter(Email.id.in_(email_ids)).all()
+        }
+        missing_ids = [email_id for email_id in email_ids if email_id not in emails]
+        emails.update((email.id, email) for email in archive.get_emails(missing_ids))
+
+        quantum_keys, key_material = self._resolve_key_material(emails.values(), user_id)
+
+        results = []
+        jobs = []
+        for email_id in email_ids:
+            email = emails.get(email_id)
+            error = self._check_decrypt_access(email, user_id, quantum_keys, key_material)
+            if error:
+                results.append({'email_id': email_id, 'success': False, 'error': error})
+                continue
+
+            results.append(email)
+            jobs.append((
+                email.encrypted_body,
+                email.encrypted_attachments,
+                email.security_level,
+                key_material.get(email.quantum_key_id)
+            ))
+
+        executor = self._get_decrypt_executor()
+        futures = iter([executor.submit(self._decrypt_payload, job) for job in jobs])
+
+        for result in results:
+            if isinstance(result, dict):
+                yield result
+                continue
+
+            email = result
+            try:
+                decrypted_body, decrypted_attachments = next(futures).result()
+            except Exception as e:
+                yield {'email_id': email.id, 'success': False, 'error': f'Decryption failed: {str(e)}'}
+                continue
+
+            if email.recipient_id == user_id:
+                write_behind.record_read(email)
+
+            yield {
+                'email_id': email.id,
+                'success': True,
+                'email': email.to_dict(),
+                'decrypted_body': decrypted_body,
+                'decrypted_attachments': decrypted_attachments,
+                'security_level': email.security_level
+            }
+
+
+    def _resolve_key_material(self, emails: Iterable[Email],
+                              user_id: int) -> Tuple[Dict[str, QuantumKey], Dict[str, bytes]]:
+        """
+        Key material for the quantum keys of the emails the user may open.
+
+        Keys come from the key material cache where possible, the rest from
+        one IN query. Returns (quantum keys loaded, key material by key id);
+        keys missing from the material map are unknown or expired.
+        """
+        key_ids = {
+            email.quantum_key_id for email in emails
+            if email.security_level in [1, 2] and email.quantum_key_id
+            and user_id in (email.recipient_id, email.sender_id)
+        }
+
+        # Resolve key material once per key, from the cache where possible
+        key_material = {}
+        for key_id in key_ids:
+            key_data = key_cache.get(key_id)
+            if key_data is not None:
+                key_material[key_id] = key_data
+
+        missing = key_ids - key_material.keys()
+        quantum_keys = {
+            key.key_id: key for key in
+            QuantumKey.query.filter(QuantumKey.key_id.in_(missing)).all()
+        } if missing else {}
+
+        for key_id, quantum_key_obj in quantum_keys.items():
+            key_data = self._get_quantum_service().decryption_key_data(quantum_key_obj)
+            if key_data is not None:
+                key_material[key_id] = key_data
+
+        return quantum_keys, key_material
+
+    def iter_decrypted_emails(self, user_id: int, folder: str = 'inbox',
+                              batch_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a whole folder decrypted, oldest first (for exports).
+
+        Hot and archived rows are read through streaming cursors and taken
+        in batches of batch_size: each batch has its keys resolved at once
+        and is decrypted on the export worker pool while the previous batch
+        is being consumed, so at most two batches are held in memory.
+        Unlike decrypt_emails nothing is marked as read.
+
+        Yields:
+            One result per email, shaped like decrypt_emails results; failed
+            ones carry the error and still include the email's metadata
+        """
+        if folder not in ('inbox', 'outbox'):
+            raise ValueError(f'Unknown folder: {folder}')
+
+        emails = heapq.merge(
+            self._iter_folder(Email, user_id, folder, batch_size),
+            self._iter_folder(ArchivedEmail, user_id, folder, batch_size),
+            key=lambda email: (email.created_at, email.id)
+        )
+
+        pending = deque()
+        for batch in iter(lambda: list(islice(emails, batch_size)), []):
+            pending.append(self._submit_decrypt_batch(batch, user_id))
+            if len(pending) > 1:
+                yield from self._collect_decrypt_batch(pending.popleft())
+        while pending:
+            yield from self._collect_decrypt_batch(pending.popleft())
+
+    def _iter_folder(self, model, user_id: int, folder: str, batch_size: int) -> Iterator[Email]:
+        """Emails (or archived emails) of a folder, oldest first, fetched batch_size rows at a time."""
+        owner = model.recipient_id if folder == 'inbox' else model.sender_id
+        options = [joinedload(model.sender), joinedload(model.recipient)]
+        if model is ArchivedEmail:
+            options.append(joinedload(ArchivedEmail.segment))
+
+        return db.session.execute(
+            select(model).options(*options)
+            .where(owner == user_id)
+            .order_by(model.created_at, model.id)
+            .execution_options(yield_per=batch_size)
+        ).scalars()
+
+    def _submit_decrypt_batch(self, batch: List[Email], user_id: int) -> List[Tuple[Dict, Any]]:
+        """Start decrypting a batch on the export pool; returns (result, future or None) pairs."""
+        quantum_keys, key_material = self._resolve_key_material(batch, user_id)
+        executor = self._get_export_executor()
+
+        work = []
+        for email in batch:
+            email_dict = email.to_dict()
+            email_dict.pop('encrypted_body')
+            result = {'email_id': email.id, 'email': email_dict, 'security_level': email.security_level}
+
+            error = self._check_decrypt_access(email, user_id, quantum_keys, key_material)
+            if error:
+                result.update(success=False, error=error)
+                work.append((result, None))
+                continue
+
+            work.append((result, executor.submit(self._decrypt_payload, (
+                email.encrypted_body,
+                email.encrypted_attachments,
+                email.security_level,
+                key_material.get(email.quantum_key_id)
+            ))))
+        return work
+
+    def _collect_decrypt_batch(self, work: List[Tuple[Dict, Any]]) -> Iterator[Dict[str, Any]]:
+        for result, future in work:
+            if future is not None:
+                try:
+                    decrypted_body, decrypted_attachments = future.result()
+                    result.update(success=True, decrypted_body=decrypted_body,
+                                  decrypted_attachments=decrypted_attachments)
+                except Exception as e:
+                    result.update(success=False, error=f'Decryption failed: {str(e)}')
+            yield result
+
+    def _check_decrypt_access(self, email: Optional[Email], user_id: int,
+                              quantum_keys: Dict[str, QuantumKey],
+                              key_material: Dict[str, Optional[bytes]]) -> Optional[str]:
+        """Return an error message if the user cannot decrypt this email."""
+        if not email:
+            return 'Email not found'
+
+        if email.recipient_id != user_id and email.sender_id != user_id:
+            return 'Access denied'
+
+        if email.security_level in [1, 2] and email.quantum_key_id \
+                and email.quantum_key_id not in key_material:
+            if email.quantum_key_id not in quantum_keys:
+                return 'Quantum key not found'
+            return 'Quantum key expired or invalid'
+
+        return None
+
+    def _decrypt_payload(self, job: Tuple[str, Optional[str], int, Optional[bytes]]) -> Tuple[str, Optional[List[Dict]]]:
+        """Decrypt one email body and its attachments. Safe to run off the request thread."""
+        encrypted_body, encrypted_attachments, security_level, quantum_key = job
+
+        decrypted_body = self.encryption_service.decrypt_data(
+            json.loads(encrypted_body), quantum_key
+        )
+
+        decrypted_attachments = None
+        if encrypted_attachments:
+            decrypted_attachments = self._decrypt_attachments(
+                json.loads(encrypted_attachments), security_level, quantum_key
+            )
+
+        return decrypted_body, decrypted_attachments
+
     def _encrypt_attachments(self, attachments: List[Dict], security_level: int,
                              quantum_key: Optional[bytes]) -> List[Dict]:
         """Encrypt email attachments."""
@@ -197,7 +603,12 @@ class EmailService:
             try:
                 # Convert file data to string if needed
                 file_data = attachment.get('data', '')
-                if isinstance(file_data, bytes):
+                if attachment.get('file') is not None:
+                    # Spooled upload: read only now, and stored base64 like JSON
+                    # uploads (kept as bytes, encrypt_data takes them as is)
+                    attachment['file'].seek(0)
+                    file_data = base64.b64encode(attachment['file'].read())
+                elif isinstance(file_data, bytes):
                     file_data = file_data.decode('latin-1')  # Preserve binary data
 
                 encrypted_data = self.encryption_service.encrypt_data(
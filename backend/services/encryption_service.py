@@ -1,11 +1,12 @@
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from backend.services.cipher_suites import cipher_suites, scratch, wipe
+from backend.services.compression import compressor
+from backend.services.metrics import crypto_seconds, crypto_bytes_total
 import os
 import base64
+import binascii
 import json
-from typing import Tuple, Optional
+import time
+from typing import Tuple, Optional, Union
 
 
 class EncryptionService:
@@ -14,29 +15,37 @@ class EncryptionService:
     def __init__(self):
         self.fernet = None
 
-    def encrypt_data(self, data: str, security_level: int, quantum_key: Optional[bytes] = None) -> dict:
+    def encrypt_data(self, data: Union[str, bytes], security_level: int, quantum_key: Optional[bytes] = None,
+                     compressed: Optional[Tuple[bytes, Optional[str]]] = None) -> dict:
         """
         Encrypt data based on security level.
 
         Args:
-            data: The data to encrypt
+            data: The data to encrypt (str, or UTF-8 encoded bytes)
             security_level: 1-4 (OTP, QKD-AES, PQC, Standard)
             quantum_key: Quantum key for levels 1 and 2
+            compressed: Result of compress(data), if the caller already has it
 
         Returns:
             dict: Encrypted data with metadata
         """
         try:
-            data_bytes = data.encode('utf-8')
+            started = time.perf_counter()
+            payload, compression = compressed if compressed is not None else self.compress(data)
 
             if security_level == 1:  # Quantum Secure - One Time Pad
-                return self._encrypt_otp(data_bytes, quantum_key)
+                result = self._encrypt_otp(payload, quantum_key)
             elif security_level == 2:  # Quantum-aided AES
-                return self._encrypt_qkd_aes(data_bytes, quantum_key)
+                result = self._encrypt_qkd_aes(payload, quantum_key, compression)
             elif security_level == 3:  # Post-Quantum Crypto (placeholder)
-                return self._encrypt_pqc(data_bytes)
+                result = self._encrypt_pqc(payload, compression)
             else:  # Level 4 - Standard encryption
-                return self._encrypt_standard(data_bytes)
+                result = self._encrypt_standard(payload, compression)
+
+            if compression:
+                result['compression'] = compression
+            self._record('encrypt', security_level, len(payload), started)
+            return result
 
         except Exception as e:
             raise Exception(f"Encryption failed: {str(e)}")
@@ -53,158 +62,186 @@ class EncryptionService:
             str: Decrypted data
         """
         try:
+            started = time.perf_counter()
             security_level = encrypted_data.get('security_level')
 
             if security_level == 1:
-                return self._decrypt_otp(encrypted_data, quantum_key)
+                payload = self._decrypt_otp(encrypted_data, quantum_key)
             elif security_level == 2:
-                return self._decrypt_qkd_aes(encrypted_data, quantum_key)
+                payload = self._decrypt_qkd_aes(encrypted_data, quantum_key)
             elif security_level == 3:
-                return self._decrypt_pqc(encrypted_data)
+                payload = self._decrypt_pqc(encrypted_data)
             else:
-                return self._decrypt_standard(encrypted_data)
+                payload = self._decrypt_standard(encrypted_data)
+
+            try:
+                result = str(compressor.decompress(payload, encrypted_data.get('compression')), 'utf-8')
+            finally:
+                # AEAD and CBC plaintext sits in the thread's scratch buffer
+                if isinstance(payload, memoryview):
+                    wipe(payload)
+            self._record('decrypt', security_level, len(payload), started)
+            return result
 
         except Exception as e:
             raise Exception(f"Decryption failed: {str(e)}")
 
+    @staticmethod
+    def compress(data: Union[str, bytes]) -> Tuple[bytes, Optional[str]]:
+        """
+        The payload that will be encrypted for data: compressed when that
+        pays off (see Compressor). Callers sizing an OTP key use its length.
+        Bytes are taken as already UTF-8 encoded text.
+        """
+        return compressor.compress(data.encode('utf-8') if isinstance(data, str) else data)
+
+    @staticmethod
+    def _record(operation: str, security_level: int, size: int, started: float):
+        """Record crypto time and the size in bytes of the payload through the cipher."""
+        crypto_seconds.labels(operation, security_level).observe(time.perf_counter() - started)
+        crypto_bytes_total.labels(operation, security_level).inc(size)
+
     def _encrypt_otp(self, data: bytes, quantum_key: bytes) -> dict:
         """One-Time Pad encryption using quantum key."""
         if not quantum_key or len(quantum_key) < len(data):
             raise ValueError("Quantum key must be at least as long as the data")
 
-        # XOR data with quantum key
-        encrypted_bytes = bytes(a ^ b for a, b in zip(data, quantum_key[:len(data)]))
-
         return {
-            'encrypted_data': base64.b64encode(encrypted_bytes).decode('utf-8'),
+            'encrypted_data': self._b64encode(self._xor(data, quantum_key)),
             'security_level': 1,
             'algorithm': 'OTP',
             'key_length_used': len(data)
         }
 
-    def _decrypt_otp(self, encrypted_data: dict, quantum_key: bytes) -> str:
+    def _decrypt_otp(self, encrypted_data: dict, quantum_key: bytes) -> bytes:
         """One-Time Pad decryption using quantum key."""
         if not quantum_key:
             raise ValueError("Quantum key required for OTP decryption")
 
-        encrypted_bytes = base64.b64decode(encrypted_data['encrypted_data'])
+        encrypted_bytes = binascii.a2b_base64(encrypted_data['encrypted_data'])
         key_length_used = encrypted_data.get('key_length_used', len(encrypted_bytes))
 
-        # XOR encrypted data with quantum key
-        decrypted_bytes = bytes(a ^ b for a, b in zip(encrypted_bytes, quantum_key[:key_length_used]))
-
-        return decrypted_bytes.decode('utf-8')
-
-    def _encrypt_qkd_aes(self, data: bytes, quantum_key: bytes) -> dict:
-        """AES encryption using quantum key as seed."""
+        return self._xor(encrypted_bytes[:key_length_used], quantum_key)
+
+    @staticmethod
+    def _xor(data: bytes, key: bytes) -> bytes:
+        """XOR data with the start of key, as big integers (one pass in C, not per byte in Python)."""
+        length = len(data)
+        if length > len(key):
+            # Key shorter than a legacy envelope claims: XOR only the covered prefix, as zip() did
+            length = len(key)
+            data = memoryview(data)[:length]
+        mixed = int.from_bytes(data, 'little') ^ int.from_bytes(memoryview(key)[:length], 'little')
+        return mixed.to_bytes(length, 'little')
+
+    def _encrypt_qkd_aes(self, data: bytes, quantum_key: bytes, compression: Optional[str] = None) -> dict:
+        """AEAD encryption keyed with the quantum key."""
         if not quantum_key or len(quantum_key) < 32:
             raise ValueError("Quantum key must be at least 32 bytes for AES")
 
-        # Use quantum key as AES key (first 32 bytes)
-        aes_key = quantum_key[:32]
+        # Use quantum key as the cipher key (first 32 bytes)
+        return self._seal(data, quantum_key[:32], 2, 'AES-QKD', compression)
 
-        # Generate random IV
-        iv = os.urandom(16)
-
-        # Encrypt using AES-256-CBC
-        cipher = Cipher(algorithms.AES(aes_key), modes.CBC(iv))
-        encryptor = cipher.encryptor()
-
-        # Pad data to block size
-        padded_data = self._pad_data(data)
-        encrypted_bytes = encryptor.update(padded_data) + encryptor.finalize()
-
-        return {
-            'encrypted_data': base64.b64encode(encrypted_bytes).decode('utf-8'),
-            'iv': base64.b64encode(iv).decode('utf-8'),
-            'security_level': 2,
-            'algorithm': 'AES-QKD'
-        }
-
-    def _decrypt_qkd_aes(self, encrypted_data: dict, quantum_key: bytes) -> str:
-        """AES decryption using quantum key as seed."""
+    def _decrypt_qkd_aes(self, encrypted_data: dict, quantum_key: bytes) -> bytes:
+        """Decryption keyed with the quantum key (AEAD, or legacy AES-CBC)."""
         if not quantum_key or len(quantum_key) < 32:
             raise ValueError("Quantum key required for AES-QKD decryption")
 
-        aes_key = quantum_key[:32]
-        iv = base64.b64decode(encrypted_data['iv'])
-        encrypted_bytes = base64.b64decode(encrypted_data['encrypted_data'])
-
-        # Decrypt using AES-256-CBC
-        cipher = Cipher(algorithms.AES(aes_key), modes.CBC(iv))
-        decryptor = cipher.decryptor()
-        decrypted_bytes = decryptor.update(encrypted_bytes) + decryptor.finalize()
-
-        # Remove padding
-        unpadded_data = self._unpad_data(decrypted_bytes)
+        if 'suite' in encrypted_data:
+            return self._open(encrypted_data, quantum_key[:32])
+        return self._decrypt_cbc(encrypted_data, quantum_key[:32])
 
-        return unpadded_data.decode('utf-8')
-
-    def _encrypt_pqc(self, data: bytes) -> dict:
+    def _encrypt_pqc(self, data: bytes, compression: Optional[str] = None) -> dict:
         """Post-Quantum Cryptography (placeholder implementation)."""
-        # For now, using standard AES as placeholder
+        # For now, a random AEAD key stored in the envelope as placeholder
         key = os.urandom(32)
-        iv = os.urandom(16)
+        envelope = self._seal(data, key, 3, 'PQC-AES', compression)
+        envelope['key'] = self._b64encode(key)
+        return envelope
 
-        cipher = Cipher(algorithms.AES(key), modes.CBC(iv))
-        encryptor = cipher.encryptor()
+    def _decrypt_pqc(self, encrypted_data: dict) -> bytes:
+        """Post-Quantum Cryptography decryption (placeholder)."""
+        key = binascii.a2b_base64(encrypted_data['key'])
+        if 'suite' in encrypted_data:
+            return self._open(encrypted_data, key)
+        return self._decrypt_cbc(encrypted_data, key)
 
-        padded_data = self._pad_data(data)
-        encrypted_bytes = encryptor.update(padded_data) + encryptor.finalize()
+    def _encrypt_standard(self, data: bytes, compression: Optional[str] = None) -> dict:
+        """Standard encryption (no quantum security)."""
+        key = os.urandom(32)
+        envelope = self._seal(data, key, 4, 'STANDARD', compression)
+        envelope['key'] = self._b64encode(key)
+        return envelope
 
-        return {
-            'encrypted_data': base64.b64encode(encrypted_bytes).decode('utf-8'),
-            'key': base64.b64encode(key).decode('utf-8'),
-            'iv': base64.b64encode(iv).decode('utf-8'),
-            'security_level': 3,
-            'algorithm': 'PQC-AES'
-        }
+    def _decrypt_standard(self, encrypted_data: dict) -> bytes:
+        """Standard decryption (AEAD, or legacy Fernet)."""
+        key = binascii.a2b_base64(encrypted_data['key'])
+        if 'suite' in encrypted_data:
+            return self._open(encrypted_data, key)
 
-    def _decrypt_pqc(self, encrypted_data: dict) -> str:
-        """Post-Quantum Cryptography decryption (placeholder)."""
-        key = base64.b64decode(encrypted_data['key'])
-        iv = base64.b64decode(encrypted_data['iv'])
+        from cryptography.fernet import Fernet
         encrypted_bytes = base64.b64decode(encrypted_data['encrypted_data'])
+        return Fernet(key).decrypt(encrypted_bytes)
 
-        cipher = Cipher(algorithms.AES(key), modes.CBC(iv))
-        decryptor = cipher.decryptor()
-        decrypted_bytes = decryptor.update(encrypted_bytes) + decryptor.finalize()
-
-        unpadded_data = self._unpad_data(decrypted_bytes)
-        return unpadded_data.decode('utf-8')
-
-    def _encrypt_standard(self, data: bytes) -> dict:
-        """Standard encryption (no quantum security)."""
-        key = Fernet.generate_key()
-        fernet = Fernet(key)
+    def _seal(self, data: bytes, key: bytes, security_level: int, algorithm: str,
+              compression: Optional[str] = None) -> dict:
+        """
+        Encrypt with the deployment's cipher suite into an envelope naming it.
 
-        encrypted_bytes = fernet.encrypt(data)
+        The envelope's algorithm is the level's label plus the suite, e.g.
+        'AES-QKD/chacha20-poly1305', and is what Email.encryption_algorithm stores.
+        """
+        suite = cipher_suites.default
+        nonce, encrypted_bytes = suite.seal(key, data, self._associated_data(security_level, compression))
 
         return {
-            'encrypted_data': base64.b64encode(encrypted_bytes).decode('utf-8'),
-            'key': base64.b64encode(key).decode('utf-8'),
-            'security_level': 4,
-            'algorithm': 'STANDARD'
+            'encrypted_data': self._b64encode(encrypted_bytes),
+            'nonce': self._b64encode(nonce),
+            'suite': suite.suite_id,
+            'security_level': security_level,
+            'algorithm': f'{algorithm}/{suite.suite_id}'
         }
 
-    def _decrypt_standard(self, encrypted_data: dict) -> str:
-        """Standard decryption."""
-        key = base64.b64decode(encrypted_data['key'])
-        encrypted_bytes = base64.b64decode(encrypted_data['encrypted_data'])
-
-        fernet = Fernet(key)
-        decrypted_bytes = fernet.decrypt(encrypted_bytes)
+    def _open(self, encrypted_data: dict, key: bytes) -> memoryview:
+        """Verify and decrypt an AEAD envelope with the suite it names."""
+        suite = cipher_suites.get(encrypted_data['suite'])
+        return suite.open(
+            key,
+            binascii.a2b_base64(encrypted_data['nonce']),
+            binascii.a2b_base64(encrypted_data['encrypted_data']),
+            self._associated_data(encrypted_data['security_level'], encrypted_data.get('compression'))
+        )
+
+    @staticmethod
+    def _associated_data(security_level: int, compression: Optional[str] = None) -> bytes:
+        """Binds the envelope to its security level and codec, so neither can be relabelled."""
+        label = f'qumail-envelope:{security_level}'
+        if compression:
+            label += f':{compression}'
+        return label.encode('utf-8')
+
+    @staticmethod
+    def _b64encode(data) -> str:
+        """Base64 text of any bytes-like object (scratch views included), without an extra copy."""
+        return binascii.b2a_base64(data, newline=False).decode('ascii')
+
+    def _decrypt_cbc(self, encrypted_data: dict, key: bytes) -> memoryview:
+        """Decrypt a legacy AES-256-CBC envelope (mail sent before cipher suites)."""
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        iv = binascii.a2b_base64(encrypted_data['iv'])
+        encrypted_bytes = binascii.a2b_base64(encrypted_data['encrypted_data'])
 
-        return decrypted_bytes.decode('utf-8')
+        cipher = Cipher(algorithms.AES(key), modes.CBC(iv))
+        decryptor = cipher.decryptor()
+        # update_into wants room for one block more than it is given
+        out = scratch.view(len(encrypted_bytes) + 15)
+        length = decryptor.update_into(encrypted_bytes, out)
+        decryptor.finalize()
 
-    def _pad_data(self, data: bytes) -> bytes:
-        """PKCS7 padding for block cipher."""
-        block_size = 16
-        padding_length = block_size - (len(data) % block_size)
-        padding = bytes([padding_length] * padding_length)
-        return data + padding
+        return self._unpad_data(out[:length])
 
-    def _unpad_data(self, padded_data: bytes) -> bytes:
+    def _unpad_data(self, padded_data: memoryview) -> memoryview:
         """Remove PKCS7 padding."""
         padding_length = padded_data[-1]
-        return padded_data[:-padding_length]
\ No newline at end of file
+        return padded_data[:-padding_length]
@@ -0,0 +1,218 @@
+from backend.services.email_service import EmailService
+from backend.utils.json_stream import dumps
+from email import encoders
+from email.generator import BytesGenerator
+from email.header import Header
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Any, Dict, Iterator, Optional
+import base64
+import binascii
+import re
+import threading
+import time
+import zlib
+
+
+class ExportBusy(Exception):
+    """Raised when the maximum number of exports is already running."""
+
+    def __init__(self, retry_after: int):
+        super().__init__('Too many exports running')
+        self.retry_after = retry_after
+
+
+class ExportService:
+    """
+    Streams a user's folder as NDJSON or mbox, decrypted, optionally gzipped.
+
+    Emails come from EmailService.iter_decrypted_emails (streaming cursors,
+    keys resolved per batch, decryption on the export worker pool). Encoded
+    messages are coalesced into chunks of about EXPORT_CHUNK_BYTES and, with
+    gzip, compressed chunk by chunk, so memory stays flat however large the
+    folder is. At most EXPORT_MAX_CONCURRENT exports run at once; callers
+    take a slot with acquire() and give it back with release().
+
+    NDJSON lines have the same shape as /api/email/decrypt results. mbox
+    output is mboxrd ("From " lines in bodies are quoted with ">"), the
+    variant `flask import-mail` reads back.
+    """
+
+    FORMATS = {
+        'ndjson': ('ndjson', 'application/x-ndjson'),
+        'mbox': ('mbox', 'application/mbox'),
+    }
+
+    FROM_LINE = re.compile(rb'^(>*From )', re.MULTILINE)
+    HEADER_BREAKS = re.compile(r'[\r\n]+')
+
+    def __init__(self):
+        self.email_service = EmailService()
+        self.batch_size = 200
+        self.chunk_bytes = 64 * 1024
+        self.gzip_level = 6
+        self.retry_after = 30
+        self._slots = None
+
+    def init_app(self, app):
+        self.batch_size = app.config['EXPORT_BATCH_SIZE']
+        self.chunk_bytes = app.config['EXPORT_CHUNK_BYTES']
+        self.gzip_level = app.config['EXPORT_GZIP_LEVEL']
+        self.retry_after = app.config['EXPORT_RETRY_AFTER']
+        max_concurrent = app.config['EXPORT_MAX_CONCURRENT']
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+
+    def acquire(self):
+        """Take an export slot, or raise ExportBusy."""
+        if self._slots is not None and not self._slots.acquire(blocking=False):
+            raise ExportBusy(self.retry_after)
+
+    def release(self):
+        """Give back a slot taken with acquire()."""
+        if self._slots is not None:
+            self._slots.release()
+
+    def filename(self, folder: str, fmt: str, compress: bool) -> str:
+        """Download filename for an export."""
+        extension = self.FORMATS[fmt][0] + ('.gz' if compress else '')
+        return f"qumail-{folder}-{datetime.utcnow():%Y%m%d}.{extension}"
+
+    def mimetype(self, fmt: str, compress: bool) -> str:
+        return 'application/gzip' if compress else self.FORMATS[fmt][1]
+
+    def export(self, user_id: int, folder: str = 'inbox', fmt: str = 'ndjson',
+               compress: bool = False, stats: Optional[Dict[str, int]] = None) -> Iterator[bytes]:
+        """
+        Export a folder.
+
+        Args:
+            user_id: Owner of the folder
+            folder: 'inbox' or 'outbox'
+            fmt: 'ndjson' or 'mbox'
+            compress: gzip the output
+            stats: Dict that receives 'emails' and 'failed' counts as the export runs
+
+        Returns:
+            Iterator of output chunks; the work happens as it is consumed
+
+        Raises:
+            ValueError: For an unknown folder or format (before anything is read)
+        """
+        if folder not in ('inbox', 'outbox'):
+            raise ValueError(f'Unknown folder: {folder}')
+        if fmt not in self.FORMATS:
+            raise ValueError(f'Unknown export format: {fmt}')
+
+        return self._generate(user_id, folder, fmt, compress, stats if stats is not None else {})
+
+    def _generate(self, user_id: int, folder: str, fmt: str, compress: bool,
+                  stats: Dict[str, int]) -> Iterator[bytes]:
+        encode = self._ndjson_line if fmt == 'ndjson' else self._mbox_message
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31) if compress else None
+        stats.update(emails=0, failed=0)
+
+        pieces = []
+        size = 0
+        for result in self.email_service.iter_decrypted_emails(user_id, folder, self.batch_size):
+            stats['emails'] += 1
+            if not result['success']:
+                stats['failed'] += 1
+
+            data = encode(result)
+            pieces.append(data)
+            size += len(data)
+            if size >= self.chunk_bytes:
+                chunk = b''.join(pieces)
+                pieces = []
+                size = 0
+                if compressor is not None:
+                    chunk = compressor.compress(chunk)
+                if chunk:
+                    yield chunk
+
+        chunk = b''.join(pieces)
+        if compressor is not None:
+            chunk = compressor.compress(chunk) + compressor.flush()
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def _ndjson_line(result: Dict[str, Any]) -> bytes:
+        return dumps(result) + b'\n'
+
+    def _mbox_message(self, result: Dict[str, Any]) -> bytes:
+        """
+        One mboxrd entry: "From " line, the message, a blank line.
+
+        Headers and plain text bodies are written directly; the email
+        package's generator (whose header folding dominates the cost) is
+        only used to build the MIME body of messages with attachments.
+        """
+        email = result['email']
+        created_at = datetime.fromisoformat(email['created_at'])
+
+        if result['success']:
+            text = result['decrypted_body'] or ''
+        else:
+            text = f"[QuMail could not export this message: {result['error']}]\n"
+
+        subject = self.HEADER_BREAKS.sub(' ', email['subject'] or '')
+        headers = [
+            f"From: {email['sender_email']}",
+            f"To: {email['recipient_email']}",
+            f"Subject: {subject if subject.isascii() else Header(subject, 'utf-8').encode()}",
+            f"Date: {format_datetime(created_at.replace(tzinfo=timezone.utc))}",
+            f"Message-ID: <{email['uuid']}@qumail>",
+            f"X-QuMail-Security-Level: {email['security_level']}",
+            f"Status: {'RO' if email['read_at'] else 'O'}",
+        ]
+        if not result['success']:
+            headers.append(f"X-QuMail-Error: {self.HEADER_BREAKS.sub(' ', result['error'])}")
+
+        attachments = result.get('decrypted_attachments') or []
+        if attachments:
+            message = MIMEMultipart()
+            message.attach(MIMEText(text))
+            for attachment in attachments:
+                message.attach(self._mime_attachment(attachment))
+            output = BytesIO()
+            BytesGenerator(output, mangle_from_=False).flatten(message)
+            data = output.getvalue()
+        else:
+            charset, encoding = ('us-ascii', '7bit') if text.isascii() else ('utf-8', '8bit')
+            data = (f'Content-Type: text/plain; charset="{charset}"\nMIME-Version: 1.0\n'
+                    f'Content-Transfer-Encoding: {encoding}\n\n{text}').encode('utf-8')
+
+        data = '\n'.join(headers).encode('utf-8') + b'\n' + self.FROM_LINE.sub(rb'>\1', data)
+        if not data.endswith(b'\n'):
+            data += b'\n'
+
+        from_line = f"From {email['sender_email']} {time.asctime(created_at.timetuple())}\n"
+        return from_line.encode('utf-8') + data + b'\n'
+
+    @staticmethod
+    def _mime_attachment(attachment: Dict[str, Any]) -> MIMEBase:
+        """A MIME part for a decrypted attachment (stored base64 encoded)."""
+        content_type = attachment.get('content_type') or 'application/octet-stream'
+        maintype, _, subtype = content_type.partition('/')
+        if not subtype:
+            maintype, subtype = 'application', 'octet-stream'
+
+        data = attachment.get('data') or ''
+        try:
+            payload = base64.b64decode(data, validate=True)
+        except (binascii.Error, ValueError):
+            payload = data.encode('utf-8') if isinstance(data, str) else data
+
+        part = MIMEBase(maintype, subtype)
+        part.set_payload(payload)
+        encoders.encode_base64(part)
+        part.add_header('Content-Disposition', 'attachment', filename=attachment.get('filename') or 'attachment')
+        return part
+
+
+export_service = ExportService()
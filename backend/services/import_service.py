@@ -0,0 +1,374 @@
+from backend.models import db
+from backend.models.archive import ArchivedEmail
+from backend.models.email import Email
+from backend.models.mail_import import MailImport
+from backend.models.mailbox_counter import MailboxCounter
+from backend.models.user import User
+from backend.services.email_service import EmailService
+from backend.services.search_service import SearchService
+from backend.services.unit_of_work import unit_of_work
+from flask import current_app
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import deque
+from datetime import datetime, timezone
+from email import message_from_bytes
+from email.header import decode_header, make_header
+from email.utils import getaddresses, parsedate_to_datetime
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import base64
+import os
+import re
+import uuid
+
+
+class ImportService:
+    """
+    Bulk import of existing mail from an mbox file or a Maildir.
+
+    Messages are read one at a time, so a multi-gigabyte mbox is never
+    loaded whole. They are parsed and encrypted in a worker pool at the
+    chosen security level and inserted in batches. Each batch's emails,
+    search postings, counter deltas and resume position commit in one
+    transaction: an interrupted import picks up where it stopped when run
+    again.
+
+    The importing user owns the folder; the other party of each message
+    (From for the inbox, the first To for the outbox) must have a QuMail
+    account, otherwise the message is skipped. A Message-ID together with
+    the sender and recipient maps to a stable email uuid, so a message
+    already imported for the same pair (e.g. from the other party's
+    mailbox) is skipped too, while each recipient of a message sent to
+    several people gets their own copy. QuMail exports carry the email's
+    own uuid as Message-ID and map back to it. Levels 1 and 2 would need a Key
+    Manager key per message and are not offered.
+    """
+
+    MESSAGE_ID_NAMESPACE = uuid.UUID('4b0f6f52-3c1e-4f8e-9a56-0d7f2c9e1a3b')
+    ESCAPED_FROM = re.compile(rb'^>(>*From )', re.MULTILINE)
+    # Message-ID written by ExportService
+    QUMAIL_MESSAGE_ID = re.compile(r'^<([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})@qumail>$')
+
+    def __init__(self):
+        self.email_service = EmailService()
+        self.search_service = SearchService()
+
+    def import_mailbox(self, source: str, owner_email: str, folder: str = 'inbox',
+                       security_level: int = 4, restart: bool = False) -> Dict[str, Any]:
+        """
+        Import an mbox file or Maildir into a user's folder. Runs inside an app context.
+
+        Args:
+            source: Path of an mbox file or of a Maildir (with cur/ and new/)
+            owner_email: Address of the QuMail user the mail belongs to
+            folder: 'inbox' or 'outbox'
+            security_level: 3 or 4
+            restart: Start over instead of resuming a previous run
+
+        Returns:
+            Dict with the import's progress (see MailImport.to_dict)
+        """
+        if folder not in ('inbox', 'outbox'):
+            raise ValueError(f'Unknown folder: {folder}')
+        if security_level not in (3, 4):
+            raise ValueError('Imports run at security level 3 or 4; '
+                             'levels 1 and 2 need a Key Manager key per message')
+
+        owner = User.query.filter_by(email=owner_email.lower().strip()).first()
+        if not owner:
+            raise ValueError(f'No user with address {owner_email}')
+
+        source = os.path.abspath(source)
+        is_maildir = os.path.isdir(source)
+        if is_maildir and not os.path.isdir(os.path.join(source, 'cur')):
+            raise ValueError(f'{source} is not a Maildir (no cur/ directory)')
+        if not is_maildir and not os.path.isfile(source):
+            raise ValueError(f'{source} does not exist')
+
+        progress = MailImport.query.filter_by(source=source, owner_id=owner.id, folder=folder).first()
+        if progress is None:
+            progress = MailImport(source=source, owner_id=owner.id, folder=folder,
+                                  security_level=security_level, position='',
+                                  imported=0, skipped=0, failed=0)
+            db.session.add(progress)
+        elif restart:
+            progress.position = ''
+            progress.imported = progress.skipped = progress.failed = 0
+        elif progress.status == 'done':
+            return progress.to_dict()
+        progress.security_level = security_level
+        progress.status = 'running'
+        db.session.commit()
+
+        reader = self._read_maildir(source, progress.position) if is_maildir \
+            else self._read_mbox(source, int(progress.position or 0))
+        batch_size = current_app.config['IMPORT_BATCH_SIZE']
+        addresses = {owner.email: owner.id}
+
+        # One batch is parsed and encrypted while the previous one is written
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=current_app.config['IMPORT_WORKERS'],
+                                thread_name_prefix='qumail-import') as executor:
+            for batch in iter(lambda: list(islice(reader, batch_size)), []):
+                pending.append((batch[-1][0], [
+                    executor.submit(self._prepare, raw, seen, folder, security_level, owner.email)
+                    for _, raw, seen in batch
+                ]))
+                if len(pending) > 1:
+                    self._write_batch(progress, owner, addresses, *pending.popleft())
+            while pending:
+                self._write_batch(progress, owner, addresses, *pending.popleft())
+
+        progress.status = 'done'
+        db.session.commit()
+        return progress.to_dict()
+
+    def _read_mbox(self, path: str, offset: int) -> Iterator[Tuple[str, Optional[bytes], Optional[bool]]]:
+        """
+        Yield (resume position, raw message, seen) for each message from offset on.
+
+        Messages start at lines beginning with 'From '; '>From ' lines are
+        unescaped (mboxrd). A message larger than IMPORT_MAX_MESSAGE_BYTES is
+        yielded as None without being kept in memory.
+        """
+        max_bytes = current_app.config['IMPORT_MAX_MESSAGE_BYTES']
+        position = offset
+        lines, size = None, -1  # size is -1 until the first 'From ' line
+
+        with open(path, 'rb') as mbox:
+            mbox.seek(offset)
+            for line in mbox:
+                if line.startswith(b'From '):
+                    if size >= 0:
+                        yield str(position), self._join(lines), None
+                    lines, size = [], 0
+                elif lines is not None:
+                    size += len(line)
+                    if size > max_bytes:
+                        lines = None
+                    else:
+                        lines.append(line)
+                position += len(line)
+
+            if size >= 0:
+                yield str(position), self._join(lines), None
+
+    @staticmethod
+    def _join(lines: Optional[List[bytes]]) -> Optional[bytes]:
+        """
+        A message from its mbox lines: without the blank line that separates
+        it from the next, and with '>From ' lines unescaped.
+        """
+        if lines is None:
+            return None
+        if lines and lines[-1] in (b'\n', b'\r\n'):
+            lines.pop()
+        return ImportService.ESCAPED_FROM.sub(rb'\1', b''.join(lines))
+
+    def _read_maildir(self, path: str, position: str) -> Iterator[Tuple[str, Optional[bytes], Optional[bool]]]:
+        """Yield (entry, raw message, seen) for each Maildir entry after position, in name order."""
+        max_bytes = current_app.config['IMPORT_MAX_MESSAGE_BYTES']
+        entries = sorted(
+            f'{subdirectory}/{name}'
+            for subdirectory in ('cur', 'new') if os.path.isdir(os.path.join(path, subdirectory))
+            for name in os.listdir(os.path.join(path, subdirectory)) if not name.startswith('.')
+        )
+
+        for entry in entries:
+            if entry <= position:
+                continue
+            filename = os.path.join(path, entry)
+            if os.path.getsize(filename) > max_bytes:
+                yield entry, None, None
+                continue
+
+            with open(filename, 'rb') as message_file:
+                raw = message_file.read()
+            flags = entry.rsplit(':2,', 1)[1] if ':2,' in entry else ''
+            yield entry, raw, 'S' in flags
+
+    def _prepare(self, raw: Optional[bytes], seen: Optional[bool], folder: str,
+                 security_level: int, owner_email: str) -> Dict[str, Any]:
+        """Parse and encrypt one message. Runs in the worker pool."""
+        if raw is None:
+            return {'skip': 'too large'}
+
+        try:
+            # The compat32 parser: the modern policy's header objects cost
+            # more than the encryption, and only a few headers are needed
+            message = message_from_bytes(raw)
+
+            header = 'From' if folder == 'inbox' else 'To'
+            counterparts = getaddresses([str(value) for value in message.get_all(header, [])])
+            counterpart = next((address.lower() for _, address in counterparts if address), None)
+            if not counterpart:
+                return {'skip': f'no {header} address'}
+
+            try:
+                created_at = parsedate_to_datetime(str(message['Date']))
+            except (TypeError, ValueError):
+                created_at = datetime.utcnow()
+            if created_at.tzinfo is not None:
+                created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+            if seen is None:
+                seen = 'R' in str(message.get('Status', ''))
+
+            message_id = str(message.get('Message-ID', '')).strip()
+            body, attachments = self._content(message)
+
+            pair = (counterpart, owner_email) if folder == 'inbox' else (owner_email, counterpart)
+            qumail_id = self.QUMAIL_MESSAGE_ID.match(message_id.lower())
+
+            return dict(
+                counterpart=counterpart,
+                uuid=self._message_uuid(message_id, *pair),
+                qumail_uuid=qumail_id.group(1) if qumail_id else None,
+                subject=self._decode_header(message.get('Subject'))[:200].strip() or '(no subject)',
+                created_at=created_at,
+                seen=seen or folder == 'outbox',
+                **self.email_service.encrypt_message(body, security_level, attachments or None)
+            )
+
+        except Exception as e:
+            return {'error': str(e)}
+
+    def _message_uuid(self, message_id: str, sender_email: str, recipient_email: str) -> str:
+        """Stable uuid of one sender -> recipient copy of a message (random without a Message-ID)."""
+        if not message_id:
+            return str(uuid.uuid4())
+        return str(uuid.uuid5(self.MESSAGE_ID_NAMESPACE, f'{message_id}\n{sender_email}\n{recipient_email}'))
+
+    @staticmethod
+    def _decode_header(value) -> str:
+        """A header value with RFC 2047 encoded words decoded."""
+        if value is None:
+            return ''
+        try:
+            return str(make_header(decode_header(str(value))))
+        except (LookupError, UnicodeError, ValueError):
+            return str(value)
+
+    def _content(self, message) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        The message body (the first plain text part, else the first HTML part)
+        and its attachments, in the shape /api/email/send takes them (base64 data).
+        """
+        texts = {}
+        attachments = []
+        for part in message.walk():
+            if part.is_multipart():
+                continue
+
+            content_type = part.get_content_type()
+            filename = part.get_filename()
+            if filename is None and part.get_content_disposition() != 'attachment' \
+                    and content_type in ('text/plain', 'text/html'):
+                texts.setdefault(content_type, part)
+                continue
+
+            data = part.get_payload(decode=True) or b''
+            attachments.append({
+                'filename': self._decode_header(filename) if filename else None,
+                'content_type': content_type,
+                'size': len(data),
+                'data': base64.b64encode(data).decode('ascii')
+            })
+
+        part = texts.get('text/plain') or texts.get('text/html')
+        if part is None:
+            return '', attachments
+
+        payload = part.get_payload(decode=True) or b''
+        try:
+            return payload.decode(part.get_content_charset() or 'utf-8', 'replace'), attachments
+        except LookupError:
+            return payload.decode('utf-8', 'replace'), attachments
+
+    def _write_batch(self, progress: MailImport, owner: User, addresses: Dict[str, Optional[int]],
+                     position: str, futures: List[Future]):
+        """Insert one prepared batch and move the resume position past it, in one transaction."""
+        prepared = [future.result() for future in futures]
+        items = [item for item in prepared if 'counterpart' in item]
+        skipped = sum(1 for item in prepared if 'skip' in item)
+        failed = sum(1 for item in prepared if 'error' in item)
+        for item in prepared:
+            if 'error' in item:
+                print(f"Error importing message: {item['error']}")
+
+        # Resolve the other parties, remembering them for the rest of the import
+        unknown = {item['counterpart'] for item in items} - addresses.keys()
+        if unknown:
+            addresses.update(dict.fromkeys(unknown))
+            addresses.update(db.session.execute(
+                db.select(User.email, User.id).where(User.email.in_(unknown))
+            ).all())
+
+        # Already imported, from this mailbox or the other party's: uuid -> (sender_id, recipient_id)
+        uuids = [item['uuid'] for item in items] + [item['qumail_uuid'] for item in items if item['qumail_uuid']]
+        existing = {}
+        for model in (Email, ArchivedEmail):
+            existing.update((email_uuid, (sender_id, recipient_id)) for email_uuid, sender_id, recipient_id in
+                            db.session.execute(
+                                db.select(model.uuid, model.sender_id, model.recipient_id)
+                                .where(model.uuid.in_(uuids))
+                            ))
+
+        with unit_of_work():
+            emails = []
+            counter_deltas = {}
+            for item in items:
+                counterpart_id = addresses[item['counterpart']]
+                if counterpart_id is None:
+                    skipped += 1
+                    continue
+
+                if progress.folder == 'inbox':
+                    sender_id, recipient_id = counterpart_id, owner.id
+                    sender_email, recipient_email = item['counterpart'], owner.email
+                else:
+                    sender_id, recipient_id = owner.id, counterpart_id
+                    sender_email, recipient_email = owner.email, item['counterpart']
+
+                # An exported QuMail email keeps its uuid, unless that is taken by another pair
+                email_uuid = item['uuid']
+                if item['qumail_uuid'] and existing.get(item['qumail_uuid'], (sender_id, recipient_id)) \
+                        == (sender_id, recipient_id):
+                    email_uuid = item['qumail_uuid']
+                if email_uuid in existing:
+                    skipped += 1
+                    continue
+                existing[email_uuid] = (sender_id, recipient_id)
+
+                email = Email(
+                    uuid=email_uuid,
+                    sender_id=sender_id,
+                    recipient_id=recipient_id,
+                    subject=item['subject'],
+                    encrypted_body=item['encrypted_body'],
+                    encrypted_attachments=item['encrypted_attachments'],
+                    security_level=progress.security_level,
+                    encryption_algorithm=item['encryption_algorithm'],
+                    created_at=item['created_at'],
+                    read_at=item['created_at'] if item['seen'] else None,
+                    status='sent'
+                )
+                emails.append((email, sender_email, recipient_email))
+
+                for key, unread in (((recipient_id, 'inbox'), 0 if item['seen'] else 1), ((sender_id, 'outbox'), 0)):
+                    total_delta, unread_delta = counter_deltas.get(key, (0, 0))
+                    counter_deltas[key] = (total_delta + 1, unread_delta + unread)
+
+            db.session.add_all(email for email, _, _ in emails)
+            db.session.flush()
+            self.search_service.index_emails(emails)
+
+            for (user_id, folder), (total, unread) in counter_deltas.items():
+                MailboxCounter.apply(user_id, folder, progress.security_level, total=total, unread=unread)
+
+            progress.position = position
+            progress.imported += len(emails)
+            progress.skipped += skipped
+            progress.failed += failed
+
+        print(f"Imported {progress.imported} emails ({progress.skipped} skipped, {progress.failed} failed)")
@@ -0,0 +1,142 @@
+from backend.services.cipher_suites import wipe
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any
+import threading
+import time
+
+
+class KeyMaterialCache:
+    """
+    Short-lived in-process cache of unwrapped quantum key bytes by key_id.
+
+    Opening a level 1/2 message again (or the rest of its thread) then
+    skips the QuantumKey query and the storage unwrapping. Entries live for
+    KEY_CACHE_TTL seconds at most, and never past the key's own expiry. The
+    cache is bounded by KEY_CACHE_MAX_ENTRIES and KEY_CACHE_MAX_BYTES; keys
+    larger than the byte cap are not cached at all.
+
+    Key bytes are held in bytearrays and zeroed when an entry is evicted,
+    expires (swept on the next lookup or store) or is dropped. Lookups
+    return a copy, so eviction never changes a key another thread is
+    decrypting with.
+
+    The cache only serves decryption. Keys for new messages always come
+    from the database, where QuantumKey.is_used keeps OTP keys single-use.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.ttl = 60.0
+        self.max_entries = 1024
+        self.max_bytes = 1024 * 1024
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def init_app(self, app):
+        self.enabled = app.config['KEY_CACHE_ENABLED']
+        self.ttl = app.config['KEY_CACHE_TTL']
+        self.max_entries = app.config['KEY_CACHE_MAX_ENTRIES']
+        self.max_bytes = app.config['KEY_CACHE_MAX_BYTES']
+        self.clear()
+
+    def get(self, key_id: str) -> Optional[bytes]:
+        """Return a copy of the cached key bytes, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            self._sweep()
+            entry = self._entries.get(key_id)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            material, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._drop(key_id)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key_id)
+            self.hits += 1
+            return bytes(material)
+
+    def set(self, key_id: str, key_data: bytes, key_expires_at: Optional[datetime] = None):
+        """
+        Cache unwrapped key bytes.
+
+        Args:
+            key_id: QuantumKey.key_id
+            key_data: The unwrapped key
+            key_expires_at: QuantumKey.expires_at (naive UTC); the entry
+                does not outlive it
+        """
+        if not self.enabled or len(key_data) > self.max_bytes:
+            return
+
+        lifetime = self.ttl
+        if key_expires_at is not None:
+            lifetime = min(lifetime, (key_expires_at - datetime.utcnow()).total_seconds())
+        if lifetime <= 0:
+            return
+
+        with self._lock:
+            self._sweep()
+            self._drop(key_id)
+            self._entries[key_id] = (bytearray(key_data), time.monotonic() + lifetime)
+            self._bytes += len(key_data)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key_id: str):
+        with self._lock:
+            self._drop(key_id)
+
+    def clear(self):
+        with self._lock:
+            for key_id in list(self._entries):
+                self._drop(key_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def _sweep(self):
+        """Zero expired entries, at most once a second; the lock must be held."""
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + 1.0
+        for key_id in [key_id for key_id, (_, expires_at) in self._entries.items() if expires_at <= now]:
+            self._drop(key_id)
+            self.expirations += 1
+
+    def _drop(self, key_id: str):
+        """Remove and zero an entry; the lock must be held."""
+        entry = self._entries.pop(key_id, None)
+        if entry is not None:
+            material = entry[0]
+            self._bytes -= len(material)
+            wipe(memoryview(material))
+
+
+key_cache = KeyMaterialCache()
@@ -0,0 +1,322 @@
+from flask import request, Response
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import math
+import threading
+import time
+
+
+# Latency buckets in seconds, from 0.5 ms to 10 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+# Per-request SQL statement counter, set for the duration of each request
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar('qumail_request_queries', default=None)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self, lock):
+        self.value = 0.0
+        self._lock = lock
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds, lock):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = lock
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Get the child for a label combination. Callers may keep it to skip the lookup."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild(self._lock)
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def _render_child(self, key, child):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}']
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds, self._lock)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _render_child(self, key, child):
+        with self._lock:
+            counts, total = list(child.counts), child.sum
+
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (math.inf,), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Collected(_Metric):
+    """Values read from a callback at scrape time, so the hot path pays nothing."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str],
+                 collect: Callable[[], Dict[Tuple, float]], kind: str = 'gauge'):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for key, value in sorted(self.collect().items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics exposed in the Prometheus text format at /metrics.
+
+    Counters and histograms are updated under a short per-metric lock; a
+    labelled child can be looked up once and reused, so recording an event
+    costs about a microsecond. Cache and buffer statistics are collected
+    from their owners only when /metrics is scraped.
+
+    Values are per process. Under a multi-worker server each worker reports
+    its own series; scrape workers individually or aggregate in Prometheus.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def collected(self, name: str, documentation: str, labelnames: Iterable[str],
+                  collect: Callable[[], Dict[Tuple, float]], kind: str = 'gauge') -> Collected:
+        return self._register(Collected(name, documentation, labelnames, collect, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"Error collecting metric {metric.name}: {str(e)}")
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric: _Metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def init_app(self, app):
+        """
+        Instrument requests and SQL statements and serve /metrics. Outside
+        development and testing the endpoint needs METRICS_TOKEN.
+        """
+        self.enabled = app.config['METRICS_ENABLED']
+        if not self.enabled:
+            return
+
+        from backend.models import db
+        from sqlalchemy import event
+
+        token = app.config['METRICS_TOKEN']
+
+        @app.before_request
+        def start_request_metrics():
+            _request_queries.set([0])
+            request.environ['qumail.metrics_start'] = time.perf_counter()
+
+        @app.after_request
+        def record_request_metrics(response):
+            started_at = request.environ.pop('qumail.metrics_start', None)
+            queries = _request_queries.get()
+            _request_queries.set(None)
+            if started_at is None:
+                return response
+
+            endpoint = request.endpoint or 'unmatched'
+            http_request_seconds.labels(request.method, endpoint, response.status_code) \
+                .observe(time.perf_counter() - started_at)
+            if queries is not None:
+                db_queries_per_request.labels(endpoint).observe(queries[0])
+            return response
+
+        def count_query(conn, cursor, statement, parameters, context, executemany):
+            queries = _request_queries.get()
+            if queries is not None:
+                queries[0] += 1
+
+        with app.app_context():
+            for engine in db.engines.values():
+                if not event.contains(engine, 'before_cursor_execute', count_query):
+                    event.listen(engine, 'before_cursor_execute', count_query)
+
+        def metrics_endpoint():
+            if token and request.headers.get('Authorization') != f'Bearer {token}':
+                return Response('Unauthorized\n', status=401, mimetype='text/plain')
+            return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+        # Per-route traffic and cache sizes are not for anonymous clients
+        if token or app.debug or app.testing:
+            app.add_url_rule('/metrics', 'metrics', metrics_endpoint)
+        else:
+            print("Metrics endpoint disabled: set METRICS_TOKEN to serve /metrics outside development")
+        _register_collectors()
+
+
+metrics = MetricsRegistry()
+
+http_request_seconds = metrics.histogram(
+    'qumail_http_request_duration_seconds', 'Time spent handling a request, by route.',
+    ('method', 'endpoint', 'status')
+)
+db_queries_per_request = metrics.histogram(
+    'qumail_db_queries_per_request', 'SQL statements executed per request.',
+    ('endpoint',), QUERY_COUNT_BUCKETS
+)
+km_request_seconds = metrics.histogram(
+    'qumail_km_request_duration_seconds', 'Latency of Key Manager calls.', ('operation',)
+)
+km_errors_total = metrics.counter(
+    'qumail_km_errors_total', 'Failed Key Manager calls.', ('operation', 'reason')
+)
+crypto_seconds = metrics.histogram(
+    'qumail_crypto_duration_seconds', 'Time spent encrypting or decrypting a payload.',
+    ('operation', 'security_level')
+)
+crypto_bytes_total = metrics.counter(
+    'qumail_crypto_bytes_total', 'Bytes encrypted or decrypted (UTF-8 plaintext, after compression).',
+    ('operation', 'security_level')
+)
+
+
+def _register_collectors():
+    """Expose statistics that services already keep, read at scrape time."""
+    from backend.services.user_cache import user_cache
+    from backend.services.key_cache import key_cache
+    from backend.services.directory_service import directory
+    from backend.services.write_behind import write_behind
+    from backend.services.cipher_suites import cipher_suites
+
+    def cache_stats():
+        stats = {f'user_{index}': stats for index, stats in user_cache.stats().items()}
+        stats['key_material'] = key_cache.stats()
+        return stats
+
+    for field, kind in (('hits', 'counter'), ('misses', 'counter'), ('evictions', 'counter'),
+                        ('expirations', 'counter'), ('size', 'gauge'), ('hit_rate', 'gauge')):
+        suffix = '_total' if kind == 'counter' else ''
+        metrics.collected(
+            f'qumail_cache_{field}{suffix}', f'Cache {field.replace("_", " ")}.', ('cache',),
+            lambda field=field: {(cache,): stats[field] for cache, stats in cache_stats().items()},
+            kind
+        )
+
+    metrics.collected(
+        'qumail_key_cache_bytes', 'Unwrapped key bytes held by the key material cache.', (),
+        lambda: {(): key_cache.stats()['bytes']}
+    )
+    metrics.collected(
+        'qumail_directory_entries', 'Entries in the recipient autocomplete index.', ('index',),
+        lambda: {(index,): count for index, count in directory.stats().items()}
+    )
+    metrics.collected(
+        'qumail_write_behind_pending', 'Buffered last_login/read updates awaiting flush.', (),
+        lambda: {(): write_behind.pending()}
+    )
+    metrics.collected(
+        'qumail_cipher_suite_seal_seconds', 'Seal time per 16 KB measured when CIPHER_SUITE=auto chose a suite.',
+        ('suite',), lambda: {(suite_id,): seconds for suite_id, seconds in cipher_suites.timings.items()}
+    )
+    metrics.collected(
+        'qumail_cipher_suite_selected', 'Cipher suite used for new envelopes (1 once chosen).', ('suite',),
+        lambda: {(cipher_suites.selected_id,): 1} if cipher_suites.selected_id else {}
+    )
@@ -0,0 +1,108 @@
+from werkzeug.security import generate_password_hash, check_password_hash
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import os
+import secrets
+import threading
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password hashes are already running or queued."""
+
+    def __init__(self, retry_after: int):
+        super().__init__('Password hashing capacity exhausted')
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Runs the password KDF on a small bounded thread pool.
+
+    werkzeug's KDFs (scrypt, pbkdf2) release the GIL, so while a hash runs the
+    request thread only waits and other requests keep being served. The pool
+    caps how many hashes burn CPU at once (PASSWORD_HASH_WORKERS), and
+    admission control rejects work beyond PASSWORD_HASH_QUEUE waiting jobs
+    with PasswordHasherBusy instead of letting a login storm pile up behind
+    it. With PASSWORD_HASH_WORKERS = 0 hashing runs inline.
+
+    Hashes record their own parameters, so changing PASSWORD_HASH_METHOD only
+    affects new hashes; needs_rehash() tells callers when a stored hash is
+    out of date.
+    """
+
+    def __init__(self):
+        self.method = 'scrypt'
+        self.workers = 0
+        self.queue_size = 0
+        self.retry_after = 1
+        self._reference_hash = None
+        self._slots = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.queue_size = app.config['PASSWORD_HASH_QUEUE']
+        self.retry_after = app.config['PASSWORD_HASH_RETRY_AFTER']
+        self._reference_hash = None
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size) if self.workers else None
+        self._executor = None
+
+    def hash(self, password: str) -> str:
+        """Hash a password with the configured method."""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: Optional[str], password: str) -> bool:
+        """Check a password against a stored hash."""
+        if not password_hash:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def verify_dummy(self, password: str) -> bool:
+        """
+        Check a password against a throwaway hash and return False, so a
+        login for a missing or inactive account costs as much as a real one.
+        """
+        self.verify(self._get_reference_hash(), password)
+        return False
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Whether a stored hash was made with different parameters."""
+        return password_hash.split('$', 1)[0] != self._get_reference_hash().split('$', 1)[0]
+
+    def _get_reference_hash(self) -> str:
+        """
+        A hash of a random password made with the configured method, once per
+        process. Its prefix is the method string werkzeug records (defaults
+        filled in, e.g. "scrypt" -> "scrypt:32768:8:1"), whatever its version.
+        """
+        if self._reference_hash is None:
+            self._reference_hash = self.hash(secrets.token_hex(16))
+        return self._reference_hash
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy(self.retry_after)
+        try:
+            return self._get_executor().submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Pool threads do not survive fork, so build one per process."""
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix='qumail-kdf'
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,229 @@
+from flask import request
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import traceback
+import uuid
+
+
+# SQL statements of the request being profiled, None for all other requests
+_captured_sql: ContextVar[Optional[List[Dict]]] = ContextVar('qumail_profiled_sql', default=None)
+
+
+class StackSampler:
+    """
+    Statistical profiler for one thread: a daemon thread snapshots the
+    request thread's stack every interval and counts identical stacks.
+    Much cheaper than cProfile on deep call chains, at the cost of only
+    seeing where time was spent, not exact call counts.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='qumail-profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = ';'.join(
+                f'{entry.name} ({os.path.basename(entry.filename)}:{entry.lineno})'
+                for entry in traceback.extract_stack(frame)
+            )
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format read by flamegraph.pl and speedscope."""
+        return ''.join(f'{stack} {count}\n' for stack, count in
+                       sorted(self.stacks.items(), key=lambda item: -item[1]))
+
+
+class RequestProfiler:
+    """
+    On-demand profiling of individual requests.
+
+    Off unless PROFILING_ENABLED. A request is profiled when it carries the
+    X-Profile-Token header matching PROFILING_TOKEN, or at random with
+    probability PROFILING_SAMPLE_RATE (optionally only for the endpoints in
+    PROFILING_ENDPOINTS). Each profiled request gets an ID, returned in the
+    X-Profile-Id response header, and leaves in PROFILING_DIR:
+
+        <id>.prof     cProfile stats (mode "cprofile"), load with pstats/snakeviz
+        <id>.folded   collapsed stacks (mode "sampling"), for flame graphs
+        <id>.json     request summary, SQL statements with timings and the
+                      top functions
+
+    Streamed responses (bulk decrypt, export) do their work while the body
+    is sent, so their profile is stopped and saved when the response closes.
+
+    SQL parameters are never recorded, since they carry ciphertext and
+    password hashes.
+    """
+
+    HEADER = 'X-Profile-Token'
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.token = None
+        self.directory = None
+        self.mode = 'cprofile'
+        self.endpoints = set()
+        self.sampling_interval = 0.001
+        self.max_statements = 500
+
+    def init_app(self, app):
+        self.enabled = app.config['PROFILING_ENABLED']
+        if not self.enabled:
+            return
+
+        self.sample_rate = app.config['PROFILING_SAMPLE_RATE']
+        self.token = app.config['PROFILING_TOKEN']
+        self.directory = os.path.abspath(app.config['PROFILING_DIR'])
+        self.mode = app.config['PROFILING_MODE']
+        self.endpoints = {name.strip() for name in app.config['PROFILING_ENDPOINTS'].split(',') if name.strip()}
+        self.sampling_interval = app.config['PROFILING_SAMPLING_INTERVAL_MS'] / 1000.0
+        if self.mode not in ('cprofile', 'sampling'):
+            raise ValueError(f'Unknown PROFILING_MODE: {self.mode}')
+        os.makedirs(self.directory, exist_ok=True)
+
+        from backend.models import db
+        from sqlalchemy import event
+
+        @app.before_request
+        def start_profile():
+            if self._should_profile():
+                request.environ['qumail.profile'] = self._start()
+
+        @app.after_request
+        def finish_profile(response):
+            state = request.environ.pop('qumail.profile', None)
+            if state is not None:
+                state.update(method=request.method, path=request.path, endpoint=request.endpoint,
+                             status=response.status_code)
+                response.headers['X-Profile-Id'] = state['id']
+                if response.is_streamed:
+                    response.call_on_close(lambda: self._finish(state))
+                else:
+                    self._finish(state)
+            return response
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            if _captured_sql.get() is not None:
+                context._qumail_profile_start = time.perf_counter()
+
+        def after_execute(conn, cursor, statement, parameters, context, executemany):
+            statements = _captured_sql.get()
+            started_at = getattr(context, '_qumail_profile_start', None)
+            if statements is None or started_at is None or len(statements) >= self.max_statements:
+                return
+            statements.append({
+                'statement': statement,
+                'ms': round((time.perf_counter() - started_at) * 1000, 3),
+                'executemany': executemany,
+                'rowcount': cursor.rowcount
+            })
+
+        with app.app_context():
+            for engine in db.engines.values():
+                if not event.contains(engine, 'before_cursor_execute', before_execute):
+                    event.listen(engine, 'before_cursor_execute', before_execute)
+                    event.listen(engine, 'after_cursor_execute', after_execute)
+
+    def _should_profile(self) -> bool:
+        supplied = request.headers.get(self.HEADER)
+        if supplied and self.token and hmac.compare_digest(supplied, self.token):
+            return True
+        if self.sample_rate <= 0:
+            return False
+        if self.endpoints and request.endpoint not in self.endpoints:
+            return False
+        return random.random() < self.sample_rate
+
+    def _start(self) -> Dict:
+        state = {
+            'id': f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:12]}",
+            'started_at': time.perf_counter(),
+            'sql': [],
+            'profile': None,
+            'sampler': None
+        }
+        _captured_sql.set(state['sql'])
+
+        if self.mode == 'sampling':
+            state['sampler'] = StackSampler(threading.get_ident(), self.sampling_interval)
+            state['sampler'].start()
+        else:
+            state['profile'] = cProfile.Profile()
+            state['profile'].enable()
+        return state
+
+    def _finish(self, state: Dict):
+        """Stop profiling and write the profile files."""
+        try:
+            self._save(state)
+        except Exception as e:
+            print(f"Error saving request profile: {str(e)}")
+
+    def _save(self, state: Dict):
+        if state['profile'] is not None:
+            state['profile'].disable()
+        if state['sampler'] is not None:
+            state['sampler'].stop()
+        duration = time.perf_counter() - state['started_at']
+        _captured_sql.set(None)
+
+        profile_id = state['id']
+        base = os.path.join(self.directory, profile_id)
+        summary = {
+            'id': profile_id,
+            'method': state['method'],
+            'path': state['path'],
+            'endpoint': state['endpoint'],
+            'status': state['status'],
+            'mode': self.mode,
+            'duration_ms': round(duration * 1000, 3),
+            'sql_count': len(state['sql']),
+            'sql_ms': round(sum(entry['ms'] for entry in state['sql']), 3),
+            'sql': state['sql']
+        }
+
+        if state['profile'] is not None:
+            state['profile'].dump_stats(base + '.prof')
+            output = io.StringIO()
+            pstats.Stats(state['profile'], stream=output).sort_stats('cumulative').print_stats(25)
+            summary['top_functions'] = output.getvalue().splitlines()
+        else:
+            sampler = state['sampler']
+            with open(base + '.folded', 'w') as f:
+                f.write(sampler.collapsed())
+            summary['samples'] = sampler.samples
+
+        with open(base + '.json', 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+request_profiler = RequestProfiler()
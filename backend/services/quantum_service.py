@@ -1,4 +1,3 @@
-import requests
 import json
 import base64
 import secrets
@@ -6,7 +5,64 @@ from datetime import datetime, timedelta
 from backend.models import db
 from backend.models.quantum_key import QuantumKey
 from backend.models.user import User
+from backend.services.metrics import km_request_seconds, km_errors_total
+from backend.services.key_cache import key_cache
 from typing import Optional, Dict, Any
+import os
+import threading
+import time
+
+
+class KMClient:
+    """
+    Pooled HTTP session for Key Manager calls, one per process.
+
+    Reusing keep-alive connections saves a TCP (and TLS) handshake on every
+    key request. Connections must not be shared across fork, so the session
+    is rebuilt whenever it is used from a new process. requests itself is
+    only imported on the first KM call.
+    """
+
+    def __init__(self):
+        self.pool_size = 10
+        self.timeout = 30
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.pool_size = app.config['KM_POOL_SIZE']
+        self.timeout = app.config['KM_TIMEOUT']
+        self.reset()
+
+    @property
+    def session(self):
+        return self.connect()
+
+    def connect(self):
+        """Open this process's session if it has none yet, and return it."""
+        if self._session is None or self._pid != os.getpid():
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session, self._pid = session, os.getpid()
+        return self._session
+
+    def reset(self):
+        """Drop pooled connections; the next call opens a fresh session."""
+        with self._lock:
+            if self._session is not None and self._pid == os.getpid():
+                self._session.close()
+            self._session, self._pid = None, None
+
+
+km_client = KMClient()
 
 
 class QuantumService:
@@ -56,6 +112,8 @@ class QuantumService:
 
     def _request_key_from_km(self, recipient_email: str, key_length: int) -> Optional[Dict[Any, Any]]:
         """Request key from Key Manager using ETSI protocol."""
+        import requests
+
         try:
             # ETSI GS QKD 014 key request format
             request_payload = {
@@ -67,24 +125,31 @@ class QuantumService:
             }
 
             # Make request to KM
-            response = requests.post(
-                f"{self.km_base_url}/api/v1/keys/get_key",
-                headers=self.headers,
-                json=request_payload,
-                timeout=30
-            )
+            started = time.perf_counter()
+            try:
+                response = km_client.session.post(
+                    f"{self.km_base_url}/api/v1/keys/get_key",
+                    headers=self.headers,
+                    json=request_payload,
+                    timeout=km_client.timeout
+                )
+            finally:
+                km_request_seconds.labels('get_key').observe(time.perf_counter() - started)
 
             if response.status_code == 200:
                 return response.json()
             else:
+                km_errors_total.labels('get_key', f'http_{response.status_code}').inc()
                 print(f"KM request failed: {response.status_code} - {response.text}")
                 return None
 
         except requests.RequestException as e:
+            km_errors_total.labels('get_key', type(e).__name__).inc()
             print(f"KM connection error: {str(e)}")
             # Fallback to simulated key for testing
             return self._simulate_km_response(key_length)
         except Exception as e:
+            km_errors_total.labels('get_key', 'error').inc()
             print(f"KM request error: {str(e)}")
             return None
 
@@ -116,11 +181,11 @@ class QuantumService:
                 encrypted_key_data=encrypted_key_data,
                 key_length=key_length,
                 km_source=km_response.get('metadata', {}).get('source', 'unknown'),
-                sequence_number=secrets.randbits(64)
+                sequence_number=secrets.randbits(63)  # Fits a signed BIGINT
             )
 
             db.session.add(quantum_key)
-            db.session.commit()
+            db.session.flush()
 
             return quantum_key
 
@@ -129,24 +194,45 @@ class QuantumService:
             raise e
 
     def retrieve_key_data(self, quantum_key: QuantumKey) -> Optional[bytes]:
-        """Retrieve and decrypt quantum key data."""
+        """Retrieve and decrypt quantum key data for a new message, consuming the key."""
         try:
             if not quantum_key.is_valid():
                 return None
 
-            # Decrypt key data
-            key_data = self._decrypt_key_from_storage(quantum_key.encrypted_key_data)
+            key_bytes = self.unwrap_key_data(quantum_key)
 
             # Mark key as used (for OTP)
             if quantum_key.key_type == 'symmetric':
                 quantum_key.mark_as_used()
 
-            return base64.b64decode(key_data)
+            return key_bytes
 
         except Exception as e:
             print(f"Error retrieving key data: {str(e)}")
             return None
 
+    def decryption_key_data(self, quantum_key: QuantumKey) -> Optional[bytes]:
+        """
+        Key data for decrypting mail already sent with this key.
+
+        A used key still opens the message it encrypted; single use only
+        limits encryption (see retrieve_key_data). Expired keys return None.
+        """
+        try:
+            if quantum_key.is_expired():
+                return None
+            return self.unwrap_key_data(quantum_key)
+
+        except Exception as e:
+            print(f"Error retrieving key data: {str(e)}")
+            return None
+
+    def unwrap_key_data(self, quantum_key: QuantumKey) -> bytes:
+        """Decrypt stored key data and keep it in the key material cache."""
+        key_bytes = base64.b64decode(self._decrypt_key_from_storage(quantum_key.encrypted_key_data))
+        key_cache.set(quantum_key.key_id, key_bytes, quantum_key.expires_at)
+        return key_bytes
+
     def _encrypt_key_for_storage(self, key_data: str) -> str:
         """Encrypt quantum key for secure storage."""
         # Simple XOR encryption for demo (use proper encryption in production)
@@ -172,12 +258,18 @@ class QuantumService:
 
     def check_km_connection(self) -> Dict[str, Any]:
         """Check connection to Key Manager."""
+        import requests
+
+        started = time.perf_counter()
         try:
-            response = requests.get(
+            response = km_client.session.get(
                 f"{self.km_base_url}/api/v1/status",
                 headers=self.headers,
                 timeout=10
             )
+            km_request_seconds.labels('status').observe(time.perf_counter() - started)
+            if response.status_code != 200:
+                km_errors_total.labels('status', f'http_{response.status_code}').inc()
 
             return {
                 'connected': response.status_code == 200,
@@ -185,7 +277,9 @@ class QuantumService:
                 'response_time': response.elapsed.total_seconds()
             }
 
-        except requests.RequestException:
+        except requests.RequestException as e:
+            km_request_seconds.labels('status').observe(time.perf_counter() - started)
+            km_errors_total.labels('status', type(e).__name__).inc()
             return {
                 'connected': False,
                 'status': 'connection_error',
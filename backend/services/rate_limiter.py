@@ -0,0 +1,215 @@
+from flask import jsonify
+from typing import Dict, List, Optional, Tuple
+import math
+import threading
+import time
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# (key, capacity, refill rate in tokens per second)
+Bucket = Tuple[str, float, float]
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request would overdraw one of its token buckets."""
+
+    def __init__(self, retry_after: float, scope: str):
+        super().__init__(f'Rate limit exceeded ({scope})')
+        self.retry_after = retry_after
+        self.scope = scope
+
+
+def parse_limit(spec: str) -> Tuple[float, float]:
+    """
+    Parse a limit such as '30/minute' into (capacity, tokens per second).
+
+    The count is also the burst size: a full bucket allows that many requests
+    at once, then refills evenly over the period. Counts below 1 are
+    rejected (a zero rate would never refill); disable limiting with
+    RATE_LIMIT_ENABLED instead.
+    """
+    count, _, period = spec.partition('/')
+    period = period.strip().rstrip('s') or 'second'
+    if period not in PERIODS:
+        raise ValueError(f'Unknown rate limit period: {spec}')
+    try:
+        capacity = float(count)
+    except ValueError:
+        raise ValueError(f'Invalid rate limit count: {spec}')
+    if not capacity >= 1:
+        raise ValueError(f'Rate limit count must be at least 1: {spec}')
+    return capacity, capacity / PERIODS[period]
+
+
+class MemoryBucketStore:
+    """Token buckets held in this process."""
+
+    def __init__(self, max_keys: int = 100000, idle_after: float = 86400.0):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self.max_keys = max_keys
+        # Seconds after which any bucket has refilled completely
+        self.idle_after = idle_after
+
+    def take(self, buckets: List[Bucket], cost: float = 1) -> Tuple[float, Optional[str]]:
+        """
+        Take cost tokens from every bucket, or from none of them.
+
+        Returns:
+            (0, None) when allowed, otherwise seconds until the request would
+            fit and the key of the bucket that ran out
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            wait, limited = 0.0, None
+            for key, capacity, rate in buckets:
+                tokens, updated_at = self._buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - updated_at) * rate)
+                levels.append(tokens)
+                if tokens < cost and (cost - tokens) / rate > wait:
+                    wait, limited = (cost - tokens) / rate, key
+
+            if limited is not None:
+                return wait, limited
+
+            for (key, _, _), tokens in zip(buckets, levels):
+                self._buckets[key] = (tokens - cost, now)
+
+            if len(self._buckets) > self.max_keys:
+                self._sweep(now)
+            return 0.0, None
+
+    def _sweep(self, now: float):
+        """Drop buckets that have refilled completely; they equal a fresh bucket."""
+        idle = [
+            key for key, (_, updated_at) in self._buckets.items()
+            if now - updated_at > self.idle_after
+        ]
+        for key in idle:
+            del self._buckets[key]
+
+
+class RedisBucketStore:
+    """Token buckets shared by all processes through Redis."""
+
+    # Checks every bucket first and only then debits them, all in one atomic
+    # script. Returns the wait in seconds as a string (Lua numbers would be
+    # truncated to integers) and the index of the bucket that ran out.
+    SCRIPT = """
+        local now = redis.call('TIME')
+        now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+        local cost = tonumber(ARGV[1])
+        local levels, wait, limited = {}, 0, 0
+        for i, key in ipairs(KEYS) do
+            local capacity, rate = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+            local state = redis.call('HMGET', key, 'tokens', 'ts')
+            local tokens = tonumber(state[1]) or capacity
+            local ts = tonumber(state[2]) or now
+            tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+            levels[i] = tokens
+            if tokens < cost and (cost - tokens) / rate > wait then
+                wait, limited = (cost - tokens) / rate, i
+            end
+        end
+        if limited > 0 then
+            return {tostring(wait), limited}
+        end
+        for i, key in ipairs(KEYS) do
+            local capacity, rate = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+            redis.call('HSET', key, 'tokens', levels[i] - cost, 'ts', now)
+            redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+        end
+        return {'0', 0}
+    """
+
+    def __init__(self, url: str, prefix: str = 'qumail:ratelimit:'):
+        if redis is None:
+            raise RuntimeError('RATE_LIMIT_REDIS_URL is set but the redis package is not installed')
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+        self.prefix = prefix
+
+    def take(self, buckets: List[Bucket], cost: float = 1) -> Tuple[float, Optional[str]]:
+        args = [cost]
+        for _, capacity, rate in buckets:
+            args.extend([capacity, rate])
+
+        wait, limited = self._script(keys=[self.prefix + key for key, _, _ in buckets], args=args)
+        if not limited:
+            return 0.0, None
+        return float(wait), buckets[int(limited) - 1][0]
+
+
+class RateLimiter:
+    """
+    Token-bucket limits for endpoints that draw keys from the Key Manager.
+
+    Every KM request is charged against three buckets at once: the calling
+    user, the sender/recipient pair and a global bucket protecting the shared
+    QKD key rate. A request is only admitted when all three have a token, so
+    a rejection never drains the other buckets.
+
+    Buckets live in process memory, which limits per worker process; set
+    RATE_LIMIT_REDIS_URL to share them between processes and hosts.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.store = MemoryBucketStore()
+        self.limits: Dict[str, Tuple[float, float]] = {}
+
+    def init_app(self, app):
+        self.enabled = app.config['RATE_LIMIT_ENABLED']
+        self.limits = {
+            'user': parse_limit(app.config['RATE_LIMIT_KM_PER_USER']),
+            'pair': parse_limit(app.config['RATE_LIMIT_KM_PER_PAIR']),
+            'global': parse_limit(app.config['RATE_LIMIT_KM_GLOBAL'])
+        }
+
+        if app.config['RATE_LIMIT_REDIS_URL']:
+            self.store = RedisBucketStore(app.config['RATE_LIMIT_REDIS_URL'])
+        else:
+            self.store = MemoryBucketStore(
+                idle_after=max(capacity / rate for capacity, rate in self.limits.values())
+            )
+
+    def check_km_request(self, user_id: int, recipient_email: str, cost: float = 1):
+        """
+        Charge one Key Manager request.
+
+        Raises:
+            RateLimitExceeded: if any of the user, pair or global buckets is empty
+        """
+        if not self.enabled:
+            return
+
+        buckets = [
+            (f'km:user:{user_id}',) + self.limits['user'],
+            (f'km:pair:{user_id}:{recipient_email.lower().strip()}',) + self.limits['pair'],
+            ('km:global',) + self.limits['global']
+        ]
+        wait, limited = self.store.take(buckets, cost)
+        if limited is not None:
+            raise RateLimitExceeded(wait, limited.split(':')[1])
+
+
+def rate_limited_response(error: RateLimitExceeded):
+    """429 response with a Retry-After header in whole seconds."""
+    response = jsonify({
+        'error': 'Rate limit exceeded, please retry later',
+        'scope': error.scope,
+        'retry_after': round(error.retry_after, 3)
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(error.retry_after)))
+    return response
+
+
+rate_limiter = RateLimiter()
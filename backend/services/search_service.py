@@ -0,0 +1,345 @@
+from backend.models import db
+from backend.models.email import Email
+from backend.models.archive import ArchivedEmail
+from backend.models.user import User
+from sqlalchemy import select, func, inspect, or_, text, table, column, literal_column
+from sqlalchemy.orm import aliased, joinedload
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+import re
+
+
+class SearchService:
+    """
+    Full-text search over email subjects and sender/recipient addresses.
+
+    The index lives in a side table keyed by email id: an FTS5 virtual table
+    on SQLite and a tsvector column with a GIN index on PostgreSQL. Other
+    databases fall back to LIKE scans.
+
+    Index terms are scoped to a mailbox: the subject word 'budget' of an email
+    from user 3 to user 12 is indexed as 'i12sbudget' (inbox of 12) and
+    'o3sbudget' (outbox of 3). A query therefore only reads the searching
+    user's postings, so latency depends on mailbox size rather than on how
+    common a word is across the whole corpus.
+
+    Archived emails (see ArchiveService) are not in the index; they are
+    matched with LIKE scans over the user's archived rows and listed after
+    the hot results.
+    """
+
+    SQLITE_TABLE = 'emails_fts'
+    POSTGRES_TABLE = 'email_search'
+    MAX_TERMS = 8
+    BACKFILL_BATCH_SIZE = 5000
+
+    # Field codes used in scoped index terms
+    SUBJECT, SENDER, RECIPIENT = 's', 'f', 't'
+
+    def _dialect(self) -> str:
+        return db.engine.dialect.name
+
+    def ensure_index(self):
+        """Create the search index if missing and backfill it from existing emails."""
+        dialect = self._dialect()
+        inspector = inspect(db.engine)
+
+        if dialect == 'sqlite':
+            if inspector.has_table(self.SQLITE_TABLE):
+                return
+            db.session.execute(text(
+                "CREATE VIRTUAL TABLE emails_fts USING fts5(document, detail=column)"
+            ))
+
+        elif dialect == 'postgresql':
+            if inspector.has_table(self.POSTGRES_TABLE):
+                return
+            db.session.execute(text(
+                "CREATE TABLE email_search ("
+                "email_id INTEGER PRIMARY KEY REFERENCES emails(id) ON DELETE CASCADE, "
+                "document TSVECTOR NOT NULL)"
+            ))
+            db.session.execute(text(
+                "CREATE INDEX ix_email_search_document ON email_search USING GIN (document)"
+            ))
+
+        else:
+            return
+
+        self._backfill()
+        db.session.commit()
+
+    def _backfill(self):
+        """Index every existing email in batches."""
+        sender_user = aliased(User)
+        recipient_user = aliased(User)
+        rows = db.session.execute(
+            select(Email.id, Email.sender_id, Email.recipient_id, Email.subject,
+                   sender_user.email, recipient_user.email)
+            .join(sender_user, sender_user.id == Email.sender_id)
+            .join(recipient_user, recipient_user.id == Email.recipient_id)
+            .execution_options(yield_per=self.BACKFILL_BATCH_SIZE)
+        )
+
+        for batch in rows.partitions():
+            self._insert_documents([
+                {'id': email_id, 'document': self._document(
+                    sender_id, recipient_id, subject, sender_email, recipient_email
+                )}
+                for email_id, sender_id, recipient_id, subject, sender_email, recipient_email in batch
+            ])
+
+    def index_email(self, email: Email, sender_email: str, recipient_email: str):
+        """
+        Add a newly inserted email to the search index.
+
+        Runs in the caller's transaction so the index never sees an email
+        that was rolled back. The email must already be flushed.
+        """
+        self.index_emails([(email, sender_email, recipient_email)])
+
+    def index_emails(self, emails: List[Tuple[Email, str, str]]):
+        """Index a batch of newly inserted (email, sender_email, recipient_email) in one statement."""
+        self._insert_documents([{
+            'id': email.id,
+            'document': self._document(
+                email.sender_id, email.recipient_id, email.subject, sender_email, recipient_email
+            )
+        } for email, sender_email, recipient_email in emails])
+
+    def remove_emails(self, email_ids: List[int]):
+        """Drop emails from the search index, in the caller's transaction."""
+        if not email_ids:
+            return
+
+        dialect = self._dialect()
+        rows = [{'id': email_id} for email_id in email_ids]
+        if dialect == 'sqlite':
+            db.session.execute(text("DELETE FROM emails_fts WHERE rowid = :id"), rows)
+        elif dialect == 'postgresql':
+            db.session.execute(text("DELETE FROM email_search WHERE email_id = :id"), rows)
+
+    def _insert_documents(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+
+        dialect = self._dialect()
+        if dialect == 'sqlite':
+            db.session.execute(text(
+                "INSERT INTO emails_fts (rowid, document) VALUES (:id, :document)"
+            ), rows)
+        elif dialect == 'postgresql':
+            db.session.execute(text(
+                "INSERT INTO email_search (email_id, document) "
+                "VALUES (:id, to_tsvector('simple', :document))"
+            ), rows)
+
+    def _document(self, sender_id: int, recipient_id: int, subject: str,
+                  sender_email: str, recipient_email: str) -> str:
+        """Build the scoped term list for one email."""
+        fields = [
+            (self.SUBJECT, self._words(subject, limit=None)),
+            (self.SENDER, self._words(sender_email, limit=None)),
+            (self.RECIPIENT, self._words(recipient_email, limit=None)),
+        ]
+        terms = []
+        for owner in (f'i{recipient_id}', f'o{sender_id}'):
+            for field, words in fields:
+                terms.extend(f'{owner}{field}{word}' for word in words)
+        return ' '.join(terms)
+
+    def search(self, user_id: int, query: str = '', folder: str = 'all',
+               sender: str = '', recipient: str = '',
+               date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+               page: int = 1, per_page: int = 20) -> Dict[str, Any]:
+        """
+        Search a user's emails.
+
+        Args:
+            user_id: ID of the searching user
+            query: Free-text terms matched against subject and addresses
+            folder: 'inbox', 'outbox' or 'all'
+            sender: Terms matched against the sender address only
+            recipient: Terms matched against the recipient address only
+            date_from: Only emails created at or after this time
+            date_to: Only emails created before this time
+            page: 1-based page number
+            per_page: Page size
+
+        Returns:
+            Dict with ranked emails and pagination info
+        """
+        stmt = select(Email.id)
+
+        if folder == 'inbox':
+            stmt = stmt.where(Email.recipient_id == user_id)
+        elif folder == 'outbox':
+            stmt = stmt.where(Email.sender_id == user_id)
+        else:
+            stmt = stmt.where(or_(Email.recipient_id == user_id, Email.sender_id == user_id))
+
+        if date_from:
+            stmt = stmt.where(Email.created_at >= date_from)
+        if date_to:
+            stmt = stmt.where(Email.created_at < date_to)
+
+        terms = self._words(query)
+        sender_terms = self._words(sender)
+        recipient_terms = self._words(recipient)
+
+        if terms or sender_terms or recipient_terms:
+            stmt, order_by = self._apply_text_match(
+                stmt, user_id, folder, terms, sender_terms, recipient_terms
+            )
+        else:
+            order_by = [Email.created_at.desc()]
+
+        hot_total = db.session.execute(
+            select(func.count()).select_from(stmt.subquery())
+        ).scalar()
+        archived_stmt = self._archived_match(
+            user_id, folder, terms, sender_terms, recipient_terms, date_from, date_to
+        )
+        archived_total = db.session.execute(
+            select(func.count()).select_from(archived_stmt.subquery())
+        ).scalar()
+
+        # Hot results first, then archived ones, newest first
+        offset = (page - 1) * per_page
+        ids = db.session.execute(
+            stmt.order_by(*order_by).limit(per_page).offset(offset)
+        ).scalars().all() if offset < hot_total else []
+
+        emails = self._load_in_order(Email, ids)
+        if len(ids) < per_page and archived_total:
+            archived_ids = db.session.execute(
+                archived_stmt.order_by(ArchivedEmail.created_at.desc())
+                .limit(per_page - len(ids)).offset(max(offset - hot_total, 0))
+            ).scalars().all()
+            emails += self._load_in_order(ArchivedEmail, archived_ids)
+
+        return {
+            'emails': [email.to_dict() for email in emails],
+            'page': page,
+            'per_page': per_page,
+            'total': hot_total + archived_total
+        }
+
+    def _archived_match(self, user_id: int, folder: str, terms: List[str],
+                        sender_terms: List[str], recipient_terms: List[str],
+                        date_from: Optional[datetime], date_to: Optional[datetime]):
+        """Select the ids of the user's archived emails that match, with LIKE scans."""
+        stmt = select(ArchivedEmail.id)
+
+        if folder == 'inbox':
+            stmt = stmt.where(ArchivedEmail.recipient_id == user_id)
+        elif folder == 'outbox':
+            stmt = stmt.where(ArchivedEmail.sender_id == user_id)
+        else:
+            stmt = stmt.where(or_(ArchivedEmail.recipient_id == user_id, ArchivedEmail.sender_id == user_id))
+
+        if date_from:
+            stmt = stmt.where(ArchivedEmail.created_at >= date_from)
+        if date_to:
+            stmt = stmt.where(ArchivedEmail.created_at < date_to)
+
+        if terms or sender_terms or recipient_terms:
+            sender_user = aliased(User)
+            recipient_user = aliased(User)
+            stmt = stmt.join(sender_user, sender_user.id == ArchivedEmail.sender_id) \
+                .join(recipient_user, recipient_user.id == ArchivedEmail.recipient_id)
+            for term in terms:
+                stmt = stmt.where(or_(ArchivedEmail.subject.ilike(f'%{term}%'),
+                                      sender_user.email.ilike(f'%{term}%'),
+                                      recipient_user.email.ilike(f'%{term}%')))
+            for term in sender_terms:
+                stmt = stmt.where(sender_user.email.ilike(f'%{term}%'))
+            for term in recipient_terms:
+                stmt = stmt.where(recipient_user.email.ilike(f'%{term}%'))
+
+        return stmt
+
+    def _scoped_groups(self, user_id: int, folder: str, terms: List[str],
+                       sender_terms: List[str], recipient_terms: List[str]) -> List[List[str]]:
+        """
+        Expand user terms into scoped index prefixes.
+
+        Returns one group per user term; a match needs any prefix in every group.
+        """
+        owners = {'inbox': [f'i{user_id}'], 'outbox': [f'o{user_id}']}.get(
+            folder, [f'i{user_id}', f'o{user_id}']
+        )
+        any_field = (self.SUBJECT, self.SENDER, self.RECIPIENT)
+
+        groups = []
+        for fields, words in ((any_field, terms),
+                              ((self.SENDER,), sender_terms),
+                              ((self.RECIPIENT,), recipient_terms)):
+            for word in words:
+                groups.append([f'{owner}{field}{word}' for owner in owners for field in fields])
+        return groups
+
+    def _apply_text_match(self, stmt, user_id: int, folder: str, terms: List[str],
+                          sender_terms: List[str], recipient_terms: List[str]) -> Tuple[Any, List]:
+        """Join the dialect's index and return (statement, order_by)."""
+        dialect = self._dialect()
+        groups = self._scoped_groups(user_id, folder, terms, sender_terms, recipient_terms)
+
+        if dialect == 'sqlite':
+            match = ' AND '.join(
+                '(' + ' OR '.join(f'"{prefix}"*' for prefix in group) + ')' for group in groups
+            )
+            # Materialize the match first: otherwise SQLite may drive the join
+            # from the emails indexes and re-run the MATCH once per row.
+            fts = select(
+                literal_column('rowid').label('email_id'),
+                literal_column('bm25(emails_fts)').label('rank')
+            ).select_from(table(self.SQLITE_TABLE)).where(
+                text('emails_fts MATCH :match').bindparams(match=match)
+            ).cte('fts').prefix_with('MATERIALIZED')
+
+            stmt = stmt.join(fts, fts.c.email_id == Email.id)
+            return stmt, [fts.c.rank, Email.created_at.desc()]
+
+        if dialect == 'postgresql':
+            tsquery = ' & '.join(
+                '(' + ' | '.join(f'{prefix}:*' for prefix in group) + ')' for group in groups
+            )
+            index = table(self.POSTGRES_TABLE, column('email_id'))
+            stmt = stmt.join(index, index.c.email_id == Email.id).where(
+                text("email_search.document @@ to_tsquery('simple', :tsq)").bindparams(tsq=tsquery)
+            )
+            rank = text(
+                "ts_rank(email_search.document, to_tsquery('simple', :tsq_rank)) DESC"
+            ).bindparams(tsq_rank=tsquery)
+            return stmt, [rank, Email.created_at.desc()]
+
+        # No full-text support: LIKE scans over the user's emails
+        sender_user = aliased(User)
+        recipient_user = aliased(User)
+        stmt = stmt.join(sender_user, sender_user.id == Email.sender_id) \
+            .join(recipient_user, recipient_user.id == Email.recipient_id)
+        for term in terms:
+            stmt = stmt.where(or_(Email.subject.ilike(f'%{term}%'),
+                                  sender_user.email.ilike(f'%{term}%'),
+                                  recipient_user.email.ilike(f'%{term}%')))
+        for term in sender_terms:
+            stmt = stmt.where(sender_user.email.ilike(f'%{term}%'))
+        for term in recipient_terms:
+            stmt = stmt.where(recipient_user.email.ilike(f'%{term}%'))
+        return stmt, [Email.created_at.desc()]
+
+    def _words(self, value: str, limit: Optional[int] = MAX_TERMS) -> List[str]:
+        """Split text into lowercase alphanumeric words."""
+        if not value:
+            return []
+        return re.findall(r'[^\W_]+', value.lower())[:limit]
+
+    def _load_in_order(self, model, ids: List[int]) -> List[Any]:
+        """Load emails (or archived emails) by id in one query, preserving the ranked order."""
+        if not ids:
+            return []
+        query = model.query.options(joinedload(model.sender), joinedload(model.recipient)) \
+            .filter(model.id.in_(ids))
+        emails = {email.id: email for email in query.all()}
+        return [emails[email_id] for email_id in ids if email_id in emails]
\ No newline at end of file
@@ -0,0 +1,47 @@
+from backend.models import db
+from flask import jsonify
+from contextlib import contextmanager
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Commit everything done inside the block once, or roll it all back.
+
+    For work outside a request (CLI commands, jobs, streamed responses whose
+    body runs after the request has finished).
+    """
+    try:
+        yield db.session
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def init_app(app):
+    """
+    Make each request a single transaction.
+
+    Models and services only add, flush and execute; the session is committed
+    once after a successful view and rolled back after an error response.
+    """
+
+    @app.after_request
+    def commit_unit_of_work(response):
+        if not db.session().in_transaction():
+            return response
+
+        if response.status_code >= 400:
+            db.session.rollback()
+            return response
+
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error committing request: {str(e)}")
+            response = jsonify({'error': 'Failed to save changes'})
+            response.status_code = 500
+
+        return response
\ No newline at end of file
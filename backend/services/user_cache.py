@@ -0,0 +1,160 @@
+from backend.models import db
+from backend.models.user import User
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+import threading
+import time
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and hit-rate statistics."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return the cached value, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class UserCache:
+    """
+    In-process cache of users keyed by ID and by normalized email.
+
+    Entries are plain column snapshots, never live ORM objects, so they can be
+    shared across requests and threads. A hit is attached to the current
+    session with merge(load=False), which issues no SQL.
+
+    Entries are invalidated whenever a User row is updated or deleted through
+    the ORM (deactivation, profile changes) and after the write-behind
+    last_login flush. Other bulk writes and changes made by other processes
+    become visible after USER_CACHE_TTL seconds at most.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.by_id = TTLCache()
+        self.by_email = TTLCache()
+
+    def init_app(self, app):
+        self.enabled = app.config['USER_CACHE_ENABLED']
+        self.by_id = TTLCache(app.config['USER_CACHE_MAX_ENTRIES'], app.config['USER_CACHE_TTL'])
+        self.by_email = TTLCache(app.config['USER_CACHE_MAX_ENTRIES'], app.config['USER_CACHE_TTL'])
+
+        if not event.contains(User, 'after_update', _invalidate_user):
+            event.listen(User, 'after_update', _invalidate_user)
+            event.listen(User, 'after_delete', _invalidate_user)
+
+    def get(self, user_id: int) -> Optional[User]:
+        """Get user by ID (Flask-Login user_loader)."""
+        if not self.enabled:
+            return db.session.get(User, user_id)
+
+        snapshot = self.by_id.get(user_id)
+        if snapshot is None:
+            user = db.session.get(User, user_id)
+            if user:
+                self._store(user)
+            return user
+
+        return self._attach(snapshot)
+
+    def get_by_email(self, email: str) -> Optional[User]:
+        """Get user by email address. Only existing users are cached."""
+        email = email.lower().strip()
+        if not self.enabled:
+            return User.query.filter_by(email=email).first()
+
+        user_id = self.by_email.get(email)
+        snapshot = self.by_id.get(user_id) if user_id is not None else None
+        if snapshot is None or snapshot['email'].lower() != email:
+            user = User.query.filter_by(email=email).first()
+            if user:
+                self._store(user)
+            return user
+
+        return self._attach(snapshot)
+
+    def invalidate(self, user: User):
+        """Drop a user from both indexes."""
+        self.by_id.delete(user.id)
+        if user.email:
+            self.by_email.delete(user.email.lower())
+
+    def clear(self):
+        self.by_id.clear()
+        self.by_email.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get hit-rate statistics for both indexes."""
+        return {'by_id': self.by_id.stats(), 'by_email': self.by_email.stats()}
+
+    def _store(self, user: User):
+        snapshot = {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs}
+        self.by_id.set(user.id, snapshot)
+        self.by_email.set(user.email.lower(), user.id)
+
+    def _attach(self, snapshot: Dict[str, Any]) -> User:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+
+def _invalidate_user(mapper, connection, target):
+    user_cache.invalidate(target)
+
+
+user_cache = UserCache()
\ No newline at end of file
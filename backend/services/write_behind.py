@@ -0,0 +1,187 @@
+from backend.models import db
+from backend.models.email import Email
+from backend.models.user import User
+from backend.services.unit_of_work import unit_of_work
+from backend.services.user_cache import user_cache
+from sqlalchemy.orm.attributes import set_committed_value
+from datetime import datetime
+from typing import Dict
+import atexit
+import os
+import threading
+
+
+class WriteBehindBuffer:
+    """
+    Coalesces non-critical status updates and writes them in bulk.
+
+    Buffers users' last_login and emails' read/decrypted flags in memory and
+    flushes them in a few set-based UPDATEs, either every
+    WRITE_BEHIND_FLUSH_INTERVAL seconds or as soon as WRITE_BEHIND_MAX_PENDING
+    updates are waiting. A login storm or a mass-read event then costs one
+    write per row per interval instead of one per request.
+
+    Every flushed statement is idempotent: last_login only moves forward and
+    read_at is only set while still NULL, so a batch that is retried after a
+    failed flush or re-applied after a crash changes nothing twice. A worker
+    that dies loses at most one interval of these non-critical updates. After
+    WRITE_BEHIND_MAX_RETRIES consecutive failed flushes the pending batch is
+    dropped rather than retried forever.
+
+    Key usage is deliberately not buffered: QuantumKey.is_used enforces OTP
+    single use and stays in the request transaction.
+
+    When WRITE_BEHIND_ENABLED is off, updates are applied immediately in the
+    current request's transaction.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._last_login: Dict[int, datetime] = {}
+        self._read: Dict[int, datetime] = {}
+        self._app = None
+        self._thread = None
+        self._pid = None
+        self.enabled = False
+        self.flush_interval = 2.0
+        self.max_pending = 1000
+        self.max_retries = 5
+        self._failures = 0
+        self._exit_hook = False
+
+    def init_app(self, app):
+        self._app = app
+        self.enabled = app.config['WRITE_BEHIND_ENABLED']
+        self.flush_interval = app.config['WRITE_BEHIND_FLUSH_INTERVAL']
+        self.max_pending = app.config['WRITE_BEHIND_MAX_PENDING']
+        self.max_retries = app.config['WRITE_BEHIND_MAX_RETRIES']
+        self._failures = 0
+        if self.enabled and not self._exit_hook:
+            atexit.register(self.flush)
+            self._exit_hook = True
+
+    def record_login(self, user: User, when: datetime = None):
+        """Record a successful login."""
+        when = when or datetime.utcnow()
+        # Reflect the change on the instance without making it dirty
+        set_committed_value(user, 'last_login', when)
+
+        if not self.enabled:
+            self._apply_logins({user.id: when})
+            return
+
+        with self._lock:
+            previous = self._last_login.get(user.id)
+            if previous is None or when > previous:
+                self._last_login[user.id] = when
+        self._after_record()
+
+    def record_read(self, email: Email, when: datetime = None):
+        """Record that the recipient read and decrypted an email."""
+        when = email.read_at or when or datetime.utcnow()
+        set_committed_value(email, 'read_at', when)
+        set_committed_value(email, 'is_decrypted', True)
+
+        if not self.enabled:
+            Email.mark_many_as_read({email.id: when}, decrypted=True)
+            return
+
+        with self._lock:
+            previous = self._read.get(email.id)
+            if previous is None or when < previous:
+                self._read[email.id] = when
+        self._after_record()
+
+    def pending(self) -> int:
+        """Number of buffered updates."""
+        with self._lock:
+            return len(self._last_login) + len(self._read)
+
+    def flush(self) -> Dict[str, int]:
+        """
+        Write all buffered updates in one transaction.
+
+        On failure the batch is merged back into the buffer and retried on the
+        next flush, up to max_retries times in a row; then it is dropped.
+        """
+        with self._lock:
+            logins, self._last_login = self._last_login, {}
+            reads, self._read = self._read, {}
+
+        if not logins and not reads:
+            return {'logins': 0, 'reads': 0}
+
+        try:
+            with self._app.app_context():
+                with unit_of_work():
+                    self._apply_logins(logins)
+                    Email.mark_many_as_read(reads, decrypted=True)
+                for user_id in logins:
+                    user_cache.by_id.delete(user_id)
+        except Exception as e:
+            print(f"Error flushing write-behind buffer: {str(e)}")
+            with self._lock:
+                self._failures += 1
+                if self._failures > self.max_retries:
+                    print(f"Dropping {len(logins)} login and {len(reads)} read updates "
+                          f"after {self._failures} failed write-behind flushes")
+                    self._failures = 0
+                    raise
+                for user_id, when in logins.items():
+                    if when > self._last_login.get(user_id, when.min):
+                        self._last_login[user_id] = when
+                for email_id, when in reads.items():
+                    if when < self._read.get(email_id, when.max):
+                        self._read[email_id] = when
+            raise
+
+        with self._lock:
+            self._failures = 0
+        return {'logins': len(logins), 'reads': len(reads)}
+
+    def _apply_logins(self, logins: Dict[int, datetime]):
+        """Move last_login forward for several users with one UPDATE."""
+        if not logins:
+            return
+
+        when = db.case(logins, value=User.id)
+        db.session.execute(
+            db.update(User)
+            .where(User.id.in_(list(logins)))
+            .where(db.or_(User.last_login.is_(None), User.last_login < when))
+            .values(last_login=when)
+            .execution_options(synchronize_session=False)
+        )
+
+    def _after_record(self):
+        self._ensure_flusher()
+        if self.pending() >= self.max_pending:
+            self._wakeup.set()
+
+    def _ensure_flusher(self):
+        """Start the flush thread, once per process (threads do not survive fork)."""
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='qumail-write-behind', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Batch was re-queued; try again next interval
+                pass
+
+
+write_behind = WriteBehindBuffer()
\ No newline at end of file
@@ -1,5 +1,26 @@
 """
 Utility functions package for QuMail
+
+Submodules are imported on first use, so importing backend.utils stays cheap.
 """
 
-from .helpers import *
\ No newline at end of file
+import importlib
+
+_LAZY_ATTRIBUTES = {
+    'generate_secure_token': 'helpers',
+    'validate_email': 'helpers',
+    'stream_json': 'json_stream',
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
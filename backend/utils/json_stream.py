@@ -0,0 +1,96 @@
+"""
+Streaming JSON responses for large listings.
+
+Items are encoded one at a time as they come off a query iterator and sent
+in batches, so the response never exists in memory as a whole. orjson is
+used when installed (it encodes datetimes natively, in ISO 8601); otherwise
+the stdlib encoder with an equivalent datetime fallback.
+"""
+
+from flask import Response, stream_with_context
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, Optional
+import itertools
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_END = object()
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a value to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def iter_json_array(items: Iterable[Any], key: Optional[str] = None,
+                    extra: Optional[Dict[str, Any]] = None, batch_size: int = 100) -> Iterator[bytes]:
+    """
+    Encode items as a JSON array, yielding chunks of batch_size items.
+
+    Args:
+        items: Items to encode, consumed lazily
+        key: Wrap the array in an object under this key
+        extra: Further (small) members of the wrapping object, written first
+        batch_size: Items per yielded chunk
+
+    Yields:
+        Consecutive pieces of one JSON document
+    """
+    if key is None:
+        yield b'['
+    else:
+        head = dumps(dict(extra or {}, **{key: []}))
+        # Everything up to the empty array's closing bracket
+        yield head[:head.rindex(b'[') + 1]
+
+    batch = []
+    first = True
+    for item in items:
+        batch.append(dumps(item))
+        if len(batch) >= batch_size:
+            yield (b'' if first else b',') + b','.join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield (b'' if first else b',') + b','.join(batch)
+
+    yield b']' if key is None else b']}'
+
+
+def stream_json(items: Iterable[Any], key: Optional[str] = None,
+                extra: Optional[Dict[str, Any]] = None, status: int = 200,
+                batch_size: int = 100) -> Response:
+    """
+    Streamed application/json response of a (possibly huge) item iterator.
+
+    The first item is taken before the response is returned, so errors
+    setting up the iterator or running its query still raise in the view
+    (and become an error response there). The rest is produced after the
+    view returns, inside the request context; an error then cannot change
+    the status code any more, so it ends the body early and the client
+    sees truncated JSON.
+    """
+    items = iter(items)
+    first = next(items, _END)
+    if first is not _END:
+        items = itertools.chain((first,), items)
+
+    def generate():
+        try:
+            yield from iter_json_array(items, key, extra, batch_size)
+        except Exception as e:
+            print(f"Error streaming JSON response: {str(e)}")
+
+    return Response(stream_with_context(generate()), status=status, mimetype='application/json')
@@ -0,0 +1,45 @@
+"""
+Spooled multipart uploads.
+
+File parts of multipart/form-data requests are written to temporary files as
+they arrive instead of being held in memory: parts up to UPLOAD_SPOOL_BYTES
+stay in a memory buffer, larger ones roll over to an anonymous file in
+UPLOAD_TMP_DIR (the system default when unset), removed when the request
+ends. Each part is capped at ATTACHMENT_MAX_BYTES while it streams in, so an
+oversized file fails with 413 without being read to the end; the request as a
+whole is capped by Flask's MAX_CONTENT_LENGTH, checked against the
+Content-Length header before anything is read.
+"""
+
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+from typing import IO, Optional
+import tempfile
+
+
+class SpooledUpload(tempfile.SpooledTemporaryFile):
+    """A spooled temporary file that refuses to grow past limit bytes (0 = no limit)."""
+
+    def __init__(self, limit: int, max_size: int, dir: Optional[str] = None):
+        super().__init__(max_size=max_size, mode='w+b', dir=dir)
+        self.limit = limit
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.size += len(data)
+        if self.limit and self.size > self.limit:
+            raise RequestEntityTooLarge(f'Attachment larger than {self.limit} bytes')
+        return super().write(data)
+
+
+class UploadRequest(Request):
+    """Request class that spools multipart file parts to SpooledUpload files."""
+
+    def _get_file_stream(self, total_content_length: Optional[int], content_type: Optional[str],
+                         filename: Optional[str] = None, content_length: Optional[int] = None) -> IO[bytes]:
+        limit = current_app.config['ATTACHMENT_MAX_BYTES']
+        if limit and content_length is not None and content_length > limit:
+            raise RequestEntityTooLarge(f'Attachment larger than {limit} bytes')
+
+        return SpooledUpload(limit, current_app.config['UPLOAD_SPOOL_BYTES'],
+                             current_app.config['UPLOAD_TMP_DIR'])
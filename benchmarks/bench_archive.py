@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+QuMail Archive Benchmark
+
+Generates a year of mail, then measures the hot emails table (rows, bytes
+and B-tree depth of the table, its indexes and the search index) and the
+latency of common reads before and after moving everything older than
+--after-days into the cold archive. Also reports the archive's compression
+ratio and the cost of reading an archived email (first read of a block and
+cached).
+
+Usage:
+    python benchmarks/bench_archive.py --emails 50000 --after-days 30
+"""
+
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+HOT_OBJECTS = ('emails', 'ix_emails_created_at', 'ix_emails_recipient_created',
+               'ix_emails_sender_created', 'sqlite_autoindex_emails_1', 'emails_fts_data')
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))]
+
+
+def timed(operation, runs):
+    samples = []
+    for run in range(runs):
+        started = time.perf_counter()
+        operation(run)
+        samples.append(time.perf_counter() - started)
+    return percentile(samples, 50) * 1000, percentile(samples, 95) * 1000
+
+
+def table_stats(db):
+    """Bytes and B-tree depth per hot table and index, from SQLite's dbstat."""
+    rows = db.session.execute(db.text(
+        "SELECT name, SUM(pgsize), MAX(LENGTH(path) - LENGTH(REPLACE(path, '/', ''))) "
+        "FROM dbstat GROUP BY name"
+    )).all()
+    return {name: (size, depth) for name, size, depth in rows if name in HOT_OBJECTS}
+
+
+def measure(app, db, user_ids, runs):
+    from backend.models.email import Email
+    from backend.services.email_service import EmailService
+    from backend.services.search_service import SearchService
+
+    email_service = EmailService()
+    search_service = SearchService()
+    rng = random.Random(7)
+    week_ago = datetime.utcnow() - timedelta(days=7)
+
+    def recent_inbox(run):
+        Email.query.filter(Email.recipient_id == rng.choice(user_ids)) \
+            .order_by(Email.created_at.desc()).limit(50).all()
+        db.session.remove()
+
+    def full_inbox(run):
+        for _ in email_service.iter_user_emails(rng.choice(user_ids), 'inbox'):
+            pass
+        db.session.remove()
+
+    def search_recent(run):
+        search_service.search(rng.choice(user_ids), 'report', date_from=week_ago)
+        db.session.remove()
+
+    with app.app_context():
+        stats = table_stats(db)
+        hot_rows = Email.query.count()
+        latencies = {
+            'recent inbox page': timed(recent_inbox, runs),
+            'full inbox stream': timed(full_inbox, max(runs // 10, 1)),
+            'search last week': timed(search_recent, runs),
+        }
+    return hot_rows, stats, latencies
+
+
+def report(label, hot_rows, stats, latencies):
+    print(f"\n{label}: {hot_rows:,} hot emails")
+    for name in HOT_OBJECTS:
+        if name in stats:
+            size, depth = stats[name]
+            print(f"  {name:<30} {size / 1048576:>9.1f} MB  depth {depth}")
+    for name, (p50, p95) in latencies.items():
+        print(f"  {name:<30} p50 {p50:>8.2f} ms  p95 {p95:>8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the hot table before and after archiving')
+    parser.add_argument('--users', type=int, default=500, help='Users to generate')
+    parser.add_argument('--emails', type=int, default=50000, help='Emails to generate')
+    parser.add_argument('--days', type=int, default=365, help='Span of email timestamps')
+    parser.add_argument('--after-days', type=int, default=30, help='Archive emails older than this')
+    parser.add_argument('--runs', type=int, default=200, help='Samples per read latency')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='qumail_archive_')
+    path = os.path.join(workdir, 'bench.db')
+    print(f"Generating {args.users:,} users and {args.emails:,} emails over {args.days} days")
+    subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datagen.py'),
+                    '--database-url', f'sqlite:///{path}', '--users', str(args.users),
+                    '--emails', str(args.emails), '--days', str(args.days), '--payload-scale', '0.2'],
+                   check=True, stdout=subprocess.DEVNULL)
+
+    os.environ['ARCHIVE_DIR'] = os.path.join(workdir, 'archive')
+    from datagen import create_bench_app
+    app = create_bench_app(f'sqlite:///{path}')
+    from backend.models import db
+    from backend.models.archive import ArchiveSegment, ArchivedEmail
+    from backend.services.archive_service import archive
+
+    with app.app_context():
+        user_ids = [row[0] for row in db.session.execute(db.text(
+            "SELECT recipient_id FROM emails GROUP BY recipient_id ORDER BY COUNT(*) DESC LIMIT 50"
+        ))]
+
+    report('Before', *measure(app, db, user_ids, args.runs))
+
+    with app.app_context():
+        started = time.perf_counter()
+        stats = archive.archive(datetime.utcnow() - timedelta(days=args.after_days))
+        elapsed = time.perf_counter() - started
+        db.session.execute(db.text('VACUUM'))
+        raw_bytes, stored_bytes = db.session.execute(
+            db.select(db.func.sum(ArchiveSegment.raw_bytes), db.func.sum(ArchiveSegment.stored_bytes))
+        ).one()
+        print(f"\nArchived {stats['emails']:,} emails into {stats['segments']} segments in {elapsed:.1f}s; "
+              f"payloads {raw_bytes / 1048576:.1f} MB -> {stored_bytes / 1048576:.1f} MB on disk")
+
+        archived_ids = db.session.execute(db.select(ArchivedEmail.id)).scalars().all()
+        rng = random.Random(11)
+
+        def read_archived(run):
+            archive.get_email(rng.choice(archived_ids)).encrypted_body
+            db.session.remove()
+
+        def read_cached(run):
+            archive.get_email(archived_ids[0]).encrypted_body
+            db.session.remove()
+
+        archive._read_block.cache_clear()
+        cold = timed(read_archived, args.runs)
+        warm = timed(read_cached, args.runs)
+        print(f"  {'archived email, cold block':<30} p50 {cold[0]:>8.2f} ms  p95 {cold[1]:>8.2f} ms")
+        print(f"  {'archived email, cached block':<30} p50 {warm[0]:>8.2f} ms  p95 {warm[1]:>8.2f} ms")
+
+    report('After', *measure(app, db, user_ids, args.runs))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
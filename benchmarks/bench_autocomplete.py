@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+QuMail Recipient Autocomplete Benchmark
+
+Builds the in-memory recipient directory for a synthetic user population and
+reports build time, incremental insert cost and lookup latency percentiles
+for /api/auth/users/autocomplete style prefixes.
+
+Usage:
+    python benchmarks/bench_autocomplete.py --users 1000000 --lookups 20000
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+FIRST_NAMES = [
+    'ada', 'alan', 'alice', 'bob', 'carol', 'dave', 'erin', 'frank', 'grace', 'heidi',
+    'ivan', 'judy', 'mallory', 'niaj', 'olivia', 'peggy', 'rupert', 'sybil', 'trent', 'victor'
+]
+DOMAINS = ['example.com', 'qumail.io', 'corp.local', 'mail.org', 'lab.net']
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+    return samples[index]
+
+
+def synthetic_users(count, rng):
+    for user_id in range(1, count + 1):
+        first = rng.choice(FIRST_NAMES)
+        last = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+        email = f'{first}.{last}{user_id}@{rng.choice(DOMAINS)}'
+        yield user_id, email, f'{first.title()} {last.title()}', True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark recipient autocomplete')
+    parser.add_argument('--users', type=int, default=1000000, help='Users in the directory')
+    parser.add_argument('--lookups', type=int, default=20000, help='Lookups to time')
+    parser.add_argument('--limit', type=int, default=10, help='Results per lookup')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--trace-memory', action='store_true', help='Report index memory (slows the build)')
+    args = parser.parse_args()
+
+    from backend.services.directory_service import RecipientDirectory
+
+    rng = random.Random(args.seed)
+    directory = RecipientDirectory()
+    directory.refresh_interval = float('inf')
+
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    directory.build(synthetic_users(args.users, rng))
+    build_seconds = time.perf_counter() - started
+    print(f"build: {args.users} users in {build_seconds:.2f}s, {directory.stats()}")
+    if args.trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"memory: {current / 1e6:.0f} MB retained, {peak / 1e6:.0f} MB peak during build")
+
+    insert_times = []
+    for user_id in range(args.users + 1, args.users + 1001):
+        started = time.perf_counter()
+        directory.add(user_id, f'new.user{user_id}@example.com', f'New User{user_id}')
+        insert_times.append(time.perf_counter() - started)
+    print(f"insert: p50 {percentile(insert_times, 50) * 1e3:.3f} ms, "
+          f"p99 {percentile(insert_times, 99) * 1e3:.3f} ms")
+
+    prefixes = []
+    for _ in range(args.lookups):
+        kind = rng.random()
+        if kind < 0.4:
+            prefixes.append(rng.choice(FIRST_NAMES)[:rng.randint(1, 4)])
+        elif kind < 0.8:
+            prefixes.append(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 5))))
+        else:
+            prefixes.append(f'{rng.choice(FIRST_NAMES)} {rng.choice(string.ascii_lowercase)}')
+
+    print(f"{'prefix length':<14} {'lookups':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    by_length = {}
+    for prefix in prefixes:
+        started = time.perf_counter()
+        directory.search(prefix, args.limit)
+        by_length.setdefault(min(len(prefix), 5), []).append(time.perf_counter() - started)
+
+    for length in sorted(by_length):
+        samples = by_length[length]
+        label = f'{length}+' if length == 5 else str(length)
+        print(f"{label:<14} {len(samples):>8} {percentile(samples, 50) * 1e3:>8.4f} "
+              f"{percentile(samples, 95) * 1e3:>8.4f} {percentile(samples, 99) * 1e3:>8.4f} "
+              f"{max(samples) * 1e3:>8.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+QuMail Crypto Hot Path Benchmark
+
+Times EncryptionService.encrypt_data and decrypt_data per security level
+and message size, and reports how much memory one message allocates:
+
+    alloc/msg   bytes allocated by Python (per tracemalloc) at the peak of
+                one round trip, above what was live before it
+    copies      that peak divided by the message size, i.e. roughly how
+                many copies of the message were alive at once
+
+Bodies are incompressible by default so every byte goes through the cipher;
+pass --text to use compressible text instead.
+
+Usage:
+    python benchmarks/bench_crypto.py --sizes 1024,65536,1048576 --rounds 200
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+    return samples[index]
+
+
+def body(size, text):
+    if text:
+        line = 'date,amount,description,2026-01-01,1234.50,Payment for invoice\n'
+        return (line * (size // len(line) + 1))[:size]
+    return os.urandom(size // 2 + 1).hex()[:size]
+
+
+def peak_allocation(run):
+    """Peak traced bytes above the starting point while run() executes."""
+    tracemalloc.start()
+    run()  # let per-thread buffers and lazy imports settle first
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark encrypt/decrypt per security level')
+    parser.add_argument('--sizes', default='1024,65536,1048576', help='Message sizes in bytes')
+    parser.add_argument('--levels', default='1,2,3,4', help='Security levels to test')
+    parser.add_argument('--rounds', type=int, default=200, help='Round trips per level and size')
+    parser.add_argument('--text', action='store_true', help='Use compressible text bodies')
+    args = parser.parse_args()
+
+    from backend.services.compression import compressor
+    from backend.services.encryption_service import EncryptionService
+
+    compressor.enabled = args.text
+    service = EncryptionService()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    levels = [int(level) for level in args.levels.split(',')]
+
+    print(f"{'level':>5} {'size':>9} {'enc p50 us':>11} {'dec p50 us':>11} {'MB/s':>8} "
+          f"{'alloc/msg':>10} {'copies':>7}")
+    for level in levels:
+        for size in sizes:
+            data = body(size, args.text)
+            key = os.urandom(size + 64)
+
+            def round_trip():
+                service.decrypt_data(service.encrypt_data(data, level, key), key)
+
+            encrypt_samples, decrypt_samples = [], []
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                envelope = service.encrypt_data(data, level, key)
+                encrypted = time.perf_counter()
+                service.decrypt_data(envelope, key)
+                encrypt_samples.append(encrypted - started)
+                decrypt_samples.append(time.perf_counter() - encrypted)
+
+            encrypt_p50 = percentile(encrypt_samples, 50)
+            decrypt_p50 = percentile(decrypt_samples, 50)
+            allocated = peak_allocation(round_trip)
+            print(f"{level:>5} {size:>9} {encrypt_p50 * 1e6:>11.0f} {decrypt_p50 * 1e6:>11.0f} "
+                  f"{size / (encrypt_p50 + decrypt_p50) / 2 ** 20:>8.0f} "
+                  f"{allocated:>10} {allocated / size:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+QuMail Database Concurrency Benchmark
+
+Runs inbox readers and mail writers against the same SQLite file at once,
+first with the old engine settings (rollback journal, synchronous=FULL, no
+mmap, SQLAlchemy's default pool of 5 + 10) and then with the tuned ones
+(WAL, synchronous=NORMAL, mmap, DB_POOL_* sizing). In rollback-journal mode
+a writer locks readers out while it commits; under WAL they keep reading.
+
+Each mode runs in its own process, on its own copy of one generated
+dataset, with the settings passed through the environment as in
+production. Reported per role: operations per second, latency percentiles
+and errors (e.g. "database is locked" after the busy timeout).
+
+Usage:
+    python benchmarks/bench_db_concurrency.py --readers 8 --writers 2 --duration 15
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+MODES = {
+    'before': {'SQLITE_WAL': 'false', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_MMAP_SIZE': '0',
+               'SQLITE_BUSY_TIMEOUT_MS': '5000', 'DB_POOL_SIZE': '5', 'DB_MAX_OVERFLOW': '10'},
+    'after': {},
+}
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+    return samples[index]
+
+
+def run_mode(args):
+    """Child process: hammer the database with the settings from the environment."""
+    from datagen import create_bench_app, envelope
+
+    app = create_bench_app(args.database_url)
+    from backend.models import db
+    from backend.models.email import Email
+    from backend.models.mailbox_counter import MailboxCounter
+    from backend.services.email_service import EmailService
+
+    email_service = EmailService()
+    with app.app_context():
+        user_ids = [row[0] for row in db.session.execute(db.text(
+            "SELECT user_id FROM mailbox_counters WHERE folder = 'inbox' GROUP BY user_id"
+        ))]
+        db.session.remove()
+    body = json.dumps(envelope(4, 2000))
+    deadline = time.monotonic() + args.duration
+    results = {'read': ([], []), 'write': ([], [])}
+    lock = threading.Lock()
+
+    def read(rng):
+        for _ in email_service.iter_user_emails(rng.choice(user_ids), 'inbox', 500):
+            pass
+
+    def write(rng):
+        sender, recipient = rng.sample(user_ids, 2)
+        db.session.add(Email(sender_id=sender, recipient_id=recipient, subject='Concurrency test',
+                             encrypted_body=body, security_level=4, encryption_algorithm='STANDARD',
+                             status='sent'))
+        MailboxCounter.apply(recipient, 'inbox', 4, total=1, unread=1)
+        MailboxCounter.apply(sender, 'outbox', 4, total=1)
+        db.session.commit()
+
+    def worker(role, operation, seed):
+        rng = random.Random(seed)
+        latencies, errors = [], []
+        with app.app_context():
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    operation(rng)
+                    latencies.append(time.perf_counter() - started)
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(str(e).splitlines()[0][:80])
+                finally:
+                    db.session.remove()
+        with lock:
+            results[role][0].extend(latencies)
+            results[role][1].extend(errors)
+
+    threads = [threading.Thread(target=worker, args=('read', read, index)) for index in range(args.readers)]
+    threads += [threading.Thread(target=worker, args=('write', write, 1000 + index))
+                for index in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = {}
+    for role, (latencies, errors) in results.items():
+        report[role] = {
+            'ops_per_second': len(latencies) / args.duration,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'errors': len(errors),
+            'error_sample': sorted(set(errors))[:3],
+        }
+    print(json.dumps(report))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrent reads and writes on SQLite')
+    parser.add_argument('--readers', type=int, default=8, help='Inbox reader threads')
+    parser.add_argument('--writers', type=int, default=2, help='Mail writer threads')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per mode')
+    parser.add_argument('--users', type=int, default=500, help='Users to generate')
+    parser.add_argument('--emails', type=int, default=50000, help='Emails to generate')
+    parser.add_argument('--mode', choices=sorted(MODES), help=argparse.SUPPRESS)
+    parser.add_argument('--database-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args)
+        return
+
+    workdir = tempfile.mkdtemp(prefix='qumail_concurrency_')
+    base = os.path.join(workdir, 'base.db')
+    print(f"Generating {args.users:,} users and {args.emails:,} emails")
+    subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datagen.py'),
+                    '--database-url', f'sqlite:///{base}', '--users', str(args.users),
+                    '--emails', str(args.emails), '--payload-scale', '0.2', '--skip-search-index'],
+                   check=True, stdout=subprocess.DEVNULL)
+    # Fold any WAL back into the file so plain copies are complete
+    connection = sqlite3.connect(base)
+    connection.execute('PRAGMA journal_mode = DELETE')
+    connection.close()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.duration:.0f}s per mode\n")
+    print(f"{'mode':<8} {'role':<6} {'ops/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for mode, settings in MODES.items():
+        path = os.path.join(workdir, f'{mode}.db')
+        shutil.copy(base, path)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--mode', mode, '--database-url', f'sqlite:///{path}',
+             '--readers', str(args.readers), '--writers', str(args.writers), '--duration', str(args.duration)],
+            env=dict(os.environ, **settings), check=True, capture_output=True, text=True
+        ).stdout
+        report = json.loads(output.strip().splitlines()[-1])
+        for role, stats in report.items():
+            print(f"{mode:<8} {role:<6} {stats['ops_per_second']:>8.1f} {stats['p50_ms']:>9.1f} "
+                  f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['errors']:>7}")
+            for error in stats['error_sample']:
+                print(f"{'':<16}{error}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
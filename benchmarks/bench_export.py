@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+QuMail Mailbox Export Benchmark
+
+Imports a generated mbox into one inbox (decryptable mail, unlike
+datagen.py's filler), then exports the folder each way and reports
+messages per second, output size, time to first chunk and peak Python
+heap (traced in a second, untimed run; RSS would mostly show SQLite's
+memory-mapped database pages):
+
+- decrypt: EmailService.decrypt_email per message (the only way to get a
+  mailbox out before the export endpoint), on a sample of the messages
+- export as NDJSON, mbox and gzipped mbox
+
+Then repeats the gzipped mbox export while another thread opens single
+emails, and reports that thread's latency against an idle server.
+
+Usage:
+    python benchmarks/bench_export.py --messages 20000 --body-bytes 4000
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streaming mailbox export')
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--body-bytes', type=int, default=4000)
+    parser.add_argument('--decrypt-sample', type=int, default=1000, help='Messages decrypted one by one')
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    from bench_import import write_mbox
+    workdir = tempfile.mkdtemp(prefix='qumail_export_')
+    path = os.path.join(workdir, 'bench.mbox')
+    senders = [f'sender{index}@bench.local' for index in range(50)]
+    write_mbox(path, args.messages, args.body_bytes, senders)
+
+    os.environ['EXPORT_WORKERS'] = str(args.workers)
+    from datagen import create_bench_app
+    app = create_bench_app(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    from backend.models import db
+    from backend.models.user import User
+    from backend.services.email_service import EmailService
+    from backend.services.export_service import export_service
+    from backend.services.import_service import ImportService
+
+    with app.app_context():
+        for address in senders + ['exporter@bench.local']:
+            db.session.add(User(email=address, full_name=address.split('@')[0], password_hash='x'))
+        db.session.commit()
+        user_id = User.query.filter_by(email='exporter@bench.local').one().id
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            ImportService().import_mailbox(path, 'exporter@bench.local')
+        email_ids = db.session.execute(db.text('SELECT id FROM emails')).scalars().all()
+    print(f"{len(email_ids):,} messages, mbox source {os.path.getsize(path) / 1048576:.1f} MB, "
+          f"{args.workers} export workers\n")
+
+    print(f"{'method':<16} {'msgs/s':>9} {'output MB':>10} {'first chunk':>12} {'peak heap MB':>13}")
+    with app.app_context():
+        email_service = EmailService()
+        sample = random.Random(3).sample(email_ids, min(args.decrypt_sample, len(email_ids)))
+        started = time.perf_counter()
+        for email_id in sample:
+            email_service.decrypt_email(email_id, user_id)
+            db.session.remove()
+        rate = len(sample) / (time.perf_counter() - started)
+        print(f"{'decrypt_email':<16} {rate:>9,.0f} {'-':>10} {'-':>12} {'-':>13}")
+
+    def run_export(fmt, compress):
+        with app.app_context():
+            output = 0
+            first = None
+            stats = {}
+            started = time.perf_counter()
+            for chunk in export_service.export(user_id, 'inbox', fmt, compress, stats):
+                if first is None:
+                    first = time.perf_counter() - started
+                output += len(chunk)
+            db.session.remove()
+            return stats['emails'], time.perf_counter() - started, output, first
+
+    for label, fmt, compress in (('ndjson', 'ndjson', False), ('mbox', 'mbox', False),
+                                 ('mbox + gzip', 'mbox', True)):
+        emails, elapsed, output, first = run_export(fmt, compress)
+        tracemalloc.start()
+        run_export(fmt, compress)
+        peak = tracemalloc.get_traced_memory()[1] / 1048576
+        tracemalloc.stop()
+        print(f"{label:<16} {emails / elapsed:>9,.0f} {output / 1048576:>10.1f} "
+              f"{first * 1000:>9.1f} ms {peak:>13.1f}")
+
+    # Latency of small reads from another thread, idle and during an export
+    def reader(samples, stop):
+        rng = random.Random(5)
+        service = EmailService()
+        while not stop.is_set():
+            with app.app_context():
+                started = time.perf_counter()
+                service.decrypt_email(rng.choice(email_ids), user_id)
+                samples.append(time.perf_counter() - started)
+                db.session.remove()
+            time.sleep(0.005)
+
+    print()
+    for label, exporting in (('idle', False), ('during export', True)):
+        samples = []
+        stop = threading.Event()
+        thread = threading.Thread(target=reader, args=(samples, stop))
+        thread.start()
+        if exporting:
+            run_export('mbox', True)
+        else:
+            time.sleep(3)
+        stop.set()
+        thread.join()
+        print(f"open one email, {label:<14} p50 {percentile(samples, 50) * 1000:>7.2f} ms  "
+              f"p95 {percentile(samples, 95) * 1000:>7.2f} ms  ({len(samples)} reads)")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
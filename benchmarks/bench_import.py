@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+QuMail Bulk Import Benchmark
+
+Writes an mbox of generated messages, then imports it three ways and
+reports messages per second, MB per second and peak memory growth:
+
+- send: EmailService.send_email per message with a commit each (the
+  current migration path, minus HTTP), on a sample of the messages
+- import: ImportService with one worker
+- import: ImportService with IMPORT_WORKERS workers
+
+Raw read speed of the file is shown for reference.
+
+Usage:
+    python benchmarks/bench_import.py --messages 20000 --body-bytes 4000 --workers 4
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from email.message import EmailMessage
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+WORDS = ('quantum key budget report meeting schedule review draft invoice project update '
+         'release notes customer order shipment server backup policy').split()
+
+
+def write_mbox(path, messages, body_bytes, senders, seed=42):
+    """An mbox of messages from senders to the importing user, with an attachment every tenth."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    with open(path, 'wb') as mbox:
+        for index in range(messages):
+            message = EmailMessage()
+            message['From'] = rng.choice(senders)
+            message['To'] = 'importer@bench.local'
+            message['Subject'] = ' '.join(rng.choice(WORDS) for _ in range(5))
+            message['Date'] = format_datetime(now - timedelta(minutes=index))
+            message['Message-ID'] = f'<bench-{index}@bench.local>'
+            words = []
+            while sum(len(word) + 1 for word in words) < body_bytes:
+                words.append(rng.choice(WORDS))
+            message.set_content(' '.join(words))
+            if index % 10 == 0:
+                message.add_attachment(os.urandom(body_bytes // 2), maintype='application',
+                                       subtype='octet-stream', filename=f'file{index}.bin')
+            mbox.write(b'From MAILER-DAEMON Thu Jan  1 00:00:00 2026\n')
+            mbox.write(message.as_bytes().replace(b'\nFrom ', b'\n>From '))
+            mbox.write(b'\n\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk mbox import')
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--body-bytes', type=int, default=4000)
+    parser.add_argument('--send-sample', type=int, default=1000, help='Messages sent one by one')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='qumail_import_')
+    path = os.path.join(workdir, 'bench.mbox')
+    senders = [f'sender{index}@bench.local' for index in range(50)]
+    write_mbox(path, args.messages, args.body_bytes, senders)
+    size_mb = os.path.getsize(path) / 1048576
+
+    started = time.perf_counter()
+    with open(path, 'rb') as mbox:
+        while mbox.read(1 << 20):
+            pass
+    read_speed = size_mb / (time.perf_counter() - started)
+    print(f"{args.messages:,} messages, {size_mb:.1f} MB; raw read {read_speed:,.0f} MB/s\n")
+
+    from datagen import create_bench_app
+    app = create_bench_app(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    from backend.models import db
+    from backend.models.email import Email
+    from backend.models.mailbox_counter import MailboxCounter
+    from backend.models.user import User
+    from backend.services.email_service import EmailService
+    from backend.services.import_service import ImportService
+
+    with app.app_context():
+        for address in senders + ['importer@bench.local']:
+            db.session.add(User(email=address, full_name=address.split('@')[0], password_hash='x'))
+        db.session.commit()
+
+    print(f"{'method':<22} {'msgs/s':>9} {'MB/s':>7} {'peak RSS +MB':>13}")
+    with app.app_context():
+        email_service = EmailService()
+        sender_id = User.query.filter_by(email=senders[0]).one().id
+        body = 'x' * args.body_bytes
+        started = time.perf_counter()
+        for _ in range(args.send_sample):
+            email_service.send_email(sender_id, 'importer@bench.local', 'Sent one by one', body, 4)
+            db.session.commit()
+        elapsed = time.perf_counter() - started
+        rate = args.send_sample / elapsed
+        print(f"{'send_email':<22} {rate:>9,.0f} {rate * size_mb / args.messages:>7.1f} {'-':>13}")
+
+    for workers in sorted({1, args.workers}):
+        app.config['IMPORT_WORKERS'] = workers
+        with app.app_context():
+            # Start from an empty mailbox, or every message is a duplicate
+            db.session.execute(db.text('DELETE FROM emails_fts'))
+            db.session.execute(db.delete(Email))
+            db.session.execute(db.delete(MailboxCounter))
+            db.session.commit()
+
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with app.app_context(), contextlib.redirect_stdout(open(os.devnull, 'w')):
+            started = time.perf_counter()
+            stats = ImportService().import_mailbox(path, 'importer@bench.local', restart=True)
+            elapsed = time.perf_counter() - started
+        peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024
+        label = f'import, {workers} worker' + ('s' if workers > 1 else '')
+        print(f"{label:<22} {args.messages / elapsed:>9,.0f} {size_mb / elapsed:>7.1f} {peak:>13.1f}"
+              f"   ({stats['imported']:,} imported, {stats['skipped']:,} skipped)")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+QuMail Inbox Listing Benchmark
+
+Compares peak Python memory and time of building a folder listing the old
+way (to_dict for every email, then jsonify) with the streamed
+/api/email/inbox response, for growing mailbox sizes. The streamed body is
+consumed chunk by chunk, as a WSGI server would.
+
+Usage:
+    python benchmarks/bench_inbox_stream.py --sizes 1000,10000,50000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from datagen import create_bench_app, envelope
+
+
+def measure(run):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = run()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark buffered vs streamed inbox listings')
+    parser.add_argument('--sizes', default='1000,10000,50000', help='Mailbox sizes to test')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    workdir = tempfile.mkdtemp(prefix='qumail_stream_')
+    app = create_bench_app(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    import json
+    from datetime import datetime, timedelta
+    from flask import jsonify
+    from backend.models import db
+    from backend.models.email import Email
+    from backend.services.email_service import EmailService
+
+    email_service = EmailService()
+    client = app.test_client()
+    client.post('/api/auth/register', json={'email': 'reader@bench.local', 'password': 'benchmark-password',
+                                            'full_name': 'Reader'})
+    client.post('/api/auth/register', json={'email': 'writer@bench.local', 'password': 'benchmark-password',
+                                            'full_name': 'Writer'})
+    client.post('/api/auth/login', json={'email': 'reader@bench.local', 'password': 'benchmark-password'})
+
+    body = json.dumps(envelope(4, 1500))
+    inserted = 0
+    print(f"{'emails':>8} {'buffered ms':>12} {'buffered MB':>12} {'streamed ms':>12} {'streamed MB':>12} {'body MB':>8}")
+    with app.app_context():
+        now = datetime.utcnow()
+        for size in sizes:
+            db.session.execute(Email.__table__.insert(), [{
+                'uuid': f'00000000-0000-4000-8000-{i:012d}',
+                'sender_id': 2,
+                'recipient_id': 1,
+                'subject': f'Message {i}',
+                'encrypted_body': body,
+                'security_level': 4,
+                'encryption_algorithm': 'STANDARD',
+                'created_at': now - timedelta(seconds=i),
+                'status': 'sent'
+            } for i in range(inserted, size)])
+            db.session.commit()
+            inserted = size
+
+            def buffered():
+                with app.test_request_context():
+                    response = jsonify({'emails': email_service.get_user_emails(1, 'inbox')})
+                    return len(response.get_data())
+
+            def streamed():
+                response = client.get('/api/email/inbox', buffered=False)
+                total = sum(len(chunk) for chunk in response.response)
+                response.close()
+                return total
+
+            buffered_time, buffered_peak, _ = measure(buffered)
+            db.session.remove()
+            streamed_time, streamed_peak, body_size = measure(streamed)
+            print(f"{size:>8} {buffered_time * 1e3:>12.0f} {buffered_peak / 2 ** 20:>12.1f} "
+                  f"{streamed_time * 1e3:>12.0f} {streamed_peak / 2 ** 20:>12.1f} {body_size / 2 ** 20:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
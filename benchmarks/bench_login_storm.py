@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+QuMail Login Storm Benchmark
+
+Serves the app from a threaded werkzeug server, floods /api/auth/login from
+many client threads and meanwhile probes an unrelated authenticated endpoint
+(/api/email/counts). Reports login throughput, rejected (503) logins and the
+probe's latency percentiles, first with the KDF running inline in every
+request thread and then on the bounded password-hash pool.
+
+Usage:
+    python benchmarks/bench_login_storm.py --storm-threads 32 --duration 10
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+    return samples[index]
+
+
+def run_storm(base_url, threads, duration, credentials):
+    import requests
+
+    counts = {'ok': 0, 'busy': 0, 'other': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def storm():
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            status = session.post(f'{base_url}/api/auth/login', json=credentials).status_code
+            key = 'ok' if status == 200 else 'busy' if status == 503 else 'other'
+            with lock:
+                counts[key] += 1
+
+    workers = [threading.Thread(target=storm) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    return workers, counts
+
+
+def probe(session, base_url, duration, interval):
+    samples = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        response = session.get(f'{base_url}/api/email/counts', allow_redirects=False)
+        assert response.status_code == 200, response.status_code
+        samples.append(time.perf_counter() - started)
+        time.sleep(interval)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark API responsiveness during a login storm')
+    parser.add_argument('--storm-threads', type=int, default=32, help='Concurrent login clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per scenario')
+    parser.add_argument('--hash-workers', type=int, default=2, help='PASSWORD_HASH_WORKERS for the pooled run')
+    parser.add_argument('--hash-queue', type=int, default=8, help='PASSWORD_HASH_QUEUE for the pooled run')
+    parser.add_argument('--probe-interval', type=float, default=0.05, help='Seconds between probe requests')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='qumail_login_')
+    os.environ['DEV_DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['AUTO_CREATE_SCHEMA'] = 'true'
+
+    import requests
+    from werkzeug.serving import make_server
+    from backend.app import create_app
+    from backend.services.password_service import password_hasher
+
+    app = create_app('development')
+    app.config['DEBUG'] = False
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    storm_user = {'email': 'storm@bench.local', 'password': 'benchmark-password'}
+    probe_user = {'email': 'probe@bench.local', 'password': 'benchmark-password'}
+    client = app.test_client()
+    for credentials in (storm_user, probe_user):
+        client.post('/api/auth/register', json=dict(credentials, full_name='Bench User'))
+
+    print(f"method {app.config['PASSWORD_HASH_METHOD']}, {args.storm_threads} login clients, "
+          f"{args.duration:.0f}s per scenario")
+    print(f"{'scenario':<18} {'logins/s':>9} {'503':>6} {'other':>6} "
+          f"{'probe p50':>10} {'probe p95':>10} {'probe p99':>10}")
+
+    scenarios = [('inline', 0, 0), (f'pool {args.hash_workers}+{args.hash_queue}', args.hash_workers, args.hash_queue)]
+    for name, workers, queue in scenarios:
+        app.config['PASSWORD_HASH_WORKERS'] = workers
+        app.config['PASSWORD_HASH_QUEUE'] = queue
+        password_hasher.init_app(app)
+
+        probe_session = requests.Session()
+        probe_session.post(f'{base_url}/api/auth/login', json=probe_user)
+        storm_threads, counts = run_storm(base_url, args.storm_threads, args.duration, storm_user)
+        samples = probe(probe_session, base_url, args.duration, args.probe_interval)
+        for thread in storm_threads:
+            thread.join()
+
+        print(f"{name:<18} {counts['ok'] / args.duration:>9.1f} {counts['busy']:>6} {counts['other']:>6} "
+              f"{percentile(samples, 50) * 1e3:>8.1f}ms {percentile(samples, 95) * 1e3:>8.1f}ms "
+              f"{percentile(samples, 99) * 1e3:>8.1f}ms")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
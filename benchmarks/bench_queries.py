@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+QuMail Hot Query Benchmark
+
+Times the database work behind the busiest endpoints on a large dataset:
+
+    inbox_heavy     EmailService.get_user_emails for the largest mailboxes
+    inbox_typical   ... for a median mailbox
+    outbox_typical  ... outbox of a median sender
+    valid_key       QuantumKey.get_valid_key for sender/recipient pairs
+    decrypt_lookup  the email and quantum key lookups of decrypt_email
+    bulk_lookup     the batched email and key lookups of decrypt_emails (50 ids)
+    counts          MailboxCounter rows behind /api/email/counts
+
+Run it against a database made by benchmarks/datagen.py, or let it generate
+one with --generate. Works on SQLite and PostgreSQL (--database-url);
+--explain prints the query plan of each lookup next to its timings.
+
+Usage:
+    python benchmarks/datagen.py --database-url sqlite:///big.db --users 100000 --emails 5000000
+    python benchmarks/bench_queries.py --database-url sqlite:///big.db --explain
+    python benchmarks/bench_queries.py --generate --users 2000 --emails 200000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from datagen import create_bench_app, populate, rebuild_search_index
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+    return samples[index]
+
+
+def explain(db, statement, params):
+    """Query plan of a statement in the dialect's own format."""
+    dialect = db.engine.dialect.name
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    rows = db.session.execute(db.text(prefix + statement), params).all()
+    if dialect == 'sqlite':
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark hot QuMail queries on a large dataset')
+    parser.add_argument('--database-url', help='Populated database (see benchmarks/datagen.py)')
+    parser.add_argument('--generate', action='store_true', help='Generate a fresh SQLite dataset first')
+    parser.add_argument('--users', type=int, default=2000, help='Users to generate')
+    parser.add_argument('--emails', type=int, default=200000, help='Emails to generate')
+    parser.add_argument('--queries', type=int, default=200, help='Samples per scenario')
+    parser.add_argument('--heavy-queries', type=int, default=10, help='Samples for inbox_heavy')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--explain', action='store_true', help='Print query plans')
+    args = parser.parse_args()
+
+    if not args.database_url and not args.generate:
+        parser.error('pass --database-url or --generate')
+    database_url = args.database_url or \
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='qumail_queries_'), 'bench.db')}"
+
+    app = create_bench_app(database_url)
+    from backend.models import db
+    from backend.models.email import Email
+    from backend.models.mailbox_counter import MailboxCounter
+    from backend.models.quantum_key import QuantumKey
+    from backend.services.email_service import EmailService
+    from sqlalchemy.orm import joinedload
+
+    email_service = EmailService()
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        if args.generate:
+            print(f"Generating {args.users:,} users and {args.emails:,} emails into {database_url}")
+            populate(db, args.users, args.emails, args.seed)
+            rebuild_search_index(db)
+
+        counts = {table: db.session.execute(db.text(f"SELECT COUNT(*) FROM {table}")).scalar()
+                  for table in ('users', 'emails', 'quantum_keys')}
+        print(f"{db.engine.dialect.name}: " + ', '.join(f'{count:,} {table}' for table, count in counts.items()))
+
+        # Pick subjects for each scenario from the data itself
+        mailboxes = db.session.execute(db.text(
+            "SELECT user_id, SUM(total) FROM mailbox_counters WHERE folder = 'inbox' "
+            "GROUP BY user_id ORDER BY SUM(total) DESC"
+        )).all()
+        senders = db.session.execute(db.text(
+            "SELECT user_id, SUM(total) FROM mailbox_counters WHERE folder = 'outbox' "
+            "GROUP BY user_id ORDER BY SUM(total) DESC"
+        )).all()
+        heavy_users = [user_id for user_id, _ in mailboxes[:max(1, len(mailboxes) // 100)]]
+        middle = len(mailboxes) // 2
+        typical_users = [user_id for user_id, _ in mailboxes[max(0, middle - 50):middle + 50]]
+        middle = len(senders) // 2
+        typical_senders = [user_id for user_id, _ in senders[max(0, middle - 50):middle + 50]]
+        key_pairs = db.session.execute(db.text(
+            "SELECT user_id, recipient_email FROM quantum_keys WHERE is_used = :used LIMIT 1000"
+        ), {'used': False}).all()
+        key_pairs += db.session.execute(db.text(
+            "SELECT user_id, recipient_email FROM quantum_keys WHERE is_used = :used LIMIT 1000"
+        ), {'used': True}).all()
+        quantum_emails = db.session.execute(db.text(
+            "SELECT id, recipient_id FROM emails WHERE security_level IN (1, 2) LIMIT 5000"
+        )).all()
+        max_email_id = db.session.execute(db.text("SELECT MAX(id) FROM emails")).scalar()
+        db.session.remove()
+
+        if not (heavy_users and typical_senders and key_pairs and quantum_emails):
+            raise SystemExit('Dataset is too small or not generated by benchmarks/datagen.py')
+        print(f"heaviest inbox {mailboxes[0][1]:,} emails, median inbox "
+              f"{mailboxes[len(mailboxes) // 2][1]:,}, median outbox {senders[len(senders) // 2][1]:,}")
+
+        def decrypt_lookup():
+            email_id, recipient_id = rng.choice(quantum_emails)
+            email = db.session.get(Email, email_id)
+            QuantumKey.query.filter_by(key_id=email.quantum_key_id).first()
+
+        def bulk_lookup():
+            ids = [rng.randint(1, max_email_id) for _ in range(50)]
+            emails = Email.query.options(joinedload(Email.sender), joinedload(Email.recipient)) \
+                .filter(Email.id.in_(ids)).all()
+            key_ids = {email.quantum_key_id for email in emails if email.quantum_key_id}
+            if key_ids:
+                QuantumKey.query.filter(QuantumKey.key_id.in_(key_ids)).all()
+
+        scenarios = [
+            ('inbox_heavy', args.heavy_queries,
+             lambda: email_service.get_user_emails(rng.choice(heavy_users), 'inbox')),
+            ('inbox_typical', args.queries,
+             lambda: email_service.get_user_emails(rng.choice(typical_users), 'inbox')),
+            ('outbox_typical', args.queries,
+             lambda: email_service.get_user_emails(rng.choice(typical_senders), 'outbox')),
+            ('valid_key', args.queries, lambda: QuantumKey.get_valid_key(*rng.choice(key_pairs))),
+            ('decrypt_lookup', args.queries, decrypt_lookup),
+            ('bulk_lookup', args.queries, bulk_lookup),
+            ('counts', args.queries,
+             lambda: MailboxCounter.query.filter_by(user_id=rng.choice(typical_users)).all()),
+        ]
+
+        print(f"\n{'scenario':<16} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for name, runs, run in scenarios:
+            samples = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                run()
+                samples.append((time.perf_counter() - started) * 1000)
+                db.session.remove()
+            print(f"{name:<16} {percentile(samples, 50):>9.2f} {percentile(samples, 95):>9.2f} "
+                  f"{percentile(samples, 99):>9.2f} {max(samples):>9.2f}")
+
+        if args.explain:
+            plans = {
+                'inbox': ("SELECT * FROM emails WHERE recipient_id = :user ORDER BY created_at DESC",
+                          {'user': heavy_users[0]}),
+                'outbox': ("SELECT * FROM emails WHERE sender_id = :user ORDER BY created_at DESC",
+                           {'user': typical_senders[0]}),
+                'valid_key': ("SELECT * FROM quantum_keys WHERE user_id = :user AND recipient_email = :email "
+                              "AND is_used = :used AND expires_at > :now LIMIT 1",
+                              {'user': key_pairs[0][0], 'email': key_pairs[0][1], 'used': False,
+                               'now': '2000-01-01'}),
+                'key_by_id': ("SELECT * FROM quantum_keys WHERE key_id = :key_id LIMIT 1",
+                              {'key_id': 'gen_0000000000'}),
+            }
+            for name, (statement, params) in plans.items():
+                print(f"\n{name}:")
+                for line in explain(db, statement, params):
+                    print(f"  {line}")
+
+
+if __name__ == '__main__':
+    main()
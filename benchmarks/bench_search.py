@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+QuMail Search Benchmark
+
+Builds a synthetic SQLite corpus, indexes it with SearchService and reports
+latency percentiles for the queries behind /api/email/search.
+
+Usage:
+    python benchmarks/bench_search.py --messages 1000000 --users 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+WORDS = [
+    'budget', 'report', 'quarterly', 'meeting', 'invoice', 'quantum', 'key', 'review',
+    'project', 'deadline', 'contract', 'update', 'lunch', 'travel', 'security', 'audit',
+    'release', 'roadmap', 'hiring', 'offsite', 'draft', 'proposal', 'urgent', 'weekly',
+    'summary', 'customer', 'incident', 'postmortem', 'design', 'launch', 'planning', 'notes'
+]
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+    return samples[index]
+
+
+def populate(db, users, messages, seed):
+    """Bulk insert users and emails without going through the services."""
+    from backend.models.user import User
+    from backend.models.email import Email
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    db.session.execute(User.__table__.insert(), [{
+        'email': f'user{i}@example{i % 50}.com',
+        'password_hash': 'x',
+        'full_name': f'User {i}',
+        'is_active': True,
+        'created_at': now
+    } for i in range(1, users + 1)])
+
+    chunk = 50000
+    for start in range(0, messages, chunk):
+        rows = []
+        for _ in range(min(chunk, messages - start)):
+            rows.append({
+                'uuid': str(uuid.uuid4()),
+                'sender_id': rng.randint(1, users),
+                'recipient_id': rng.randint(1, users),
+                'subject': ' '.join(rng.sample(WORDS, rng.randint(2, 6))),
+                'encrypted_body': '{}',
+                'security_level': rng.randint(1, 4),
+                'encryption_algorithm': 'STANDARD',
+                'created_at': now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+                'status': 'sent'
+            })
+        db.session.execute(Email.__table__.insert(), rows)
+        db.session.commit()
+        print(f"  inserted {start + len(rows):,} emails")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /api/email/search queries')
+    parser.add_argument('--messages', type=int, default=200000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='qumail_search_')
+    os.environ['DEV_DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['AUTO_CREATE_SCHEMA'] = 'true'
+
+    from backend.app import create_app
+    from backend.models import db
+    from backend.services.search_service import SearchService
+
+    app = create_app('development')
+    search_service = SearchService()
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        print(f"Populating {args.messages:,} emails for {args.users:,} users in {workdir}")
+        populate(db, args.users, args.messages, args.seed)
+
+        # create_app built an empty index; rebuild it over the corpus
+        db.session.execute(db.text('DROP TABLE IF EXISTS emails_fts'))
+        db.session.commit()
+        started = time.perf_counter()
+        search_service.ensure_index()
+        print(f"Index build: {time.perf_counter() - started:.1f}s")
+
+        scenarios = {
+            'term': lambda: {'query': rng.choice(WORDS)},
+            'prefix': lambda: {'query': rng.choice(WORDS)[:3]},
+            'two_terms': lambda: {'query': ' '.join(rng.sample(WORDS, 2))},
+            'term+date': lambda: {'query': rng.choice(WORDS),
+                                  'date_from': datetime.utcnow() - timedelta(days=30)},
+            'sender': lambda: {'sender': f'user{rng.randint(1, args.users)}'},
+            'date_only': lambda: {'date_from': datetime.utcnow() - timedelta(days=7)},
+        }
+
+        print(f"\n{'scenario':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for name, make_args in scenarios.items():
+            samples = []
+            for _ in range(args.queries):
+                kwargs = make_args()
+                started = time.perf_counter()
+                search_service.search(
+                    user_id=rng.randint(1, args.users),
+                    folder=rng.choice(['inbox', 'outbox', 'all']),
+                    **kwargs
+                )
+                samples.append((time.perf_counter() - started) * 1000)
+                db.session.remove()
+            print(f"{name:<12} {percentile(samples, 50):>8.2f} {percentile(samples, 95):>8.2f} "
+                  f"{percentile(samples, 99):>8.2f} {max(samples):>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+QuMail Startup Benchmark
+
+Measures cold boot to first request: a fresh interpreter imports the app,
+runs create_app against an existing database and serves /api/auth/check
+through the test client. Each run is a new process so nothing is cached
+in memory; the median of several runs is reported per phase.
+
+The database is prepared once up front (with `flask db upgrade` when the
+tree has migrations, otherwise by create_app itself), so the same script
+can be run on older revisions for a before/after comparison.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+from backend.app import create_app
+imported = time.perf_counter()
+app = create_app('development')
+created = time.perf_counter()
+status = app.test_client().get('/api/auth/check').status_code
+served = time.perf_counter()
+print(json.dumps({{
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_request': served - created,
+    'in_process': served - started,
+    'status': status
+}}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cold boot to first request')
+    parser.add_argument('--runs', type=int, default=10, help='Number of cold boots')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='qumail_startup_')
+    env = dict(
+        os.environ,
+        FLASK_ENV='development',
+        DEV_DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        PYTHONPATH=ROOT
+    )
+
+    # Prepare the schema once, outside the measured boots
+    if os.path.isdir(os.path.join(ROOT, 'migrations')):
+        setup = [sys.executable, '-m', 'flask', '--app', 'backend.app:create_app', 'db', 'upgrade']
+    else:
+        setup = [sys.executable, '-c', CHILD.format(root=ROOT)]
+    subprocess.run(setup, cwd=ROOT, env=env, check=True, capture_output=True)
+
+    phases = {'interpreter': [], 'import': [], 'create_app': [], 'first_request': [], 'total': []}
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', CHILD.format(root=ROOT)],
+            cwd=workdir, env=env, check=True, capture_output=True, text=True
+        )
+        total = time.perf_counter() - started
+
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        if timings['status'] != 200:
+            raise SystemExit(f"First request failed with status {timings['status']}")
+        phases['interpreter'].append(total - timings['in_process'])
+        phases['import'].append(timings['import'])
+        phases['create_app'].append(timings['create_app'])
+        phases['first_request'].append(timings['first_request'])
+        phases['total'].append(total)
+
+    print(f"{'phase':<14} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for phase, samples in phases.items():
+        print(f"{phase:<14} {statistics.median(samples) * 1e3:>10.1f} "
+              f"{min(samples) * 1e3:>8.1f} {max(samples) * 1e3:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+QuMail Send/Decrypt Throughput Benchmark
+
+Drives /api/email/send and /api/email/<id>/decrypt through the Flask test
+client against a file-backed SQLite database and reports requests per
+second and database commits per request. Only public endpoints are used,
+so the same script can be run on older revisions for a before/after
+comparison.
+
+Usage:
+    python benchmarks/bench_transactions.py --requests 500 --levels 3,4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark send/decrypt throughput')
+    parser.add_argument('--requests', type=int, default=500, help='Sends (and decrypts) per level')
+    parser.add_argument('--levels', default='3,4', help='Comma-separated security levels')
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(',')]
+
+    workdir = tempfile.mkdtemp(prefix='qumail_tx_')
+    os.environ['DEV_DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['AUTO_CREATE_SCHEMA'] = 'true'
+
+    from sqlalchemy import event
+    from backend.app import create_app
+    from backend.models import db
+
+    app = create_app('development')
+    commits = {'count': 0}
+
+    with app.app_context():
+        event.listen(db.engine, 'commit', lambda conn: commits.__setitem__('count', commits['count'] + 1))
+
+    sender = app.test_client()
+    recipient = app.test_client()
+    for client, email in ((sender, 'sender@bench.local'), (recipient, 'recipient@bench.local')):
+        client.post('/api/auth/register', json={
+            'email': email, 'password': 'benchmark-password', 'full_name': 'Bench User'
+        })
+        client.post('/api/auth/login', json={'email': email, 'password': 'benchmark-password'})
+
+    print(f"{'operation':<12} {'level':>5} {'req/s':>9} {'commits/req':>12} {'errors':>7}")
+    for level in levels:
+        email_ids = []
+        errors = 0
+        commits['count'] = 0
+        started = time.perf_counter()
+        for i in range(args.requests):
+            response = sender.post('/api/email/send', json={
+                'recipient_email': 'recipient@bench.local',
+                'subject': f'Benchmark message {i}',
+                'body': 'The quick brown fox jumps over the lazy dog. ' * 8,
+                'security_level': level
+            })
+            if response.status_code == 201:
+                email_ids.append(response.get_json()['email_id'])
+            else:
+                errors += 1
+        elapsed = time.perf_counter() - started
+        print(f"{'send':<12} {level:>5} {args.requests / elapsed:>9.1f} "
+              f"{commits['count'] / args.requests:>12.2f} {errors:>7}")
+
+        errors = 0
+        commits['count'] = 0
+        started = time.perf_counter()
+        for email_id in email_ids:
+            response = recipient.post(f'/api/email/{email_id}/decrypt')
+            if response.status_code != 200:
+                errors += 1
+        elapsed = time.perf_counter() - started
+        if email_ids:
+            print(f"{'decrypt':<12} {level:>5} {len(email_ids) / elapsed:>9.1f} "
+                  f"{commits['count'] / len(email_ids):>12.2f} {errors:>7}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+QuMail Attachment Upload Benchmark
+
+Sends emails with one large attachment to a server process, once as JSON
+with the file base64 encoded in the body and once as multipart/form-data,
+and reports per-send latency and the server's peak resident memory growth
+(VmHWM over the RSS before the first upload). Each method gets a fresh
+server so the high-water marks do not mix. Also checks that an attachment
+over ATTACHMENT_MAX_BYTES is refused with 413 before it is uploaded whole.
+
+Usage:
+    python benchmarks/bench_upload.py --size-mb 20 --sends 5
+"""
+
+import argparse
+import base64
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+USERS = ({'email': 'sender@bench.local', 'password': 'benchmark-password', 'full_name': 'Sender'},
+         {'email': 'recipient@bench.local', 'password': 'benchmark-password', 'full_name': 'Recipient'})
+
+
+def serve(database_url, port):
+    """Run the app on a threaded werkzeug server (the --serve subprocess)."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from datagen import create_bench_app
+    from werkzeug.serving import make_server
+
+    app = create_bench_app(database_url)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+
+def memory_kb(pid, field):
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_method(method, workdir, payload, sends, limit_mb):
+    import requests
+
+    port = free_port()
+    env = dict(os.environ, ATTACHMENT_MAX_BYTES=str(limit_mb * 1048576),
+               MAX_CONTENT_LENGTH=str((limit_mb * 2 + 16) * 1048576))
+    database_url = f"sqlite:///{os.path.join(workdir, method + '.db')}"
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', database_url, str(port)],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        session = requests.Session()
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                session.get(f'{base_url}/api/auth/check', timeout=1)
+                break
+            except requests.RequestException:
+                if time.monotonic() > deadline:
+                    raise SystemExit('Server did not start')
+                time.sleep(0.2)
+        for user in USERS:
+            session.post(f'{base_url}/api/auth/register', json=user)
+        session.post(f'{base_url}/api/auth/login', json={'email': USERS[0]['email'], 'password': USERS[0]['password']})
+
+        fields = {'recipient_email': USERS[1]['email'], 'subject': 'Upload', 'body': 'See attached',
+                  'security_level': 4}
+        baseline = memory_kb(server.pid, 'VmRSS')
+        timings = []
+        for _ in range(sends):
+            if method == 'json':
+                data = base64.b64encode(payload).decode('ascii')
+                body = dict(fields, attachments=[{'filename': 'file.bin', 'content_type': 'application/octet-stream',
+                                                  'size': len(payload), 'data': data}])
+                started = time.perf_counter()
+                response = session.post(f'{base_url}/api/email/send', json=body)
+            else:
+                started = time.perf_counter()
+                response = session.post(f'{base_url}/api/email/send', data=fields,
+                                        files={'attachments': ('file.bin', payload, 'application/octet-stream')})
+            timings.append(time.perf_counter() - started)
+            if response.status_code != 201:
+                raise SystemExit(f'{method} send failed: {response.status_code} {response.text[:200]}')
+        peak = (memory_kb(server.pid, 'VmHWM') - baseline) / 1024
+
+        refused = None
+        if method == 'multipart':
+            oversized = os.urandom((limit_mb + 1) * 1048576)
+            response = session.post(f'{base_url}/api/email/send', data=fields,
+                                    files={'attachments': ('big.bin', oversized, 'application/octet-stream')})
+            refused = response.status_code
+        return sorted(timings)[len(timings) // 2], peak, refused
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON vs multipart attachment uploads')
+    parser.add_argument('--size-mb', type=int, default=20, help='Attachment size')
+    parser.add_argument('--sends', type=int, default=5)
+    parser.add_argument('--serve', nargs=2, metavar=('DATABASE_URL', 'PORT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve[0], int(args.serve[1]))
+        return
+
+    workdir = tempfile.mkdtemp(prefix='qumail_upload_')
+    payload = os.urandom(args.size_mb * 1048576)
+    print(f"{args.sends} sends with one {args.size_mb} MB attachment\n")
+    print(f"{'method':<11} {'p50 send':>10} {'server peak RSS +MB':>20}")
+    for method in ('json', 'multipart'):
+        latency, peak, refused = run_method(method, workdir, payload, args.sends, args.size_mb)
+        print(f"{method:<11} {latency * 1000:>7.0f} ms {peak:>20.1f}")
+    print(f"\nattachment over ATTACHMENT_MAX_BYTES: HTTP {refused}")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+QuMail Synthetic Dataset Generator
+
+Bulk-loads users, emails and quantum keys with production-like shape so slow
+queries can be reproduced at millions of rows:
+
+- activity is heavy-tailed: sending and receiving follow independent Zipf
+  distributions, so a few users send or hold a large share of all mail
+  while most mailboxes are small
+- security levels are mixed (default 5% OTP, 25% QKD-AES, 20% PQC,
+  50% standard) and every level 1/2 email has its quantum key row, most of
+  them used or expired as in a long-running system, plus a pool of unused
+  keys for get_valid_key
+- bodies have log-normal sizes and a share of emails carry attachments
+- timestamps span --days with more recent mail, older mail is mostly read
+- mailbox counters are rebuilt from the data and the search index is
+  backfilled, so the API sees a consistent database
+
+Payloads are size-realistic filler in the real envelope format, not
+decryptable ciphertext. Every user gets the same password hash (password
+"datagen-password") so generated accounts can log in, e.g. for
+benchmarks/load_test.py.
+
+Rows go in through executemany inserts in --chunk sized batches, one
+transaction per batch, bypassing the ORM.
+
+Usage:
+    python benchmarks/datagen.py --database-url sqlite:///big.db --users 100000 --emails 5000000
+    python benchmarks/datagen.py --database-url postgresql://localhost/qumail_bench --users 100000
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+PASSWORD = 'datagen-password'
+LEVEL_ALGORITHMS = {1: 'OTP', 2: 'AES-QKD', 3: 'PQC-AES', 4: 'STANDARD'}
+SUBJECT_WORDS = [
+    'budget', 'report', 'quarterly', 'meeting', 'invoice', 'quantum', 'key', 'review',
+    'project', 'deadline', 'contract', 'update', 'lunch', 'travel', 'security', 'audit',
+    'release', 'roadmap', 'hiring', 'offsite', 'draft', 'proposal', 'urgent', 'weekly',
+    'summary', 'customer', 'incident', 'postmortem', 'design', 'launch', 'planning', 'notes'
+]
+DOMAINS = ['example.com', 'corp.local', 'mail.test', 'research.org', 'agency.gov', 'lab.net']
+ATTACHMENT_TYPES = [('report.pdf', 'application/pdf'), ('photo.jpg', 'image/jpeg'),
+                    ('data.csv', 'text/csv'), ('notes.txt', 'text/plain')]
+
+
+def parse_levels(spec):
+    weights = {}
+    for part in spec.split(','):
+        level, _, weight = part.partition('=')
+        weights[int(level)] = float(weight)
+    return weights
+
+
+def zipf_cum_weights(count, exponent, rng):
+    """Cumulative Zipf weights over a shuffled user order."""
+    weights = [1.0 / (rank ** exponent) for rank in range(1, count + 1)]
+    rng.shuffle(weights)
+    return list(itertools.accumulate(weights))
+
+
+def envelope(level, size):
+    """An encrypted-body envelope of roughly the right size for its level."""
+    filler = 'A' * (4 * math.ceil(size / 3))
+    if level == 1:
+        return {'encrypted_data': filler, 'security_level': 1, 'algorithm': 'OTP'}
+    if level == 2:
+        return {'encrypted_data': filler, 'iv': 'A' * 24, 'security_level': 2, 'algorithm': 'AES-QKD'}
+    if level == 3:
+        return {'encrypted_data': filler, 'key': 'A' * 44, 'iv': 'A' * 24,
+                'security_level': 3, 'algorithm': 'PQC-AES'}
+    return {'encrypted_data': filler, 'key': 'A' * 44, 'security_level': 4, 'algorithm': 'STANDARD'}
+
+
+def populate(db, users=10000, emails=500000, seed=42, days=365, levels=None,
+             attachment_rate=0.1, sender_skew=1.1, mailbox_skew=0.9, payload_scale=1.0, chunk=20000):
+    """
+    Bulk insert a synthetic dataset into an empty schema.
+
+    Args:
+        db: Flask-SQLAlchemy instance, used inside an app context
+        users: Number of users
+        emails: Number of emails
+        seed: Random seed; the same seed produces the same data
+        days: Span of email timestamps, ending now
+        levels: Dict of security level -> weight
+        attachment_rate: Fraction of emails with attachments
+        sender_skew: Zipf exponent of the sending distribution
+        mailbox_skew: Zipf exponent of the receiving distribution
+        payload_scale: Multiplier on body and attachment sizes (medians ~650 B and ~5 KB)
+        chunk: Rows per insert batch
+
+    Returns:
+        Dict of table name -> inserted rows
+    """
+    from backend.models.user import User
+    from backend.models.email import Email
+    from backend.models.quantum_key import QuantumKey
+    from werkzeug.security import generate_password_hash
+
+    rng = random.Random(seed)
+    levels = levels or {1: 5, 2: 25, 3: 20, 4: 50}
+    level_values, level_weights = list(levels), list(levels.values())
+    now = datetime.utcnow()
+    password_hash = generate_password_hash(PASSWORD)
+
+    addresses = [f'user{i}@{DOMAINS[i % len(DOMAINS)]}' for i in range(1, users + 1)]
+    for start in range(0, users, chunk):
+        db.session.execute(User.__table__.insert(), [{
+            'id': i + 1,
+            'email': addresses[i],
+            'password_hash': password_hash,
+            'full_name': f'User {i + 1}',
+            'is_active': rng.random() > 0.01,
+            'created_at': now - timedelta(days=days + rng.randint(0, 365))
+        } for i in range(start, min(users, start + chunk))])
+        db.session.commit()
+    if db.engine.dialect.name == 'postgresql':
+        # Ids were given explicitly, so move the sequence past them
+        db.session.execute(db.text("SELECT setval(pg_get_serial_sequence('users', 'id'), :id)"), {'id': users})
+        db.session.commit()
+    print(f"  inserted {users:,} users")
+
+    user_ids = range(1, users + 1)
+    send_weights = zipf_cum_weights(users, sender_skew, rng)
+    receive_weights = zipf_cum_weights(users, mailbox_skew, rng)
+    key_rows = 0
+
+    for start in range(0, emails, chunk):
+        count = min(chunk, emails - start)
+        senders = rng.choices(user_ids, cum_weights=send_weights, k=count)
+        recipients = rng.choices(user_ids, cum_weights=receive_weights, k=count)
+        email_rows, keys = [], []
+
+        for index, sender_id, recipient_id in zip(range(start, start + count), senders, recipients):
+            level = rng.choices(level_values, level_weights)[0]
+            created_at = now - timedelta(seconds=int(days * 86400 * rng.random() ** 2))
+            age_days = (now - created_at).days
+            read_at = None
+            if rng.random() < (0.95 if age_days > 7 else 0.4):
+                read_at = created_at + timedelta(minutes=rng.expovariate(1 / 120.0))
+
+            attachments = None
+            if rng.random() < attachment_rate:
+                attachments = json.dumps([{
+                    'filename': filename,
+                    'content_type': content_type,
+                    'size': size,
+                    'encrypted_data': envelope(level, size)
+                } for filename, content_type in rng.sample(ATTACHMENT_TYPES, rng.randint(1, 3))
+                    for size in [min(int(payload_scale * rng.lognormvariate(8.5, 1.2)), 256 * 1024)]])
+
+            key_id = None
+            if level in (1, 2):
+                key_id = f'gen_{index:010d}'
+                keys.append({
+                    'key_id': key_id,
+                    'user_id': sender_id,
+                    'recipient_email': addresses[recipient_id - 1],
+                    'encrypted_key_data': 'A' * 344,
+                    'key_length': 256,
+                    'key_type': 'symmetric',
+                    'created_at': created_at,
+                    'expires_at': created_at + timedelta(hours=24),
+                    'used_at': created_at,
+                    'is_used': True,
+                    'km_source': 'datagen',
+                    'sequence_number': rng.getrandbits(63)
+                })
+
+            email_rows.append({
+                'uuid': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                'sender_id': sender_id,
+                'recipient_id': recipient_id,
+                'subject': ' '.join(rng.sample(SUBJECT_WORDS, rng.randint(2, 6))),
+                'encrypted_body': json.dumps(envelope(level, min(int(payload_scale * rng.lognormvariate(6.5, 1.0)), 64 * 1024))),
+                'encrypted_attachments': attachments,
+                'security_level': level,
+                'quantum_key_id': key_id,
+                'encryption_algorithm': LEVEL_ALGORITHMS[level],
+                'created_at': created_at,
+                'read_at': read_at,
+                'is_decrypted': read_at is not None and rng.random() < 0.5,
+                'status': 'read' if read_at else 'sent'
+            })
+
+        # Unused keys still within their lifetime, one per 20 quantum sends
+        for sender_id, recipient_id in zip(senders[::20], recipients[::20]):
+            created_at = now - timedelta(hours=rng.random() * 23)
+            keys.append({
+                'key_id': f'gen_{uuid.UUID(int=rng.getrandbits(128), version=4).hex}',
+                'user_id': sender_id,
+                'recipient_email': addresses[recipient_id - 1],
+                'encrypted_key_data': 'A' * 344,
+                'key_length': 256,
+                'key_type': 'symmetric',
+                'created_at': created_at,
+                'expires_at': created_at + timedelta(hours=24),
+                'used_at': None,
+                'is_used': False,
+                'km_source': 'datagen',
+                'sequence_number': rng.getrandbits(63)
+            })
+
+        db.session.execute(Email.__table__.insert(), email_rows)
+        if keys:
+            db.session.execute(QuantumKey.__table__.insert(), keys)
+        db.session.commit()
+        key_rows += len(keys)
+        print(f"  inserted {start + count:,} emails, {key_rows:,} quantum keys")
+
+    rebuild_counters(db)
+    return {'users': users, 'emails': emails, 'quantum_keys': key_rows}
+
+
+def rebuild_counters(db):
+    """Recompute mailbox_counters from the emails table."""
+    db.session.execute(db.text("DELETE FROM mailbox_counters"))
+    db.session.execute(db.text(
+        "INSERT INTO mailbox_counters (user_id, folder, security_level, total, unread) "
+        "SELECT recipient_id, 'inbox', security_level, COUNT(*), "
+        "SUM(CASE WHEN read_at IS NULL THEN 1 ELSE 0 END) "
+        "FROM emails GROUP BY recipient_id, security_level"
+    ))
+    db.session.execute(db.text(
+        "INSERT INTO mailbox_counters (user_id, folder, security_level, total, unread) "
+        "SELECT sender_id, 'outbox', security_level, COUNT(*), 0 "
+        "FROM emails GROUP BY sender_id, security_level"
+    ))
+    db.session.commit()
+
+
+def rebuild_search_index(db):
+    """Drop and backfill the search index over the generated emails."""
+    from backend.services.search_service import SearchService
+
+    search_service = SearchService()
+    dialect = db.engine.dialect.name
+    table = search_service.SQLITE_TABLE if dialect == 'sqlite' else search_service.POSTGRES_TABLE
+    db.session.execute(db.text(f'DROP TABLE IF EXISTS {table}'))
+    db.session.commit()
+    search_service.ensure_index()
+
+
+def create_bench_app(database_url):
+    """An app bound to database_url, creating the schema if it is missing."""
+    os.environ['DEV_DATABASE_URL'] = database_url
+    os.environ['AUTO_CREATE_SCHEMA'] = 'true'
+    from backend.app import create_app
+
+    return create_app('development')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Populate a QuMail database with synthetic data')
+    parser.add_argument('--database-url', required=True, help='Target database (schema is created if missing)')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--emails', type=int, default=500000)
+    parser.add_argument('--days', type=int, default=365, help='Span of email timestamps')
+    parser.add_argument('--levels', default='1=5,2=25,3=20,4=50', help='Security level weights')
+    parser.add_argument('--attachment-rate', type=float, default=0.1)
+    parser.add_argument('--sender-skew', type=float, default=1.1, help='Zipf exponent for senders')
+    parser.add_argument('--mailbox-skew', type=float, default=0.9, help='Zipf exponent for recipients')
+    parser.add_argument('--payload-scale', type=float, default=1.0,
+                        help='Multiplier on body/attachment sizes; lower it to keep the file small')
+    parser.add_argument('--chunk', type=int, default=20000, help='Rows per insert batch')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-search-index', action='store_true', help='Do not backfill the search index')
+    args = parser.parse_args()
+
+    app = create_bench_app(args.database_url)
+    from backend.models import db
+
+    with app.app_context():
+        if db.session.execute(db.text("SELECT COUNT(*) FROM users")).scalar():
+            raise SystemExit('Target database already has users; generate into an empty database')
+
+        print(f"Generating {args.users:,} users and {args.emails:,} emails into {args.database_url}")
+        started = time.perf_counter()
+        counts = populate(db, args.users, args.emails, args.seed, args.days, parse_levels(args.levels),
+                          args.attachment_rate, args.sender_skew, args.mailbox_skew, args.payload_scale,
+                          args.chunk)
+        print(f"Rows loaded in {time.perf_counter() - started:.1f}s: {counts}")
+
+        if not args.skip_search_index:
+            started = time.perf_counter()
+            rebuild_search_index(db)
+            print(f"Search index built in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
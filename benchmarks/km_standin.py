@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+QuMail Key Manager Stand-in
+
+A minimal ETSI GS QKD 014 style Key Manager for local load tests. It serves
+the two calls QuMail makes (POST /api/v1/keys/get_key and GET
+/api/v1/status) and returns random keys of the requested size, with an
+optional artificial latency and error rate so KM behaviour can be varied
+between runs.
+
+Usage:
+    python benchmarks/km_standin.py --port 8080 --latency-ms 5 --error-rate 0.01
+
+Then point the app at it with KM_BASE_URL=http://127.0.0.1:8080.
+"""
+
+import argparse
+import base64
+import logging
+import random
+import secrets
+import threading
+import time
+from datetime import datetime
+
+from flask import Flask, jsonify, request
+
+
+def create_km_app(latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                  seed: int = None):
+    """Build the stand-in app; latency is latency_ms plus up to jitter_ms."""
+    app = Flask('km_standin')
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    served = {'keys': 0, 'errors': 0}
+
+    def delay_and_maybe_fail():
+        with lock:
+            pause = (latency_ms + rng.random() * jitter_ms) / 1000.0
+            fail = rng.random() < error_rate
+        if pause:
+            time.sleep(pause)
+        return fail
+
+    @app.route('/api/v1/keys/get_key', methods=['POST'])
+    def get_key():
+        if delay_and_maybe_fail():
+            with lock:
+                served['errors'] += 1
+            return jsonify({'message': 'Key supply temporarily exhausted'}), 503
+
+        data = request.get_json(silent=True) or {}
+        size = int(data.get('size') or 32)
+        with lock:
+            served['keys'] += 1
+        return jsonify({
+            'key_ID': f"standin_{secrets.token_hex(16)}",
+            'key': base64.b64encode(secrets.token_bytes(size)).decode('utf-8'),
+            'size': size,
+            'metadata': {
+                'generation_time': datetime.utcnow().isoformat(),
+                'source': 'km-standin',
+                'type': 'symmetric'
+            }
+        })
+
+    @app.route('/api/v1/status', methods=['GET'])
+    def status():
+        delay_and_maybe_fail()
+        with lock:
+            return jsonify({'status': 'ok', 'keys_served': served['keys'], 'errors': served['errors']})
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local Key Manager stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Fixed latency added to every call')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Uniform random extra latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls answered with 503')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for latency and error draws')
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = create_km_app(args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    print(f"KM stand-in listening on http://{args.host}:{args.port}", flush=True)
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+QuMail Load Test
+
+Drives a realistic mix of API calls against a running QuMail instance and
+reports throughput, latency percentiles and error rates per endpoint. Use it
+to size deployments: change --workers/--threads (or point --base-url at a
+real cluster) and compare the tables.
+
+By default it starts everything locally in subprocesses: the Key Manager
+stand-in (benchmarks/km_standin.py) and the app under gunicorn with a fresh
+SQLite database (pass --database-url to test PostgreSQL). It then registers
+--users synthetic accounts, logs each one in and runs the mix for
+--duration seconds after a --warmup period that is not measured.
+
+Load is either closed-loop (--concurrency clients issuing requests back to
+back) or open-loop (--rate requests per second with Poisson arrivals, served
+by up to --concurrency clients). In open-loop mode latency is measured from
+the scheduled arrival, so a server that falls behind shows queueing delay
+instead of hiding it. The sequence of operations, users and recipients comes
+from --seed, so two runs issue the same requests in the same order.
+
+Usage:
+    python benchmarks/load_test.py --users 50 --concurrency 16 --duration 30
+    python benchmarks/load_test.py --rate 200 --workers 4 --threads 8
+    python benchmarks/load_test.py --mix send_l4=40,inbox=40,decrypt=20 --json out.json
+    python benchmarks/load_test.py --base-url http://qumail.internal:5000 --users 200
+"""
+
+import argparse
+import json
+import os
+import queue
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+DEFAULT_MIX = {
+    'login': 5,
+    'send_l1': 4,
+    'send_l2': 8,
+    'send_l3': 8,
+    'send_l4': 20,
+    'inbox': 30,
+    'decrypt': 20,
+    'quantum_status': 5
+}
+PASSWORD = 'load-test-password'
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+    return samples[index]
+
+
+def parse_mix(spec):
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown operation in --mix: {name} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, timeout=60):
+    import requests
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code < 500:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Timed out waiting for {url}")
+
+
+def start_local_stack(args, workdir):
+    """Start the KM stand-in and the app; returns (base_url, processes)."""
+    km_port, app_port = free_port(), free_port()
+    log = open(os.path.join(workdir, 'server.log'), 'w')
+    processes = []
+
+    processes.append(subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'benchmarks', 'km_standin.py'), '--port', str(km_port),
+         '--latency-ms', str(args.km_latency_ms), '--error-rate', str(args.km_error_rate),
+         '--seed', str(args.seed)],
+        stdout=log, stderr=subprocess.STDOUT
+    ))
+    wait_for(f'http://127.0.0.1:{km_port}/api/v1/status')
+
+    env = dict(
+        os.environ,
+        FLASK_ENV='production',
+        DATABASE_URL=args.database_url or f"sqlite:///{os.path.join(workdir, 'load.db')}",
+        AUTO_CREATE_SCHEMA='true',
+        KM_BASE_URL=f'http://127.0.0.1:{km_port}',
+        RATE_LIMIT_ENABLED='true' if args.rate_limit else 'false',
+        GUNICORN_BIND=f'127.0.0.1:{app_port}',
+        GUNICORN_WORKERS=str(args.workers),
+        GUNICORN_THREADS=str(args.threads),
+        GUNICORN_ACCESS_LOG=os.devnull,
+        GUNICORN_LOG_LEVEL='warning',
+        PYTHONPATH=ROOT
+    )
+    processes.append(subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'), 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    ))
+    base_url = f'http://127.0.0.1:{app_port}'
+    wait_for(f'{base_url}/api/auth/check')
+    return base_url, processes
+
+
+class VirtualUser:
+    """A synthetic account, its login cookie and the emails it can decrypt."""
+
+    def __init__(self, index):
+        self.email = f'load{index:05d}@loadtest.local'
+        self.cookies = None
+        self.received = []
+        self.lock = threading.Lock()
+
+
+class LoadTest:
+    def __init__(self, base_url, users, mix, seed):
+        self.base_url = base_url
+        self.users = users
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.rng = random.Random(seed)
+        self.local = threading.local()
+        self.results = {}
+        self.results_lock = threading.Lock()
+        self.measuring = False
+
+    def session_for(self, user):
+        """Each client thread keeps its own logged-in session per user."""
+        import requests
+
+        sessions = getattr(self.local, 'sessions', None)
+        if sessions is None:
+            sessions = self.local.sessions = {}
+        if user.email not in sessions:
+            session = requests.Session()
+            session.cookies.update(user.cookies)
+            sessions[user.email] = session
+        return sessions[user.email]
+
+    def next_job(self):
+        """Draw the next operation from the seeded generator (one caller at a time)."""
+        operation = self.rng.choices(self.operations, self.weights)[0]
+        user = self.rng.choice(self.users)
+        recipient = self.rng.choice([u for u in self.users if u is not user] or self.users)
+        return operation, user, recipient, self.rng.random()
+
+    def run_job(self, job):
+        operation, user, recipient, draw = job
+        session = self.session_for(user)
+
+        if operation == 'login':
+            import requests
+            response = requests.post(f'{self.base_url}/api/auth/login',
+                                     json={'email': user.email, 'password': PASSWORD})
+        elif operation.startswith('send_l'):
+            response = session.post(f'{self.base_url}/api/email/send', json={
+                'recipient_email': recipient.email,
+                'subject': f'Load test message {int(draw * 1e9)}',
+                'body': 'Quarterly numbers attached. ' * (1 + int(draw * 40)),
+                'security_level': int(operation[-1])
+            })
+            if response.status_code == 201:
+                with recipient.lock:
+                    recipient.received.append(response.json()['email_id'])
+                    del recipient.received[:-200]
+        elif operation == 'decrypt' and user.received:
+            with user.lock:
+                email_id = user.received[int(draw * len(user.received))]
+            response = session.post(f'{self.base_url}/api/email/{email_id}/decrypt')
+        elif operation == 'quantum_status':
+            response = session.get(f'{self.base_url}/api/quantum/status')
+        else:
+            # Inbox, or a decrypt drawn before this user has received anything
+            operation = 'inbox'
+            response = session.get(f'{self.base_url}/api/email/inbox')
+        return operation, response.status_code
+
+    def record(self, operation, status, latency):
+        if not self.measuring:
+            return
+        with self.results_lock:
+            entry = self.results.setdefault(operation, {'latencies': [], 'statuses': {}})
+            entry['latencies'].append(latency)
+            entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+
+    def execute(self, job, scheduled_at):
+        try:
+            operation, status = self.run_job(job)
+        except Exception as e:
+            operation, status = job[0], type(e).__name__
+        self.record(operation, status, time.perf_counter() - scheduled_at)
+
+    def closed_loop(self, concurrency, deadline):
+        job_lock = threading.Lock()
+
+        def client():
+            while time.perf_counter() < deadline:
+                with job_lock:
+                    job = self.next_job()
+                self.execute(job, time.perf_counter())
+
+        self._run_threads(client, concurrency)
+
+    def open_loop(self, rate, concurrency, deadline):
+        jobs = queue.Queue(maxsize=concurrency * 100)
+        dropped = [0]
+
+        def client():
+            while True:
+                item = jobs.get()
+                if item is None:
+                    return
+                job, scheduled_at = item
+                self.execute(job, scheduled_at)
+
+        def scheduler():
+            next_at = time.perf_counter()
+            while next_at < deadline:
+                pause = next_at - time.perf_counter()
+                if pause > 0:
+                    time.sleep(pause)
+                try:
+                    jobs.put_nowait((self.next_job(), next_at))
+                except queue.Full:
+                    dropped[0] += 1
+                    self.record('dropped', 'queue_full', 0.0)
+                next_at += self.rng.expovariate(rate)
+            for _ in range(concurrency):
+                jobs.put(None)
+
+        clients = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+        for thread in clients:
+            thread.start()
+        scheduler()
+        for thread in clients:
+            thread.join()
+        return dropped[0]
+
+    @staticmethod
+    def _run_threads(target, count):
+        threads = [threading.Thread(target=target, daemon=True) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def setup_users(base_url, count):
+    """Register (or reuse) count accounts and log each one in."""
+    import requests
+
+    users = [VirtualUser(i) for i in range(count)]
+    for user in users:
+        session = requests.Session()
+        for path, payload in (('register', {'full_name': f'Load User {user.email[4:9]}'}), ('login', {})):
+            while True:
+                response = session.post(f'{base_url}/api/auth/{path}',
+                                        json=dict(payload, email=user.email, password=PASSWORD))
+                if response.status_code != 503:
+                    break
+                time.sleep(float(response.headers.get('Retry-After', 1)))
+            if path == 'login' and response.status_code != 200:
+                raise SystemExit(f"Could not log in {user.email}: {response.status_code} {response.text}")
+        user.cookies = session.cookies.get_dict()
+    return users
+
+
+def report(results, duration):
+    summary = {}
+    total = sum(len(entry['latencies']) for entry in results.values())
+    print(f"{'endpoint':<16} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>7}  statuses")
+    for operation in sorted(results):
+        entry = results[operation]
+        latencies = entry['latencies']
+        errors = sum(count for status, count in entry['statuses'].items()
+                     if not (isinstance(status, int) and 200 <= status < 300))
+        row = {
+            'requests': len(latencies),
+            'throughput': len(latencies) / duration,
+            'p50_ms': percentile(latencies, 50) * 1e3,
+            'p95_ms': percentile(latencies, 95) * 1e3,
+            'p99_ms': percentile(latencies, 99) * 1e3,
+            'error_rate': errors / len(latencies),
+            'statuses': {str(status): count for status, count in sorted(entry['statuses'].items(), key=str)}
+        }
+        summary[operation] = row
+        statuses = ' '.join(f'{status}:{count}' for status, count in row['statuses'].items())
+        print(f"{operation:<16} {row['requests']:>8} {row['throughput']:>8.1f} {row['p50_ms']:>8.1f} "
+              f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['error_rate']:>6.1%}  {statuses}")
+    print(f"{'total':<16} {total:>8} {total / duration:>8.1f}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the QuMail API')
+    parser.add_argument('--base-url', help='Test an already running server instead of starting one')
+    parser.add_argument('--users', type=int, default=20, help='Synthetic accounts to create')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--rate', type=float, default=0.0,
+                        help='Open-loop arrival rate in requests/s (0 = closed loop)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=5.0, help='Unmeasured seconds before measuring')
+    parser.add_argument('--mix', help=f"Operation weights, e.g. send_l4=40,inbox=60 "
+                                      f"(default {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())})")
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the request sequence')
+    parser.add_argument('--json', help='Also write the results to this file')
+    local = parser.add_argument_group('local stack (ignored with --base-url)')
+    local.add_argument('--workers', type=int, default=2, help='Gunicorn worker processes')
+    local.add_argument('--threads', type=int, default=4, help='Threads per worker')
+    local.add_argument('--database-url', help='Database for the app (default: fresh SQLite file)')
+    local.add_argument('--km-latency-ms', type=float, default=2.0, help='KM stand-in latency')
+    local.add_argument('--km-error-rate', type=float, default=0.0, help='KM stand-in error rate')
+    local.add_argument('--rate-limit', action='store_true', help='Keep KM rate limiting enabled')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    workdir = tempfile.mkdtemp(prefix='qumail_load_')
+    processes = []
+    try:
+        if args.base_url:
+            base_url = args.base_url.rstrip('/')
+        else:
+            base_url, processes = start_local_stack(args, workdir)
+
+        users = setup_users(base_url, args.users)
+        test = LoadTest(base_url, users, mix, args.seed)
+
+        mode = f'open loop {args.rate:g} req/s' if args.rate else 'closed loop'
+        target = base_url if args.base_url else f'{args.workers} workers x {args.threads} threads'
+        print(f"{target}, {args.users} users, {args.concurrency} clients, {mode}, "
+              f"{args.warmup:g}s warmup + {args.duration:g}s")
+
+        for measuring, seconds in ((False, args.warmup), (True, args.duration)):
+            test.measuring = measuring
+            if seconds <= 0:
+                continue
+            deadline = time.perf_counter() + seconds
+            if args.rate:
+                test.open_loop(args.rate, args.concurrency, deadline)
+            else:
+                test.closed_loop(args.concurrency, deadline)
+
+        summary = report(test.results, args.duration)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({'args': vars(args), 'results': summary}, f, indent=2)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
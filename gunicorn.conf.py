@@ -0,0 +1,60 @@
+"""
+Gunicorn configuration for QuMail.
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden from the environment. Send SIGHUP to the
+master for a graceful reload (new workers start before old ones finish
+their requests); workers are also recycled after GUNICORN_MAX_REQUESTS
+requests to bound memory growth.
+"""
+
+import multiprocessing
+import os
+
+
+def _env_bool(name, default):
+    return os.environ.get(name, default).lower() in ['true', 'on', '1']
+
+
+bind = os.environ.get('GUNICORN_BIND') or '0.0.0.0:5000'
+
+# Workers and threads. Request threads mostly wait on the database, the KM
+# and the GIL-free KDF/cipher pools, so a few threads per worker are cheap.
+workers = int(os.environ.get('GUNICORN_WORKERS') or multiprocessing.cpu_count() * 2 + 1)
+threads = int(os.environ.get('GUNICORN_THREADS') or 4)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS') or ('gthread' if threads > 1 else 'sync')
+
+# Load the app once in the master so workers share its memory (including the
+# recipient directory) copy-on-write and start instantly.
+preload_app = _env_bool('GUNICORN_PRELOAD', 'true')
+
+# Recycle workers after N requests, jittered so they don't all restart at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 10000)
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER') or 1000)
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 60)
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT') or 30)
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE') or 5)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or '-'
+errorlog = os.environ.get('GUNICORN_ERROR_LOG') or '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL') or 'info'
+
+
+def post_fork(server, worker):
+    """Give each worker its own database pool, KM session and caches."""
+    from backend.app import init_worker
+
+    init_worker(worker.app.wsgi())
+
+
+def worker_exit(server, worker):
+    """Write out buffered last_login/read updates before the worker goes away."""
+    from backend.services.write_behind import write_behind
+
+    try:
+        write_behind.flush()
+    except Exception as e:
+        server.log.warning(f"Write-behind flush on worker exit failed: {str(e)}")
@@ -3,12 +3,15 @@
 QuMail Application Runner
 Quantum Secure Email Client
 
-Run this file to start the QuMail application.
+Run this file to start the QuMail development server. For production use
+the multi-worker entry point instead:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
 """
 
 import os
 import sys
-from backend.app import create_app
+from backend.app import create_app, init_migrations
 
 
 def main():
@@ -29,6 +32,19 @@ def main():
         print(f"Error creating Flask app: {e}")
         sys.exit(1)
 
+    # Bring the development database schema up to date
+    try:
+        from flask_migrate import upgrade
+        from backend.services.directory_service import directory
+
+        init_migrations(app)
+        with app.app_context():
+            upgrade()
+            directory.load()
+    except Exception as e:
+        print(f"Error migrating the database: {e}")
+        sys.exit(1)
+
     # Print startup information
     print("=" * 60)
     print("🔒 QuMail Application Started!")
@@ -37,7 +53,7 @@ def main():
 
     # Run the app
     try:
-        app.run(debug=True)
+        app.run(debug=app.config.get('DEBUG', False))
     except Exception as e:
         print(f"Error running the application: {e}")
         sys.exit(1)
@@ -0,0 +1,24 @@
+import pytest
+
+from backend.app import create_app
+from backend.models import db
+from backend.models.user import User
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def make_user(app):
+    def make_user(email):
+        user = User(email=email, full_name=email.split('@')[0], password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make_user
@@ -0,0 +1,36 @@
+from werkzeug.security import generate_password_hash
+
+from backend.services.auth_service import AuthService
+from backend.services.password_service import password_hasher
+
+
+def test_failed_logins_run_the_kdf(app, make_user, monkeypatch):
+    user = make_user('alice@example.com')
+    user.password_hash = generate_password_hash('right-password', 'pbkdf2:sha256:1000')
+    inactive = make_user('old@example.com')
+    inactive.password_hash = user.password_hash
+    inactive.is_active = False
+
+    verified = []
+    verify = password_hasher.verify
+    monkeypatch.setattr(password_hasher, 'verify', lambda *args: verified.append(args) or verify(*args))
+
+    service = AuthService()
+    assert service.authenticate_user('alice@example.com', 'right-password') is user
+    for email, password in (('alice@example.com', 'wrong'), ('old@example.com', 'right-password'),
+                            ('nobody@example.com', 'right-password')):
+        verified.clear()
+        assert service.authenticate_user(email, password) is None
+        assert len(verified) == 1
+
+
+def test_needs_rehash_follows_werkzeug_defaults(monkeypatch):
+    # Stand-in for a werkzeug release whose 'scrypt' default records different parameters
+    from backend.services import password_service
+    generate = password_service.generate_password_hash
+    monkeypatch.setattr(password_service, 'generate_password_hash',
+                        lambda password, method: generate(password, 'pbkdf2:sha256:1000'))
+    hasher = password_service.PasswordHasher()
+
+    assert not hasher.needs_rehash(hasher.hash('password'))
+    assert hasher.needs_rehash('scrypt:32768:8:1$salt$0123')
@@ -0,0 +1,21 @@
+from backend.models import db
+from backend.models.email import Email
+from backend.services.email_service import EmailService
+
+
+def test_one_bad_email_does_not_fail_the_rest(app, make_user):
+    alice = make_user('alice@example.com')
+    make_user('bob@example.com')
+    service = EmailService()
+    ids = [service.send_email(alice.id, 'bob@example.com', f'Message {index}', f'Body {index}', 4)['email_id']
+           for index in range(3)]
+    db.session.get(Email, ids[0]).encrypted_body = '{"security_level": 4, "encrypted_data": "AAAA"}'
+    db.session.commit()
+
+    results = list(service.decrypt_emails(ids, alice.id))
+
+    assert [result['email_id'] for result in results] == ids
+    assert results[0]['success'] is False
+    assert results[0]['error'].startswith('Decryption failed: ')
+    assert [result['success'] for result in results[1:]] == [True, True]
+    assert [result['decrypted_body'] for result in results[1:]] == ['Body 1', 'Body 2']
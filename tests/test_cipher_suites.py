@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from backend.services.cipher_suites import cipher_suites
+from backend.services.encryption_service import EncryptionService
+
+
+@pytest.mark.parametrize('suite_id', ['aes-256-gcm', 'chacha20-poly1305'])
+@pytest.mark.parametrize('security_level,label', [(2, 'AES-QKD'), (3, 'PQC-AES'), (4, 'STANDARD')])
+def test_algorithm_names_the_suite(app, suite_id, security_level, label):
+    app.config['CIPHER_SUITE'] = suite_id
+    cipher_suites.init_app(app)
+    service = EncryptionService()
+    key = os.urandom(32)
+
+    envelope = service.encrypt_data('hello', security_level, key)
+
+    assert envelope['suite'] == suite_id
+    assert envelope['algorithm'] == f'{label}/{suite_id}'
+    assert service.decrypt_data(envelope, key) == 'hello'
+
+
+def test_auto_choice_is_exported_as_metrics(app):
+    app.config['CIPHER_SUITE'] = 'auto'
+    cipher_suites.init_app(app)
+    chosen = cipher_suites.default.suite_id
+
+    body = app.test_client().get('/metrics').get_data(as_text=True)
+
+    assert f'qumail_cipher_suite_selected{{suite="{chosen}"}} 1' in body
+    for suite_id in ('aes-256-gcm', 'chacha20-poly1305'):
+        assert f'qumail_cipher_suite_seal_seconds{{suite="{suite_id}"}}' in body
+
+
+def test_crypto_bytes_count_encoded_bytes(app):
+    from backend.services.metrics import crypto_bytes_total
+    service = EncryptionService()
+    text = 'Grüße, 世界'
+    encrypted = crypto_bytes_total.labels('encrypt', 4)
+    decrypted = crypto_bytes_total.labels('decrypt', 4)
+    before = encrypted.value, decrypted.value
+
+    assert service.decrypt_data(service.encrypt_data(text, 4)) == text
+
+    size = len(text.encode('utf-8'))
+    assert (encrypted.value - before[0], decrypted.value - before[1]) == (size, size)
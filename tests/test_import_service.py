@@ -0,0 +1,48 @@
+from backend.models import db
+from backend.models.email import Email
+from backend.services.export_service import export_service
+from backend.services.import_service import ImportService
+
+MESSAGE = b"""From alice@example.com Thu Jan  1 00:00:00 2026
+From: Alice <alice@example.com>
+To: Bob <bob@example.com>
+Cc: Carol <carol@example.com>
+Subject: Plans
+Date: Thu, 01 Jan 2026 00:00:00 +0000
+Message-ID: <plans-1@example.com>
+
+See you there.
+
+"""
+
+
+def test_each_recipient_gets_their_copy(app, make_user, tmp_path):
+    alice, bob, carol = (make_user(f'{name}@example.com') for name in ('alice', 'bob', 'carol'))
+    mbox = tmp_path / 'shared.mbox'
+    mbox.write_bytes(MESSAGE)
+
+    assert ImportService().import_mailbox(str(mbox), bob.email)['imported'] == 1
+    assert ImportService().import_mailbox(str(mbox), carol.email)['imported'] == 1
+    # Importing Bob's mailbox again finds his copy
+    stats = ImportService().import_mailbox(str(mbox), bob.email, restart=True)
+    assert (stats['imported'], stats['skipped']) == (0, 1)
+
+    recipients = db.session.execute(db.select(Email.recipient_id).where(Email.sender_id == alice.id)).scalars()
+    assert sorted(recipients) == sorted([bob.id, carol.id])
+
+
+def test_reimporting_an_export_skips_every_message(app, make_user, tmp_path):
+    make_user('alice@example.com')
+    bob = make_user('bob@example.com')
+    mbox = tmp_path / 'inbox.mbox'
+    mbox.write_bytes(MESSAGE + MESSAGE.replace(b'plans-1', b'plans-2'))
+    assert ImportService().import_mailbox(str(mbox), bob.email)['imported'] == 2
+
+    exported = tmp_path / 'export.mbox'
+    exported.write_bytes(b''.join(export_service.export(bob.id, 'inbox', 'mbox')))
+    uuids = set(db.session.execute(db.select(Email.uuid)).scalars())
+    assert all(f'<{email_uuid}@qumail>'.encode() in exported.read_bytes() for email_uuid in uuids)
+
+    stats = ImportService().import_mailbox(str(exported), bob.email)
+    assert (stats['imported'], stats['skipped']) == (0, 2)
+    assert Email.query.count() == 2
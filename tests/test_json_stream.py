@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+from backend.utils.json_stream import stream_json
+
+
+def failing_query():
+    raise RuntimeError('no such table: emails')
+    yield
+
+
+def test_streams_items_as_one_document(app):
+    with app.test_request_context():
+        response = stream_json(({'id': index} for index in range(250)), key='emails', batch_size=100)
+        assert json.loads(b''.join(response.response)) == {'emails': [{'id': index} for index in range(250)]}
+
+
+def test_empty_listing(app):
+    with app.test_request_context():
+        assert json.loads(b''.join(stream_json(iter(()), key='emails').response)) == {'emails': []}
+
+
+def test_query_errors_raise_before_the_response_is_returned(app):
+    with app.test_request_context(), pytest.raises(RuntimeError):
+        stream_json(failing_query(), key='emails')
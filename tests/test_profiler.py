@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from backend.services.email_service import EmailService
+from backend.services.profiler import request_profiler
+
+
+@pytest.fixture
+def profiled_client(app, make_user, tmp_path):
+    app.config.update(PROFILING_ENABLED=True, PROFILING_TOKEN='secret', PROFILING_DIR=str(tmp_path))
+    request_profiler.init_app(app)
+    make_user('alice@example.com')
+    make_user('bob@example.com')
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+    return client
+
+
+def test_streamed_response_is_profiled_to_the_end(app, profiled_client, tmp_path):
+    email_ids = [EmailService().send_email(1, 'bob@example.com', 'Hi', 'Body', 4)['email_id'] for _ in range(3)]
+
+    response = profiled_client.post('/api/email/decrypt', json={'email_ids': email_ids},
+                                    headers={'X-Profile-Token': 'secret'})
+    lines = response.get_data().splitlines()
+    response.close()
+
+    assert len(lines) == 3
+    summary = json.loads((tmp_path / (response.headers['X-Profile-Id'] + '.json')).read_text())
+    assert summary['endpoint'] == 'email.decrypt_emails'
+    assert any('FROM emails' in entry['statement'] for entry in summary['sql'])
+    assert any('decrypt_emails' in line for line in summary['top_functions'])
@@ -0,0 +1,29 @@
+import pytest
+
+from backend.services.rate_limiter import parse_limit, rate_limiter
+
+
+def test_parse_limit():
+    assert parse_limit('30/minute') == (30.0, 0.5)
+
+
+@pytest.mark.parametrize('spec', ['0/minute', '0.5/hour', 'many/minute'])
+def test_parse_limit_rejects_counts_below_one(spec):
+    with pytest.raises(ValueError):
+        parse_limit(spec)
+
+
+def test_unknown_recipient_does_not_use_km_quota(app, make_user, monkeypatch):
+    make_user('alice@example.com')
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+
+    checked = []
+    monkeypatch.setattr(rate_limiter, 'check_km_request', lambda *args: checked.append(args))
+    response = client.post('/api/email/send', json={
+        'recipient_email': 'nobody@example.com', 'subject': 'Hi', 'body': 'x', 'security_level': 1
+    })
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Recipient not found'
+    assert checked == []
@@ -0,0 +1,39 @@
+import base64
+
+import pytest
+
+
+@pytest.fixture
+def client(app, make_user):
+    make_user('alice@example.com')
+    make_user('bob@example.com')
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+    return client
+
+
+def send(client, attachments):
+    return client.post('/api/email/send', json={
+        'recipient_email': 'bob@example.com', 'subject': 'Files', 'body': 'x', 'security_level': 4,
+        'attachments': attachments
+    })
+
+
+@pytest.mark.parametrize('attachments', [
+    [{'filename': 'a.bin', 'data': 12345}],
+    [{'filename': 'a.bin', 'data': ['QUJD']}],
+    [{'filename': 'a.bin'}],
+    ['QUJD'],
+    'QUJD',
+])
+def test_malformed_attachment_data_is_a_bad_request(client, attachments):
+    response = send(client, attachments)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_json_attachment_is_sent(client):
+    data = base64.b64encode(b'hello').decode()
+    response = send(client, [{'filename': 'a.txt', 'content_type': 'text/plain', 'size': 5, 'data': data}])
+    assert response.status_code == 201
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+
+from backend.models.email import Email
+from backend.services.write_behind import WriteBehindBuffer
+
+
+def failing_update(*args, **kwargs):
+    raise RuntimeError('database is locked')
+
+
+@pytest.fixture
+def buffer(app):
+    buffer = WriteBehindBuffer()
+    buffer.init_app(app)
+    buffer.max_retries = 2
+    return buffer
+
+
+def test_failed_batch_is_dropped_after_max_retries(buffer, monkeypatch, capsys):
+    monkeypatch.setattr(Email, 'mark_many_as_read', failing_update)
+    buffer._read[1] = datetime.utcnow()
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            buffer.flush()
+        assert buffer.pending() == 1
+
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+    assert buffer.pending() == 0
+    assert capsys.readouterr().out.count('Dropping 0 login and 1 read updates') == 1
+
+
+def test_successful_flush_resets_the_retry_count(buffer, monkeypatch):
+    buffer._read[1] = datetime.utcnow()
+    with monkeypatch.context() as patch:
+        patch.setattr(Email, 'mark_many_as_read', failing_update)
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                buffer.flush()
+
+    assert buffer.flush() == {'logins': 0, 'reads': 1}
+
+    buffer._read[2] = datetime.utcnow()
+    monkeypatch.setattr(Email, 'mark_many_as_read', failing_update)
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+    assert buffer.pending() == 1
+
+
+def test_exit_hook_is_registered_once(app, monkeypatch):
+    registered = []
+    monkeypatch.setattr('backend.services.write_behind.atexit.register', registered.append)
+    app.config['WRITE_BEHIND_ENABLED'] = True
+    buffer = WriteBehindBuffer()
+
+    buffer.init_app(app)
+    buffer.init_app(app)
+
+    assert registered == [buffer.flush]
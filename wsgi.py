@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+QuMail WSGI Entry Point
+
+Production servers import the application from here, e.g.:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+FLASK_ENV selects the configuration and defaults to production.
+"""
+
+import os
+from backend.app import create_app
+
+app = create_app(os.environ.get('FLASK_ENV', 'production'))